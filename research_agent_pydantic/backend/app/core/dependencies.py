@@ -0,0 +1,122 @@
+from typing import List, Optional
+import httpx
+from pydantic_ai.models.openai import OpenAIModel
+from app.core.config import Settings
+from app.models.company_agent import CompanyResearchAgent
+from app.services.http_cache import HTTPResponseCache
+from app.services.bounded_executor import BoundedExecutor
+from app.services.linkedin_session import LinkedInCredentialProvider, LinkedInSessionManager
+from app.services.linkedin_index import LinkedInEntityIndex
+from app.services.web_fetcher import FetchLimits
+from app.services.content_compression import ContentCompressor
+from app.services.research_store import ResearchStore, run_migrations
+from app.services.news_feeds import NewsGatherer
+from app.services.http_client import HTTPClientLimits, create_http_client
+from app.services import tracing
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Build the pooled HTTP client shared by every website fetch, probe and news request.
+    """
+    return create_http_client(
+        HTTPClientLimits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            http2=settings.HTTP2_ENABLED,
+            dns_cache_ttl=settings.HTTP_DNS_CACHE_TTL_SECONDS
+        )
+    )
+
+def build_research_agent(settings: Settings, http_client: Optional[httpx.AsyncClient] = None) -> CompanyResearchAgent:
+    """
+    Build the research agent and everything it depends on from settings. The API and the
+    Streamlit app both build theirs here.
+
+    `http_client` is owned by the caller, which closes it; one is built from settings when
+    not given. Tracing is configured for the whole process.
+    """
+    http_client = http_client or build_http_client(settings)
+    http_cache = None
+    if settings.HTTP_CACHE_ENABLED:
+        http_cache = HTTPResponseCache(
+            settings.HTTP_CACHE_PATH,
+            ttl_seconds=settings.HTTP_CACHE_TTL_SECONDS,
+            max_bytes=settings.HTTP_CACHE_MAX_BYTES
+        )
+    # Without credentials the LinkedIn tool reports it is not configured and discovery skips LinkedIn
+    linkedin_session = None
+    linkedin_credentials = LinkedInCredentialProvider(
+        settings.LINKEDIN_EMAIL,
+        settings.LINKEDIN_PASSWORD,
+        settings.LINKEDIN_SECRETS_FILE
+    )
+    if linkedin_credentials.configured():
+        linkedin_session = LinkedInSessionManager(
+            linkedin_credentials,
+            BoundedExecutor(
+                "linkedin",
+                max_workers=settings.LINKEDIN_MAX_WORKERS,
+                max_queue=settings.LINKEDIN_MAX_QUEUE,
+                timeout=settings.LINKEDIN_CALL_TIMEOUT_SECONDS
+            ),
+            cookies_dir=settings.LINKEDIN_COOKIES_DIR
+        )
+    linkedin_index = None
+    if settings.LINKEDIN_INDEX_PATH:
+        linkedin_index = LinkedInEntityIndex(
+            settings.LINKEDIN_INDEX_PATH,
+            content_ttl_seconds=settings.LINKEDIN_CONTENT_TTL_SECONDS
+        )
+    if settings.TRACING_ENABLED:
+        tracing.configure(settings.TRACE_PATH, max_bytes=settings.TRACE_MAX_BYTES, backup_count=settings.TRACE_BACKUP_COUNT)
+    content_compressor = None
+    if settings.CONTENT_COMPRESSION_ENABLED:
+        content_compressor = ContentCompressor(
+            token_budget=settings.CONTENT_TOKEN_BUDGET,
+            passage_tokens=settings.CONTENT_PASSAGE_TOKENS
+        )
+    news_gatherer = None
+    if settings.NEWS_ENABLED:
+        news_gatherer = NewsGatherer(
+            http_client,
+            feed_urls=_split(settings.NEWS_FEED_URLS),
+            newsroom_paths=_split(settings.NEWS_NEWSROOM_PATHS),
+            max_articles=settings.NEWS_MAX_ARTICLES,
+            max_concurrency=settings.NEWS_MAX_CONCURRENCY,
+            cache_ttl_seconds=settings.NEWS_CACHE_TTL_SECONDS,
+            html_parser=settings.HTML_PARSER
+        )
+    research_store = None
+    if settings.DATABASE_URL:
+        if settings.DATABASE_AUTO_MIGRATE:
+            run_migrations(settings.DATABASE_URL)
+        research_store = ResearchStore(
+            settings.DATABASE_URL,
+            batch_size=settings.RESEARCH_STORE_BATCH_SIZE,
+            flush_interval=settings.RESEARCH_STORE_FLUSH_SECONDS
+        )
+    return CompanyResearchAgent(
+        OpenAIModel("gpt-4"),
+        http_cache=http_cache,
+        linkedin_session=linkedin_session,
+        linkedin_index=linkedin_index,
+        html_parser=settings.HTML_PARSER,
+        fetch_limits=FetchLimits(
+            max_bytes=settings.FETCH_MAX_BYTES,
+            connect_timeout=settings.FETCH_CONNECT_TIMEOUT_SECONDS,
+            first_byte_timeout=settings.FETCH_FIRST_BYTE_TIMEOUT_SECONDS,
+            read_timeout=settings.FETCH_READ_TIMEOUT_SECONDS,
+            total_timeout=settings.FETCH_TOTAL_TIMEOUT_SECONDS
+        ),
+        content_compressor=content_compressor,
+        pregather=settings.RESEARCH_PREGATHER,
+        http_client=http_client,
+        research_store=research_store,
+        news_gatherer=news_gatherer,
+        website_snapshot_ttl=settings.WEBSITE_SNAPSHOT_TTL_SECONDS,
+        video_discovery=settings.VIDEO_DISCOVERY_ENABLED
+    )
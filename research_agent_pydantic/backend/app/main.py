@@ -1,15 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic_ai.models.openai import OpenAIModel
-from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest, CompanyOverview
+from app.models.company_agent import (
+    CompanyResearchAgent,
+    CompanyResearchRequest,
+    CompanyOverview,
+    BatchResearchRequest,
+)
 from app.core.config import settings
+from app.core.dependencies import build_http_client, build_research_agent
 from app.services.integration_service import IntegrationService
+from app.services.notion_export_queue import NotionExportQueue
+from app.services.research_cache import (
+    ResearchCache,
+    InMemoryResearchCacheBackend,
+    SQLiteResearchCacheBackend,
+)
+from app.services.single_flight import SingleFlight
+from app.services.research_store import StoredResearchRun
+from app.services.http_client import pool_stats
+from app.services import metrics, tracing
+import asyncio
+import json
+import time
 import uvicorn
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Keep the shared HTTP client open while the app serves requests and release the
+    agent's resources on shutdown.
+    """
+    if notion_export_queue:
+        notion_export_queue.start()
+    async with http_client:
+        yield
+    await research_agent.cleanup()
+    if research_store:
+        await research_store.close()
+    if notion_export_queue:
+        await notion_export_queue.close()
+    await integration_service.close()
+    tracing.tracer.close()
+
 app = FastAPI(
     title="Company Research Agent",
     description="API for company research and analysis using AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,34 +63,436 @@ app.add_middleware(
 )
 
 # Initialize services
-model = OpenAIModel("gpt-4")
-research_agent = CompanyResearchAgent(model)
+# One pooled client for every website fetch and probe, closed by the lifespan
+http_client = build_http_client(settings)
+research_agent = build_research_agent(settings, http_client)
+linkedin_session = research_agent.linkedin_session
+linkedin_index = research_agent.linkedin_index
+content_compressor = research_agent.content_compressor
+research_store = research_agent.research_store
 integration_service = IntegrationService()
 
-# Set up Notion integration if credentials are available
+# Set up the research result cache
+research_cache = None
+if settings.RESEARCH_CACHE_BACKEND == "memory":
+    research_cache = ResearchCache(
+        InMemoryResearchCacheBackend(settings.RESEARCH_CACHE_MAX_ENTRIES),
+        ttl_seconds=settings.RESEARCH_CACHE_TTL_SECONDS,
+        stale_seconds=settings.RESEARCH_CACHE_STALE_SECONDS
+    )
+elif settings.RESEARCH_CACHE_BACKEND == "sqlite":
+    research_cache = ResearchCache(
+        SQLiteResearchCacheBackend(settings.RESEARCH_CACHE_PATH, settings.RESEARCH_CACHE_MAX_ENTRIES),
+        ttl_seconds=settings.RESEARCH_CACHE_TTL_SECONDS,
+        stale_seconds=settings.RESEARCH_CACHE_STALE_SECONDS
+    )
+
+# Coalesce concurrent identical research requests into one agent run
+research_flight = SingleFlight()
+
+# Set up Notion integration if credentials are available, exports run from a durable local queue
+notion_export_queue = None
 if settings.NOTION_API_KEY and settings.NOTION_DATABASE_ID:
     integration_service.setup_notion(
         settings.NOTION_API_KEY,
-        settings.NOTION_DATABASE_ID
+        settings.NOTION_DATABASE_ID,
+        requests_per_second=settings.NOTION_REQUESTS_PER_SECOND,
+        max_retries=settings.NOTION_MAX_RETRIES
     )
+    notion_export_queue = NotionExportQueue(
+        settings.NOTION_EXPORT_QUEUE_PATH,
+        integration_service,
+        workers=settings.NOTION_EXPORT_WORKERS,
+        max_attempts=settings.NOTION_EXPORT_MAX_ATTEMPTS,
+        lease_seconds=settings.NOTION_EXPORT_LEASE_SECONDS
+    )
+
+# Set up Google Docs integration if a service account or a Docs API stand-in is configured
+if settings.GOOGLE_DOCS_CREDENTIALS_FILE or settings.GOOGLE_DOCS_API_ENDPOINT:
+    integration_service.setup_google_docs(
+        settings.GOOGLE_DOCS_CREDENTIALS_FILE,
+        api_endpoint=settings.GOOGLE_DOCS_API_ENDPOINT
+    )
+
+def cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    """
+    Collect hit ratios of the HTTP, LinkedIn and research result caches for /metrics.
+    """
+    ratios = {}
+    if research_agent.http_cache:
+        ratios[("http",)] = research_agent.http_cache.stats()["hit_ratio"]
+    if linkedin_index:
+        stats = linkedin_index.stats()
+        for name in ("index", "content"):
+            lookups = stats[f"{name}_hits"] + stats[f"{name}_misses"]
+            ratios[(f"linkedin_{name}",)] = stats[f"{name}_hits"] / lookups if lookups else 0.0
+    lookups = {key[0]: value for key, value in metrics.RESEARCH_CACHE_LOOKUPS.values().items()}
+    total = sum(value for status, value in lookups.items() if status != "BYPASS")
+    if research_cache:
+        ratios[("research",)] = (lookups.get("HIT", 0) + lookups.get("STALE", 0)) / total if total else 0.0
+    return ratios
+
+metrics.REGISTRY.gauge_callback(
+    "research_cache_hit_ratio", "Hit ratio of each cache since process start.", ("cache",), cache_hit_ratios
+)
+metrics.REGISTRY.gauge_callback(
+    "research_notion_export_tasks", "Notion export queue tasks by status.", ("status",),
+    lambda: {(status,): count for status, count in notion_export_queue.stats()["tasks"].items()} if notion_export_queue else {}
+)
+metrics.REGISTRY.gauge_callback(
+    "research_compression_saved_tokens", "Estimated tokens saved by compressing scraped text.", (),
+    lambda: {(): content_compressor.stats()["saved_tokens"]} if content_compressor else {}
+)
+
+def http_pool_connections() -> Dict[Tuple[str, ...], float]:
+    """
+    Collect active, idle and queued counts of the shared HTTP client's pool for /metrics.
+    """
+    stats = pool_stats(http_client)
+    if not stats["managed"]:
+        return {}
+    return {(state,): stats[state] for state in ("active", "idle", "queued", "in_flight")}
+
+metrics.REGISTRY.gauge_callback(
+    "research_http_pool_connections", "Connections and requests of the shared HTTP client pool by state.", ("state",),
+    http_pool_connections
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Count API requests and record their latency by route template.
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route else "unmatched"
+        metrics.HTTP_REQUESTS.inc(method=request.method, route=path, status=status)
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=request.method, route=path)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Expose request, agent run, tool, model, token, fetch and cache metrics in Prometheus text format.
+    """
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Company Research Agent API"}
 
+@app.get("/cache/http/stats")
+async def http_cache_stats():
+    """
+    Report hit/miss counters for the agent's HTTP response cache.
+    """
+    if not research_agent.http_cache:
+        return {"enabled": False}
+    return {"enabled": True, **research_agent.http_cache.stats()}
+
+@app.get("/http/pool/stats")
+async def http_pool_stats():
+    """
+    Report connection pool utilization, in-flight requests and DNS cache counters of the
+    shared HTTP client.
+    """
+    return pool_stats(http_client)
+
+@app.get("/compression/stats")
+async def compression_stats():
+    """
+    Report estimated tokens saved by compressing scraped website text.
+    """
+    if not content_compressor:
+        return {"enabled": False}
+    return {"enabled": True, **content_compressor.stats()}
+
+@app.get("/linkedin/stats")
+async def linkedin_stats():
+    """
+    Report queue depth and latency of the LinkedIn client thread pool and the login count.
+    """
+    if not linkedin_session:
+        return {"enabled": False}
+    stats = {"enabled": True, **linkedin_session.executor.stats(), "logins": linkedin_session.logins}
+    if linkedin_index:
+        stats["index"] = linkedin_index.stats()
+    return stats
+
+@app.get("/linkedin/index")
+async def export_linkedin_index() -> Dict[str, str]:
+    """
+    Export the company name to LinkedIn entity id index.
+    """
+    if not linkedin_index:
+        raise HTTPException(status_code=404, detail="LinkedIn index not enabled")
+    return linkedin_index.export()
+
+@app.post("/linkedin/index")
+async def load_linkedin_index(entries: Dict[str, str]):
+    """
+    Bulk load company name to LinkedIn entity id pairs to pre-seed the index.
+    """
+    if not linkedin_index:
+        raise HTTPException(status_code=404, detail="LinkedIn index not enabled")
+    return {"loaded": linkedin_index.load(entries)}
+
+@app.get("/research/discovery/stats")
+async def website_discovery_stats():
+    """
+    Report how often each website discovery strategy found the company website.
+    """
+    return research_agent.website_discovery.stats()
+
+@app.get("/research/news/stats")
+async def news_stats():
+    """
+    Report news cache hits and feed fetches by result, including 304 revalidations.
+    """
+    if not research_agent.news_gatherer:
+        return {"enabled": False}
+    return {"enabled": True, **research_agent.news_gatherer.stats()}
+
+@app.get("/research/coalescing/stats")
+async def research_coalescing_stats():
+    """
+    Report how many research requests were coalesced onto an in-flight agent run.
+    """
+    return research_flight.stats()
+
+@app.get("/research/history", response_model=List[StoredResearchRun])
+async def research_history(
+    company_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = Query(default=50, ge=1, le=1000)
+):
+    """
+    List stored research runs, newest first, with their sources, timings and token usage.
+    """
+    if not research_store:
+        raise HTTPException(status_code=404, detail="Research store not enabled")
+    return await research_store.history(company_name, since=since, limit=limit)
+
+@app.get("/research/history/latest", response_model=CompanyOverview)
+async def latest_research(company_name: str):
+    """
+    Return the overview of the most recent successful stored run for a company.
+    """
+    if not research_store:
+        raise HTTPException(status_code=404, detail="Research store not enabled")
+    overview = await research_store.latest(company_name)
+    if overview is None:
+        raise HTTPException(status_code=404, detail=f"No stored research for {company_name}")
+    return overview
+
+async def run_research(request: CompanyResearchRequest) -> CompanyOverview:
+    """
+    Run the research agent, sharing a single run between concurrent identical requests.
+    """
+    return await research_flight.do(
+        ResearchCache.make_key(request),
+        lambda: research_agent.research_company(request)
+    )
+
+async def get_research(request: CompanyResearchRequest) -> Tuple[CompanyOverview, str]:
+    """
+    Return the overview for a request through the result cache, plus its cache status.
+    """
+    if not research_cache:
+        metrics.RESEARCH_CACHE_LOOKUPS.inc(status="BYPASS")
+        return await run_research(request), "BYPASS"
+    overview, status = await research_cache.get_or_compute(request, lambda: run_research(request))
+    metrics.RESEARCH_CACHE_LOOKUPS.inc(status=status)
+    return overview, status
+
+async def refresh_research(request: CompanyResearchRequest) -> Tuple[CompanyOverview, Dict]:
+    """
+    Refresh a company against its last stored run, sharing a single refresh between concurrent
+    identical requests, and store the result in the result cache.
+    """
+    overview, report = await research_flight.do(
+        "refresh:" + ResearchCache.make_key(request),
+        lambda: research_agent.refresh_company(request)
+    )
+    if research_cache:
+        await research_cache.store(request, overview)
+    return overview, report
+
 @app.post("/research/company", response_model=CompanyOverview)
-async def research_company(request: CompanyResearchRequest):
+async def research_company(request: CompanyResearchRequest, response: Response, refresh: bool = False):
     """
     Research a company and return a comprehensive overview.
+    The X-Research-Cache header reports HIT, STALE, MISS or BYPASS. With `refresh` the
+    company is re-researched only where its sources changed since the last stored run, and
+    X-Research-Refresh reports unchanged, partial or full.
+    """
+    if refresh:
+        overview, report = await refresh_research(request)
+        response.headers["X-Research-Cache"] = "REFRESH"
+        response.headers["X-Research-Refresh"] = report["result"]
+        return overview
+    overview, status = await get_research(request)
+    response.headers["X-Research-Cache"] = status
+    return overview
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Format one server-sent event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_research_events(request: CompanyResearchRequest) -> AsyncIterator[str]:
+    """
+    Stream tool progress, partial overview fields and the final overview as server-sent events.
     """
-    return await research_agent.research_company(request)
+    if research_cache:
+        cached = await research_cache.lookup(request)
+        metrics.RESEARCH_CACHE_LOOKUPS.inc(status="HIT" if cached is not None else "MISS")
+        if cached is not None:
+            yield format_sse("result", cached.model_dump(mode="json"))
+            return
+    try:
+        async for event in research_agent.research_company_stream(request):
+            if event["event"] == "result" and research_cache:
+                await research_cache.store(request, CompanyOverview.model_construct(**event["data"]))
+            yield format_sse(event["event"], event["data"])
+    except Exception as e:
+        yield format_sse("error", {"error": str(e)})
+
+@app.post("/research/company/stream")
+async def research_company_stream(request: CompanyResearchRequest):
+    """
+    Research a company, streaming progress and partially validated overview fields over SSE.
+    """
+    return StreamingResponse(
+        stream_research_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_batch_research(batch: BatchResearchRequest, concurrency: int) -> AsyncIterator[str]:
+    """
+    Research every company in the batch with bounded concurrency and yield one NDJSON line per
+    result in completion order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def research_one(index: int, request: CompanyResearchRequest) -> dict:
+        async with semaphore:
+            try:
+                if batch.refresh:
+                    overview, report = await refresh_research(request)
+                    return {
+                        "index": index,
+                        "company_name": request.company_name,
+                        "status": "success",
+                        "cache": "REFRESH",
+                        "refresh": report,
+                        "result": overview.model_dump(mode="json")
+                    }
+                overview, status = await get_research(request)
+                return {
+                    "index": index,
+                    "company_name": request.company_name,
+                    "status": "success",
+                    "cache": status,
+                    "result": overview.model_dump(mode="json")
+                }
+            except Exception as e:
+                return {
+                    "index": index,
+                    "company_name": request.company_name,
+                    "status": "error",
+                    "error": str(e)
+                }
+
+    tasks = [asyncio.create_task(research_one(i, r)) for i, r in enumerate(batch.requests)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        # Stop outstanding work if the client disconnects mid-stream
+        for task in tasks:
+            task.cancel()
+
+@app.post("/research/batch")
+async def research_batch(batch: BatchResearchRequest):
+    """
+    Research many companies and stream each overview, or a per-item error, as NDJSON when it completes.
+    """
+    if len(batch.requests) > settings.RESEARCH_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.RESEARCH_BATCH_MAX_ITEMS} requests"
+        )
+    concurrency = min(
+        batch.concurrency or settings.RESEARCH_BATCH_CONCURRENCY,
+        settings.RESEARCH_BATCH_MAX_CONCURRENCY
+    )
+    return StreamingResponse(
+        stream_batch_research(batch, concurrency),
+        media_type="application/x-ndjson"
+    )
+
+async def enqueue_notion_export(overviews: List[CompanyOverview], response: Response) -> Dict:
+    """
+    Queue overviews for export to Notion and return a handle to poll.
+    """
+    if not notion_export_queue:
+        raise HTTPException(status_code=503, detail="Notion integration not set up")
+    try:
+        job_id = await notion_export_queue.enqueue([overview.model_dump(mode="json") for overview in overviews])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    response.status_code = 202
+    return {"job_id": job_id, "status": "pending", "total": len(overviews), "status_url": f"/export/notion/jobs/{job_id}"}
 
 @app.post("/export/notion")
-async def export_to_notion(company_data: CompanyOverview):
+async def export_to_notion(company_data: CompanyOverview, response: Response):
+    """
+    Queue company research for export to Notion and return the export job handle.
+    Re-exporting a company updates its existing page.
+    """
+    return await enqueue_notion_export([company_data], response)
+
+@app.post("/export/notion/bulk")
+async def export_to_notion_bulk(overviews: List[CompanyOverview], response: Response):
+    """
+    Queue many company overviews for export to Notion as one job and return its handle.
+    """
+    if len(overviews) > settings.NOTION_EXPORT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Export exceeds {settings.NOTION_EXPORT_MAX_ITEMS} overviews"
+        )
+    return await enqueue_notion_export(overviews, response)
+
+@app.get("/export/notion/jobs/{job_id}")
+async def notion_export_job(job_id: str):
+    """
+    Report the status of a Notion export job and the page id or error of each export.
+    """
+    if not notion_export_queue:
+        raise HTTPException(status_code=503, detail="Notion integration not set up")
+    job = await notion_export_queue.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+@app.post("/export/google-docs")
+async def export_to_google_docs(company_data: CompanyOverview):
     """
-    Export company research to Notion.
+    Export company research to a new Google Doc with one create and one batchUpdate request.
     """
-    return await integration_service.export_to_notion(company_data.model_dump())
+    try:
+        return await integration_service.export_to_google_docs(company_data.model_dump(mode="json"))
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
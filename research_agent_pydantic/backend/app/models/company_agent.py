@@ -1,16 +1,52 @@
-from typing import List, Optional, Dict
-from pydantic import BaseModel, Field, EmailStr
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Dict, Tuple, Type
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+from pydantic_core import from_json
 from pydantic_ai import Agent, RunContext, Tool
+from pydantic_ai.messages import (
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.usage import Usage
 from pydantic_ai.models.openai import OpenAIModel
+import asyncio
+import functools
+import hashlib
 import httpx
-from bs4 import BeautifulSoup
+import json
 import os
-from linkedin_api import Linkedin
-import getpass
 import time
-from datetime import datetime, timedelta
-import re
 from urllib.parse import urlparse
+from app.services.http_cache import HTTPResponseCache
+from app.services.linkedin_session import LinkedInSessionManager
+from app.services.linkedin_index import LinkedInEntityIndex
+from app.services.html_parsing import ParsedPage, parse_html, resolve_backend
+from app.services.web_fetcher import FetchLimits, stream_fetch
+from app.services.content_compression import ContentCompressor
+from app.services.http_client import create_http_client
+from app.services.news_feeds import NewsGatherer, feed_links
+from app.services.video_discovery import find_videos
+from app.services import metrics, tracing
+from app.services.single_flight import SingleFlight
+from app.services.website_discovery import (
+    WebsiteDiscoveryStats,
+    candidate_urls,
+    normalize_company_name,
+    normalize_website,
+    probe_websites,
+)
+
+if TYPE_CHECKING:
+    from app.services.research_store import ResearchStore
 
 #Defines the input model for company research requests 
 class CompanyResearchRequest(BaseModel):
@@ -21,6 +57,20 @@ class CompanyResearchRequest(BaseModel):
         description="Any additional context or specific aspects to focus on"
     )
 
+#Defines the input model for batch company research requests
+class BatchResearchRequest(BaseModel):
+    """Input model for researching many companies in one call"""
+    requests: List[CompanyResearchRequest] = Field(description="Companies to research")
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Maximum number of research runs in flight at once"
+    )
+    refresh: bool = Field(
+        default=False,
+        description="Refresh each company against its last stored run instead of using the result cache"
+    )
+
 #Defines the output model for company research requests 
 class CompanyOverview(BaseModel):
     """Structured response model for company research"""
@@ -40,216 +90,824 @@ class CompanyOverview(BaseModel):
     )
     videos: Optional[List[Dict]] = Field(
         default=None,
-        description="Relevant videos about the company"
+        description="Relevant videos about the company, with title, url, source and type"
     )
     follow_up_questions: List[str] = Field(description="Recommended follow-up questions")
     interview_questions: List[str] = Field(description="Recommended interview questions")
 
+SYSTEM_PROMPT = (
+    "You are an expert company research analyst. Your task is to gather and analyze "
+    "information about companies to create comprehensive overviews. You should:\n"
+    "1. Use the provided tools to gather information from various sources\n"
+    "2. Structure the information clearly and concisely\n"
+    "3. Identify key aspects like products, competitors, and funding\n"
+    "4. Generate relevant follow-up and interview questions\n"
+    "5. Provide sources for all information\n\n"
+    "Always maintain objectivity and verify information from multiple sources."
+)
+
+# Follow-up prompt of a run whose tool results were gathered before the first model request
+PREGATHERED_PROMPT = (
+    "The research tools have already been run for this company and their results are above. "
+    "Do not call them again; create the comprehensive overview from these results."
+)
+
+# Overview fields drawn from each research tool's results, regenerated on refresh when that source changed
+SOURCE_FIELDS = {
+    "scrape_company_website": (
+        "website", "summary", "purpose", "products", "competitors", "follow_up_questions", "interview_questions"
+    ),
+    "fetch_linkedin_company_data": ("linkedin", "summary", "funding_info"),
+    "fetch_company_news": ("news",),
+    "find_company_videos": ("videos",),
+}
+
+# Most company website snapshots kept for reuse by later tool calls
+_MAX_WEBSITE_SNAPSHOTS = 256
+
+# Instructions of a refresh that regenerates only the fields fed by changed sources
+REFRESH_PROMPT = (
+    "Some sources about this company changed since the overview above was written; their new tool results "
+    "are above. Return updated values for the requested fields only, using the new results and keeping "
+    "whatever in the current overview is still accurate."
+)
+
+# Per-field validators used to check partially streamed CompanyOverview results
+_OVERVIEW_FIELD_ADAPTERS = {
+    name: TypeAdapter(field.annotation) for name, field in CompanyOverview.model_fields.items()
+}
+
+def research_request_key(request: CompanyResearchRequest) -> str:
+    """
+    Hash the normalized company name and additional info, identifying equivalent research requests.
+    """
+    company = " ".join(request.company_name.lower().split())
+    additional = " ".join((request.additional_info or "").lower().split())
+    raw = json.dumps([company, additional])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def source_hash(result) -> Optional[str]:
+    """
+    Hash the URL and content of a successful tool result, or return None if the source could not be read.
+    """
+    if not isinstance(result, dict) or result.get("status") != "success":
+        return None
+    raw = json.dumps([result.get("url"), result.get("content")], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _overview_update_model(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Build a result model holding only the given CompanyOverview fields.
+    """
+    return create_model(
+        "CompanyOverviewUpdate",
+        **{name: (CompanyOverview.model_fields[name].annotation, CompanyOverview.model_fields[name]) for name in fields}
+    )
+
+# Milliseconds spent in each tool during the current research run, for the research store
+_tool_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("tool_timings", default=None)
+
+def _timed_tool(name: str, function):
+    """
+    Wrap an async tool function to add its duration to the current run's tool timings.
+    """
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            timings = _tool_timings.get()
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+    return wrapper
+
 #Defines the agent for researching companies and generating comprehensive overviews
 class CompanyResearchAgent(Agent):
     """Agent for researching companies and generating comprehensive overviews"""
     
-    def __init__(self, model: OpenAIModel):
+    def __init__(
+        self,
+        model: OpenAIModel,
+        http_cache: Optional[HTTPResponseCache] = None,
+        linkedin_session: Optional[LinkedInSessionManager] = None,
+        linkedin_index: Optional[LinkedInEntityIndex] = None,
+        html_parser: str = "auto",
+        fetch_limits: Optional[FetchLimits] = None,
+        content_compressor: Optional[ContentCompressor] = None,
+        pregather: bool = False,
+        http_client: Optional[httpx.AsyncClient] = None,
+        research_store: Optional["ResearchStore"] = None,
+        news_gatherer: Optional[NewsGatherer] = None,
+        website_snapshot_ttl: float = 60.0,
+        video_discovery: bool = True
+    ):
+        tools = [
+            self._tool("scrape_company_website", self.get_website_info),
+            self._tool("fetch_linkedin_company_data", self.get_linkedin_info)
+        ]
+        if news_gatherer:
+            tools.append(self._tool("fetch_company_news", self.get_news_info))
+        if video_discovery:
+            tools.append(self._tool("find_company_videos", self.get_video_info))
         super().__init__(
-            model=model,
+            # Time and trace every model request for /metrics and the span exporter
+            model=metrics.MeteredModel(tracing.TracedModel(model)),
             result_type=CompanyOverview,
-            system_prompt=(
-                "You are an expert company research analyst. Your task is to gather and analyze "
-                "information about companies to create comprehensive overviews. You should:\n"
-                "1. Use the provided tools to gather information from various sources\n"
-                "2. Structure the information clearly and concisely\n"
-                "3. Identify key aspects like products, competitors, and funding\n"
-                "4. Generate relevant follow-up and interview questions\n"
-                "5. Provide sources for all information\n\n"
-                "Always maintain objectivity and verify information from multiple sources."
-            ),
-            tools=[
-                Tool(self.get_website_info),
-                Tool(self.get_linkedin_info)
-            ]
+            system_prompt=SYSTEM_PROMPT,
+            tools=tools
         )
-        self.http_client = httpx.AsyncClient()
+        # Instrumented tool functions by name, called directly when pre-gathering
+        self.research_tools = {tool.name: tool.function for tool in tools}
+        # Run the tools concurrently before the first model request instead of letting the model call them
+        self.pregather = pregather
+        # Shared pooled client owned by the app, or a private one closed by cleanup()
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client()
+        # Optional persistent response cache in front of http_client
+        self.http_cache = http_cache
+        # Byte cap, allowed content types and per-phase timeouts for website fetches
+        self.fetch_limits = fetch_limits or FetchLimits()
+        # Optional token-budgeted compression of scraped text before it reaches the model
+        self.content_compressor = content_compressor
+        # HTML parser backend, "auto" picks lxml when it is installed
+        self.html_parser = resolve_backend(html_parser)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        self.linkedin_username = None
-        self.linkedin_password = None
-        self.linkedin_api = None
-        self.credentials_timestamp = None
-        # Credentials expire after 30 days - adjust this value to change the expiration period
-        self._CREDENTIALS_TIMEOUT = timedelta(days=30)
+        # Shared LinkedIn session; credentials come from settings and the synchronous
+        # linkedin_api calls run on the session's bounded thread pool
+        self.linkedin_session = linkedin_session
+        # Optional persistent company name to LinkedIn entity index with cached company content
+        self.linkedin_index = linkedin_index
+        # Website discovery and LinkedIn tools share one company lookup per name
+        self._linkedin_flight = SingleFlight()
+        # Website, news and video tools share one discovery, fetch and parse of the company website,
+        # and reuse its snapshot for website_snapshot_ttl seconds
+        self._website_flight = SingleFlight()
+        self.website_snapshot_ttl = website_snapshot_ttl
+        self._website_snapshots: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # Optional news from feeds and the company newsroom
+        self.news_gatherer = news_gatherer
+        # Videos are read from the website snapshot, without requests of their own
+        self.video_discovery = video_discovery
+        if news_gatherer and not news_gatherer.headers:
+            # Newsrooms get the same browser User-Agent as the website fetch
+            news_gatherer.headers = dict(self.headers)
+        # Last resort website discovery, asks the model for the URL
+        self._url_agent = Agent(
+            self.model,
+            result_type=str,
+            system_prompt="You return the official website URL of a company. Only respond with the URL, nothing else."
+        )
+        self.website_discovery = WebsiteDiscoveryStats()
+        # Optional SQL store every finished run is written to, also the baseline of refreshes
+        self.research_store = research_store
+        # Refresh agents by the tuple of overview fields they regenerate
+        self._update_agents: Dict[Tuple[str, ...], Agent] = {}
 
-    def _validate_email(self, email: str) -> bool:
+    @staticmethod
+    def _tool(name: str, function) -> Tool:
         """
-        Validate email format.
+        Register a tool with call metrics, a trace span and run timings around each call.
         """
-        try:
-            EmailStr.validate(email)
-            return True
-        except ValueError:
-            return False
+        return Tool(metrics.instrument_tool(name, tracing.trace_tool(name, _timed_tool(name, function))), name=name)
 
-    def _validate_password(self, password: str) -> bool:
+    async def cleanup(self) -> None:
         """
-        Validate password is not empty.
+        Clean up resources and clear sensitive data.
         """
-        return bool(password)
+        if self.linkedin_session:
+            self.linkedin_session.clear()
+            self.linkedin_session.executor.shutdown()
+        if self._owns_http_client:
+            await self.http_client.aclose()
+        if self.http_cache:
+            self.http_cache.close()
+        if self.linkedin_index:
+            self.linkedin_index.close()
 
-    def _clear_credentials(self) -> None:
+    def _build_prompt(self, request: CompanyResearchRequest) -> str:
         """
-        Clear stored credentials and API client.
+        Build the user prompt for a research run.
         """
-        self.linkedin_username = None
-        self.linkedin_password = None
-        self.linkedin_api = None
-        self.credentials_timestamp = None
+        return (
+            f"Research the company: {request.company_name}\n"
+            f"Additional context: {request.additional_info or 'None'}\n\n"
+            "Please use the available tools to gather information and create a comprehensive overview."
+        )
 
-    def _are_credentials_valid(self) -> bool:
+    async def _gather(self, request: CompanyResearchRequest, usage: Usage) -> Dict[str, Dict]:
         """
-        Check if stored credentials are still valid and not expired.
+        Run every research tool concurrently and return their results by tool name.
         """
-        if not all([self.linkedin_username, self.linkedin_password, self.credentials_timestamp]):
-            return False
-        
-        # Check if credentials have expired
-        if datetime.now() - self.credentials_timestamp > self._CREDENTIALS_TIMEOUT:
-            self._clear_credentials()
-            return False
-        
-        return True
+        ctx = RunContext(deps=request, model=self.model, usage=usage, prompt=self._build_prompt(request))
+        with tracing.tracer.span("pregather", tools=len(self.research_tools)):
+            results = await asyncio.gather(*(function(ctx) for function in self.research_tools.values()))
+        return dict(zip(self.research_tools, results))
 
-    async def _get_linkedin_credentials(self) -> None:
+    def _pregathered_history(self, request: CompanyResearchRequest, results: Dict[str, Dict]) -> List[ModelMessage]:
         """
-        Prompt for LinkedIn credentials if not already set or expired.
+        Build a message history in which the model already called the tools and got `results`.
         """
-        if not self._are_credentials_valid():
-            print("\nLinkedIn credentials are required to access company information.")
-            print("Your credentials will be stored securely in memory for 30 days.")
-            
-            while True:
-                email = input("Please enter your LinkedIn email: ").strip()
-                if self._validate_email(email):
-                    break
-                print("Invalid email format. Please try again.")
-            
-            while True:
-                password = getpass.getpass("Please enter your LinkedIn password: ").strip()
-                if self._validate_password(password):
-                    break
-                print("Password cannot be empty. Please try again.")
-            
-            try:
-                # Initialize LinkedIn API client with new credentials
-                self.linkedin_api = Linkedin(email, password)
-                # Test the credentials with a simple API call
-                self.linkedin_api.get_profile()
-                
-                # Store credentials only if authentication is successful
-                self.linkedin_username = email
-                self.linkedin_password = password
-                self.credentials_timestamp = datetime.now()
-                
-                print("LinkedIn credentials validated successfully.")
-            except Exception as e:
-                print(f"Failed to authenticate with LinkedIn: {str(e)}")
-                self._clear_credentials()
-                raise
+        calls = [ToolCallPart(name, {}) for name in results]
+        returns = [
+            ToolReturnPart(call.tool_name, results[call.tool_name], tool_call_id=call.tool_call_id)
+            for call in calls
+        ]
+        return [
+            ModelRequest([SystemPromptPart(SYSTEM_PROMPT), UserPromptPart(self._build_prompt(request))]),
+            ModelResponse(calls, model_name=self.model.model_name),
+            ModelRequest(returns),
+        ]
 
-    async def cleanup(self) -> None:
+    async def _pregather(self, request: CompanyResearchRequest) -> Tuple[List[ModelMessage], Usage]:
         """
-        Clean up resources and clear sensitive data.
+        Run every research tool concurrently and return a message history in which the model
+        already called them, plus the usage so far (the website fallback may use the model).
         """
-        self._clear_credentials()
-        await self.http_client.aclose()
+        usage = Usage()
+        results = await self._gather(request, usage)
+        return self._pregathered_history(request, results), usage
 
-    async def research_company(self, request: CompanyResearchRequest) -> CompanyOverview:
+    async def research_company(self, request: CompanyResearchRequest, pregather: Optional[bool] = None) -> CompanyOverview:
         """
         Research a company and return a comprehensive overview.
+        With pre-gathering on (the agent default unless `pregather` says otherwise) the
+        tools run up front and the model usually answers in a single turn.
         """
-        # Create a context for the research
-        context = RunContext(
-            user_prompt=(
-                f"Research the company: {request.company_name}\n"
-                f"Additional context: {request.additional_info or 'None'}\n\n"
-                "Please use the available tools to gather information and create a comprehensive overview."
-            ),
-            deps=request
-        )
-        
+        pregather = self.pregather if pregather is None else pregather
         # Run the research process
-        response = await self.run(context)
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        outcome = "error"
+        response = error = None
+        timings: Dict[str, float] = {}
+        timings_token = _tool_timings.set(timings)
+        try:
+            with tracing.tracer.span("research_company", company_name=request.company_name, mode="run", pregather=pregather) as span:
+                try:
+                    if pregather:
+                        history, usage = await self._pregather(request)
+                        response = await self.run(PREGATHERED_PROMPT, deps=request, message_history=history, usage=usage)
+                    else:
+                        response = await self.run(self._build_prompt(request), deps=request)
+                    outcome = "success"
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    self._record_run("run", outcome, start, pregather)
+                    await self._store_run(request, "run", pregather, started_at, start, timings, error, response)
+                usage = response.usage()
+                span.set(requests=usage.requests, request_tokens=usage.request_tokens, response_tokens=usage.response_tokens)
+        finally:
+            _tool_timings.reset(timings_token)
+        metrics.record_usage(self.model.model_name, usage)
+        self._record_compression("run", response.all_messages())
         return response.data
 
-    async def _is_valid_company_website(self, url: str, company_name: str) -> bool:
+    async def refresh_company(self, request: CompanyResearchRequest) -> Tuple[CompanyOverview, Dict]:
         """
-        Validate if a URL is a valid company website.
+        Refresh a company against its last stored run. The tools run up front and their
+        results are hashed: when no source changed the stored overview is returned without a
+        model request, when some did only the overview fields drawn from them are regenerated,
+        and without a stored run to compare against this is a full pre-gathered run.
+        Returns the overview and a report of the result, changed sources and regenerated fields.
+        """
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        outcome = "error"
+        overview = error = hashes = None
+        usage = Usage()
+        messages: List[ModelMessage] = []
+        report = {"result": "full", "changed_sources": [], "regenerated_fields": []}
+        timings: Dict[str, float] = {}
+        timings_token = _tool_timings.set(timings)
+        try:
+            with tracing.tracer.span("refresh_company", company_name=request.company_name) as span:
+                try:
+                    prior = None
+                    if self.research_store:
+                        prior = await self.research_store.latest_sources(research_request_key(request))
+                    results = await self._gather(request, usage)
+                    messages = self._pregathered_history(request, results)
+                    if prior is None:
+                        report["changed_sources"] = list(results)
+                        response = await self.run(PREGATHERED_PROMPT, deps=request, message_history=messages, usage=usage)
+                        overview, usage, messages = response.data, response.usage(), response.all_messages()
+                    else:
+                        overview, stored_hashes = prior
+                        current = {name: source_hash(result) for name, result in results.items()}
+                        changed = [name for name, digest in current.items() if digest and digest != stored_hashes.get(name)]
+                        fields = tuple(
+                            name for name in CompanyOverview.model_fields
+                            if any(name in SOURCE_FIELDS.get(source, ()) for source in changed)
+                        )
+                        # A source that could not be read now keeps its stored hash and fields
+                        hashes = {**stored_hashes, **{name: digest for name, digest in current.items() if digest}}
+                        report.update(result="partial" if fields else "unchanged", changed_sources=changed, regenerated_fields=list(fields))
+                        if fields:
+                            overview, usage = await self._regenerate_fields(
+                                request, overview, {name: results[name] for name in changed}, fields, usage
+                            )
+                    outcome = "success"
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    self._record_run("refresh", outcome, start, True)
+                    await self._store_run(
+                        request, "refresh", True, started_at, start, timings, error,
+                        overview=overview, usage=usage, messages=messages, source_hashes=hashes
+                    )
+                span.set(result=report["result"], requests=usage.requests, request_tokens=usage.request_tokens, response_tokens=usage.response_tokens)
+        finally:
+            _tool_timings.reset(timings_token)
+        metrics.RESEARCH_REFRESHES.inc(result=report["result"])
+        metrics.record_usage(self.model.model_name, usage)
+        print(f"Refreshed {request.company_name}: {report['result']}, changed sources {report['changed_sources'] or 'none'}")
+        return overview, report
+
+    async def _regenerate_fields(
+        self,
+        request: CompanyResearchRequest,
+        overview: CompanyOverview,
+        results: Dict[str, Dict],
+        fields: Tuple[str, ...],
+        usage: Usage
+    ) -> Tuple[CompanyOverview, Usage]:
+        """
+        Regenerate `fields` of a stored overview from the changed sources' tool results and
+        return the merged overview with the usage so far.
+        """
+        agent = self._update_agents.get(fields)
+        if agent is None:
+            agent = self._update_agents[fields] = Agent(
+                self.model,
+                result_type=_overview_update_model(fields),
+                system_prompt=SYSTEM_PROMPT
+            )
+        prompt = (
+            f"Company: {request.company_name}\n"
+            f"Additional context: {request.additional_info or 'None'}\n\n"
+            f"Current overview:\n{overview.model_dump_json()}\n\n"
+            f"New tool results:\n{json.dumps(results, default=str)}\n\n"
+            f"Fields to update: {', '.join(fields)}\n\n"
+            f"{REFRESH_PROMPT}"
+        )
+        response = await agent.run(prompt, usage=usage)
+        merged = CompanyOverview.model_validate({**overview.model_dump(), **response.data.model_dump()})
+        return merged, response.usage()
+
+    async def _store_run(
+        self,
+        request: CompanyResearchRequest,
+        mode: str,
+        pregather: bool,
+        started_at: datetime,
+        start: float,
+        timings: Dict[str, float],
+        error: Optional[BaseException],
+        response=None,
+        overview: Optional[CompanyOverview] = None,
+        usage: Optional[Usage] = None,
+        messages: List[ModelMessage] = (),
+        source_hashes: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Queue a finished run for the research store: request, overview, source URLs and content
+        hashes, timings and usage. These come from the agent run `response` when there is one.
+        """
+        if not self.research_store:
+            return
+        if response is not None:
+            overview, usage, messages = response.data, response.usage(), response.all_messages()
+        record = {
+            "company_name": request.company_name,
+            "request_key": research_request_key(request),
+            "request": request.model_dump(mode="json"),
+            "overview": None,
+            "source_urls": [],
+            "source_hashes": source_hashes if source_hashes is not None else self._source_hashes(messages),
+            "mode": mode,
+            "pregather": pregather,
+            "status": "success" if error is None and overview is not None else "error",
+            "error": f"{type(error).__name__}: {error}" if error is not None else None,
+            "started_at": started_at,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "timings": {name: round(ms, 3) for name, ms in timings.items()},
+            "model_name": self.model.model_name,
+            "model_requests": 0,
+            "request_tokens": 0,
+            "response_tokens": 0,
+            "total_tokens": 0,
+        }
+        if overview is not None:
+            usage = usage or Usage()
+            record.update(
+                overview=overview.model_dump(mode="json"),
+                source_urls=self._source_urls(messages, overview),
+                model_requests=usage.requests,
+                request_tokens=usage.request_tokens or 0,
+                response_tokens=usage.response_tokens or 0,
+                total_tokens=usage.total_tokens or 0,
+            )
+        try:
+            await self.research_store.add(record)
+        except Exception as e:
+            print(f"Error storing research run for {request.company_name}: {str(e)}")
+
+    def _source_hashes(self, messages: List) -> Dict[str, str]:
+        """
+        Hash the content each research tool returned during a run, by tool name.
+        """
+        hashes = {}
+        for message in messages:
+            for part in getattr(message, "parts", []):
+                if isinstance(part, ToolReturnPart) and part.tool_name in self.research_tools:
+                    digest = source_hash(part.content)
+                    if digest:
+                        hashes[part.tool_name] = digest
+        return hashes
+
+    def _source_urls(self, messages: List, overview: CompanyOverview) -> List[str]:
+        """
+        Collect the URLs the tools read and the overview cites, in first-seen order.
+        """
+        urls = []
+        for message in messages:
+            for part in getattr(message, "parts", []):
+                if isinstance(part, ToolReturnPart) and isinstance(part.content, dict) and part.content.get("url"):
+                    urls.append(part.content["url"])
+        urls.extend(url for url in (overview.website, overview.linkedin) if url)
+        for item in (overview.news or []) + (overview.videos or []):
+            if isinstance(item, dict) and item.get("url"):
+                urls.append(item["url"])
+        return list(dict.fromkeys(urls))
+
+    def _record_run(self, mode: str, outcome: str, start: float, pregather: bool) -> None:
+        """
+        Count a finished agent run and record its duration.
+        """
+        metrics.AGENT_RUNS.inc(mode=mode, pregather=pregather, outcome=outcome)
+        metrics.AGENT_RUN_DURATION.observe(time.perf_counter() - start, mode=mode, pregather=pregather)
+
+    def _record_compression(self, mode: str, messages: List) -> None:
+        """
+        Record the tokens content compression saved during a run.
+        """
+        saved = self._compression_saved(messages)
+        if saved:
+            metrics.RUN_COMPRESSION_SAVED_TOKENS.observe(saved, mode=mode)
+
+    def _compression_saved(self, messages: List) -> int:
+        """
+        Sum the estimated tokens saved by content compression across a run's tool results.
+        """
+        saved = 0
+        for message in messages:
+            for part in getattr(message, "parts", []):
+                if isinstance(part, ToolReturnPart) and isinstance(part.content, dict):
+                    saved += (part.content.get("compression") or {}).get("saved_tokens", 0)
+        return saved
+
+    def _partial_overview_fields(self, message: ModelResponse) -> Dict:
+        """
+        Validate the fields of a partially streamed result tool call one by one, returning those that pass.
+        """
+        for part in message.parts:
+            if isinstance(part, ToolCallPart) and part.tool_name == "final_result":
+                args = part.args
+                if isinstance(args, str):
+                    try:
+                        args = from_json(args, allow_partial=True) if args else {}
+                    except ValueError:
+                        return {}
+                fields = {}
+                for name, value in (args or {}).items():
+                    adapter = _OVERVIEW_FIELD_ADAPTERS.get(name)
+                    if adapter is None:
+                        continue
+                    try:
+                        fields[name] = adapter.dump_python(adapter.validate_python(value), mode="json")
+                    except ValueError:
+                        continue
+                return fields
+        return {}
+
+    async def research_company_stream(self, request: CompanyResearchRequest, pregather: Optional[bool] = None) -> AsyncIterator[Dict]:
+        """
+        Research a company, yielding tool progress, partially validated overview fields and the final result as events.
+        """
+        pregather = self.pregather if pregather is None else pregather
+        sent: Dict = {}
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        outcome = "error"
+        result = error = None
+        timings: Dict[str, float] = {}
+        timings_token = _tool_timings.set(timings)
+        try:
+            with tracing.tracer.span("research_company", company_name=request.company_name, mode="stream", pregather=pregather) as span:
+                prompt, history, usage = self._build_prompt(request), None, None
+                if pregather:
+                    for name in self.research_tools:
+                        yield {"event": "tool", "data": {"tool": name, "status": "started"}}
+                    history, usage = await self._pregather(request)
+                    for part in history[-1].parts:
+                        yield {"event": "tool", "data": self._tool_event_data(part)}
+                    prompt = PREGATHERED_PROMPT
+                async with self.iter(prompt, deps=request, message_history=history, usage=usage) as run:
+                    async for node in run:
+                        if Agent.is_model_request_node(node):
+                            # Stream the model response and emit result fields as soon as they validate
+                            async with node.stream(run.ctx) as request_stream:
+                                async for message in request_stream.stream_responses(debounce_by=0.1):
+                                    fields = self._partial_overview_fields(message)
+                                    changed = {k: v for k, v in fields.items() if sent.get(k) != v}
+                                    if changed:
+                                        sent.update(changed)
+                                        yield {"event": "partial", "data": changed}
+                        elif Agent.is_call_tools_node(node):
+                            # Report each tool call as it starts and finishes
+                            async with node.stream(run.ctx) as tools_stream:
+                                async for event in tools_stream:
+                                    if isinstance(event, FunctionToolCallEvent):
+                                        yield {
+                                            "event": "tool",
+                                            "data": {"tool": event.part.tool_name, "status": "started"}
+                                        }
+                                    elif isinstance(event, FunctionToolResultEvent):
+                                        yield {"event": "tool", "data": self._tool_event_data(event.result)}
+                    usage = run.usage()
+                    span.set(requests=usage.requests, request_tokens=usage.request_tokens, response_tokens=usage.response_tokens)
+                    metrics.record_usage(self.model.model_name, usage)
+                    result = run.result
+                    self._record_compression("stream", result.all_messages())
+                    yield {"event": "result", "data": result.data.model_dump(mode="json")}
+            outcome = "success"
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record_run("stream", outcome, start, pregather)
+            await self._store_run(request, "stream", pregather, started_at, start, timings, error, result)
+            try:
+                _tool_timings.reset(timings_token)
+            except ValueError:
+                # The consumer resumed the stream from another context
+                pass
+
+    def _tool_event_data(self, part) -> Dict:
+        """
+        Summarize a tool result part for a progress event.
+        """
+        data = {"tool": part.tool_name, "status": "retry"}
+        if isinstance(part, ToolReturnPart):
+            content = part.content
+            data["status"] = content.get("status", "success") if isinstance(content, dict) else "success"
+            if isinstance(content, dict) and content.get("url"):
+                data["url"] = content["url"]
+            if isinstance(content, dict) and content.get("compression"):
+                data["saved_tokens"] = content["compression"]["saved_tokens"]
+        return data
+
+    def _normalize_company_name(self, company_name: str) -> str:
+        """
+        Normalize a company name to the lowercase alphanumeric form used in domain checks.
+        """
+        return normalize_company_name(company_name)
+
+    def _is_company_domain(self, url: str, company_name: str) -> bool:
+        """
+        Check if the URL's domain contains the normalized company name.
+        """
+        parsed_url = urlparse(url)
+        if not parsed_url.netloc:
+            return False
+        return self._normalize_company_name(company_name) in parsed_url.netloc.lower()
+
+    async def _get(self, url: str) -> httpx.Response:
+        """
+        Stream a size-capped GET through the response cache when one is configured.
+        """
+        async def send(headers: Dict) -> httpx.Response:
+            return await stream_fetch(self.http_client, url, headers=headers, limits=self.fetch_limits)
+
+        if self.http_cache:
+            return await self.http_cache.get(url, self.headers, send)
+        return await send(self.headers)
+
+    async def _fetch_website(self, url: str) -> Tuple[Optional[ParsedPage], Dict]:
+        """
+        Fetch a website once and parse it into a document shared by validation and scraping.
+        Also returns how the fetch went: bytes read, and whether it was truncated or aborted.
+        """
+        fetch = {"bytes": 0, "truncated": False, "aborted": None}
+        source = "network"
+        response = None
+        with tracing.tracer.span("http.fetch", url=url) as span:
+            try:
+                response = await self._get(url)
+                source = "cache" if response.extensions.get("from_cache") else "network"
+                fetch["bytes"] = len(response.content)
+                fetch["truncated"] = response.extensions.get("truncated", False)
+                fetch["aborted"] = response.extensions.get("aborted")
+                if response.status_code != 200 or not response.content:
+                    if not fetch["aborted"]:
+                        fetch["aborted"] = f"status:{response.status_code}" if response.status_code != 200 else "empty_body"
+                    response = None
+            except httpx.ConnectTimeout:
+                fetch["aborted"] = "connect_timeout"
+            except asyncio.TimeoutError:
+                fetch["aborted"] = "first_byte_timeout"
+            except httpx.TimeoutException:
+                fetch["aborted"] = "read_timeout"
+            except Exception as e:
+                print(f"Error fetching website {url}: {str(e)}")
+                fetch["aborted"] = f"error:{type(e).__name__}"
+            finally:
+                # Label by reason family only, e.g. "content_type" rather than the media type
+                metrics.FETCHES.inc(source=source, result=(fetch["aborted"] or "ok").split(":")[0])
+                metrics.FETCH_BYTES.inc(fetch["bytes"], source=source)
+                span.set(source=source, **fetch)
+        if response is None:
+            return None, fetch
+        # Parse straight from bytes, the parser decodes using the declared charset
+        with tracing.tracer.span("parse_html", backend=self.html_parser, bytes=fetch["bytes"]):
+            return parse_html(response.content, response.charset_encoding, self.html_parser), fetch
+
+    def _is_valid_company_website(self, url: str, company_name: str, page: ParsedPage) -> bool:
+        """
+        Validate if a fetched page is a valid company website.
         """
         try:
-            # Check if URL is accessible
-            response = await self.http_client.get(url, headers=self.headers, timeout=5.0)
-            if response.status_code != 200:
-                return False
-            
-            # Parse the URL
-            parsed_url = urlparse(url)
-            if not parsed_url.netloc:
-                return False
-            
             # Check if the domain contains the company name
-            domain = parsed_url.netloc.lower()
-            clean_company = re.sub(r'[^a-zA-Z0-9]', '', company_name.lower())
-            
-            if clean_company not in domain:
+            if not self._is_company_domain(url, company_name):
                 return False
-            
-            # Check if the page contains company name
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_text = soup.get_text().lower()
-            
-            # Look for company name in title and meta tags
-            title = soup.title.string.lower() if soup.title else ""
-            meta_description = ""
-            meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc_tag:
-                meta_description = meta_desc_tag.get('content', '').lower()
-            
-            # Check if company name appears in key locations
-            if (clean_company in title or 
-                clean_company in meta_description or 
-                clean_company in page_text[:1000]):  # First 1000 chars
+            clean_company = self._normalize_company_name(company_name)
+
+            # Look for company name in title and meta tags first, they live in <head>
+            if clean_company in page.title().lower():
                 return True
-            
-            return False
-            
+            if clean_company in page.meta_content('description').lower():
+                return True
+
+            # Only read as much of the page as the check needs
+            return clean_company in page.leading_text(1000).lower()
+
         except Exception:
             return False
 
-    async def _scrape_website(self, url: str) -> str:
+    def _scrape_website(self, page: ParsedPage) -> str:
         """
-        Scrape content from a website.
+        Extract cleaned text content from a fetched website.
         """
         try:
-            response = await self.http_client.get(url, headers=self.headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Get text content
-            text = soup.get_text()
-            
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text
+            # Remove script and style elements and normalize whitespace in one pass
+            return page.text()
         except Exception as e:
-            print(f"Error scraping website {url}: {str(e)}")
+            print(f"Error scraping website: {str(e)}")
             return ""
 
-    @Tool(name="scrape_company_website")
+    def _content_blocks(self, page: ParsedPage) -> List[str]:
+        """
+        Extract the main content blocks of a fetched website for compression.
+        """
+        try:
+            return page.blocks()
+        except Exception as e:
+            print(f"Error extracting website blocks: {str(e)}")
+            return []
+
+    def _compress_content(self, blocks: List[str], content: str, request: CompanyResearchRequest) -> Tuple[str, Optional[Dict]]:
+        """
+        Fit scraped text to the token budget when a compressor is configured, returning the
+        text for the model and the compression report.
+        """
+        if not self.content_compressor or not content:
+            return content, None
+        try:
+            with tracing.tracer.span("compress_content") as span:
+                compressed = self.content_compressor.compress(
+                    content, blocks, request.company_name, request.additional_info
+                )
+                span.set(**compressed.report())
+            return compressed.text, compressed.report()
+        except Exception as e:
+            print(f"Error compressing website content: {str(e)}")
+            return content, None
+
+    async def _try_website(self, url: str, company_name: str, trusted: bool = False) -> Optional[Dict]:
+        """
+        Fetch a candidate website and return it if it is the company's. Trusted candidates,
+        such as the website listed on LinkedIn, skip the domain and content checks.
+        """
+        if not trusted and not self._is_company_domain(url, company_name):
+            return None
+        page, fetch = await self._fetch_website(url)
+        if page is None or not (trusted or self._is_valid_company_website(url, company_name, page)):
+            return None
+        return {"url": url, "page": page, "fetch": fetch}
+
+    async def _linkedin_website(self, company_name: str) -> Optional[str]:
+        """
+        Return the website listed on the company's LinkedIn page, if LinkedIn is configured.
+        """
+        try:
+            found = await self._lookup_linkedin(company_name)
+        except Exception as e:
+            print(f"Error looking up LinkedIn website for {company_name}: {str(e)}")
+            return None
+        return normalize_website(found[1].get("website")) if found else None
+
+    async def _guess_website(self, ctx: RunContext[CompanyResearchRequest]) -> Optional[str]:
+        """
+        Ask the model for the website URL, counting its tokens towards the research run.
+        """
+        result = await self._url_agent.run(
+            f"Please provide the official website URL for {ctx.deps.company_name}.",
+            usage=ctx.usage
+        )
+        url = result.data.strip().strip("<>\"'")
+        return url if url.startswith(("http://", "https://")) else None
+
+    async def _discover_website(self, ctx: RunContext[CompanyResearchRequest]) -> Optional[Dict]:
+        """
+        Find the company website, cheapest strategy first: the website listed on LinkedIn,
+        then HEAD probes of domains built from the normalized name, then a model guess.
+        Domain probes only start once LinkedIn has no usable website.
+        """
+        company_name = ctx.deps.company_name
+        if self.linkedin_session:
+            with tracing.tracer.span("discover_website_url", strategy="linkedin") as span:
+                website = await self._linkedin_website(company_name)
+                found = await self._try_website(website, company_name, trusted=True) if website else None
+                span.set(url=website, hit=found is not None)
+            self._record_discovery("linkedin", found is not None)
+            if found:
+                return {**found, "source": "linkedin"}
+
+        with tracing.tracer.span("discover_website_url", strategy="domain_probe") as span:
+            found = None
+            live = await probe_websites(self.http_client, candidate_urls(company_name), headers=self.headers)
+            for url in live:
+                found = await self._try_website(url, company_name)
+                if found:
+                    break
+            span.set(candidates=len(live), url=found["url"] if found else None, hit=found is not None)
+        self._record_discovery("domain_probe", found is not None)
+        if found:
+            return {**found, "source": "domain_probe"}
+
+        with tracing.tracer.span("discover_website_url", strategy="ai_agent") as span:
+            url = await self._guess_website(ctx)
+            found = await self._try_website(url, company_name) if url else None
+            span.set(url=url, hit=found is not None)
+        self._record_discovery("ai_agent", found is not None)
+        return {**found, "source": "ai_agent"} if found else None
+
+    async def _website_snapshot(self, ctx: RunContext[CompanyResearchRequest]) -> Optional[Dict]:
+        """
+        Return the company website as the tools use it: URL, discovery source, fetch report,
+        extracted text and content blocks, the feeds it advertises and the videos it embeds,
+        or None if it was not found. Concurrent callers share one discovery, fetch and parse.
+        """
+        key = normalize_company_name(ctx.deps.company_name)
+        cached = self._website_snapshots.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.website_snapshot_ttl:
+            return cached[1]
+        return await self._website_flight.do(key, lambda: self._snapshot_website(key, ctx))
+
+    async def _snapshot_website(self, key: str, ctx: RunContext[CompanyResearchRequest]) -> Optional[Dict]:
+        found = await self._discover_website(ctx)
+        if found is None:
+            return None
+        page = found.pop("page")
+        # Links and embedded data are read first, text extraction strips scripts and prunes the parsed tree
+        feeds = feed_links(page, found["url"])
+        videos = []
+        if self.video_discovery:
+            try:
+                videos = find_videos(page, found["url"])
+            except Exception as e:
+                print(f"Error finding videos on {found['url']}: {str(e)}")
+        with tracing.tracer.span("extract_text", backend=self.html_parser):
+            text = self._scrape_website(page)
+            blocks = self._content_blocks(page) if self.content_compressor and text else []
+        snapshot = {**found, "text": text, "blocks": blocks, "feeds": feeds, "videos": videos}
+        if self.website_snapshot_ttl > 0:
+            self._website_snapshots[key] = (time.monotonic(), snapshot)
+            self._website_snapshots.move_to_end(key)
+            while len(self._website_snapshots) > _MAX_WEBSITE_SNAPSHOTS:
+                self._website_snapshots.popitem(last=False)
+        return snapshot
+
+    def _record_discovery(self, strategy: str, hit: bool) -> None:
+        self.website_discovery.record(strategy, hit)
+        metrics.WEBSITE_DISCOVERY.inc(strategy=strategy, result="hit" if hit else "miss")
+
     async def get_website_info(self, ctx: RunContext[CompanyResearchRequest]) -> Dict:
         """
         Get information from the company's website.
@@ -258,36 +916,24 @@ class CompanyResearchAgent(Agent):
         print(f"Gathering website information for {company_name}")
         
         try:
-            # Get the website URL from the AI agent's response
-            response = await self.model.generate(
-                f"Please provide the official website URL for {company_name}. "
-                "Only respond with the URL, nothing else."
-            )
-            url = response.strip()
-            
-            if not url or not url.startswith(('http://', 'https://')):
+            snapshot = await self._website_snapshot(ctx)
+            if snapshot is None:
                 return {
                     "url": "",
                     "content": "Could not find company website",
                     "status": "error",
-                    "error": "Invalid website URL"
-                }
-            
-            # Validate and scrape the website
-            if await self._is_valid_company_website(url, company_name):
-                content = await self._scrape_website(url)
-                return {
-                    "url": url,
-                    "content": content,
-                    "status": "success",
-                    "source": "ai_agent"
+                    "error": "Website discovery failed"
                 }
             
+            # Validation and scraping share the document parsed during discovery
+            content, compression = self._compress_content(snapshot["blocks"], snapshot["text"], ctx.deps)
             return {
-                "url": "",
-                "content": "Could not validate company website",
-                "status": "error",
-                "error": "Website validation failed"
+                "url": snapshot["url"],
+                "content": content,
+                "status": "success",
+                "source": snapshot["source"],
+                "fetch": snapshot["fetch"],
+                "compression": compression
             }
             
         except Exception as e:
@@ -299,32 +945,40 @@ class CompanyResearchAgent(Agent):
                 "error": str(e)
             }
 
-    @Tool(name="fetch_linkedin_company_data")
-    async def get_linkedin_info(self, ctx: RunContext[CompanyResearchRequest]) -> Dict:
+    async def _lookup_linkedin(self, company_name: str) -> Optional[Tuple[str, Dict]]:
         """
-        Get information from the company's LinkedIn profile using the LinkedIn API.
+        Return the LinkedIn company id and extracted company content, or None if the company
+        is not found. Concurrent lookups of the same name share one set of LinkedIn calls.
         """
-        company_name = ctx.deps.company_name
-        print(f"Gathering LinkedIn information for {company_name}")
+        return await self._linkedin_flight.do(
+            self._normalize_company_name(company_name),
+            lambda: self._fetch_linkedin(company_name)
+        )
+
+    async def _fetch_linkedin(self, company_name: str) -> Optional[Tuple[str, Dict]]:
+        # Look the company up in the persistent index before searching
+        company_id = None
+        if self.linkedin_index:
+            company_id = await self.linkedin_index.get_entity_id(company_name)
         
-        try:
-            # Ensure we have LinkedIn credentials
-            await self._get_linkedin_credentials()
-            
+        if company_id is None:
             # Search for the company
-            company_search = self.linkedin_api.search_companies(company_name, limit=1)
+            company_search = await self.linkedin_session.call("search_companies", company_name, limit=1)
             
             if not company_search:
-                return {
-                    "url": "",
-                    "content": "Company not found on LinkedIn",
-                    "status": "error",
-                    "error": "Company not found"
-                }
+                return None
             
-            # Get company details
             company_id = company_search[0]['entity_id']
-            company_info = self.linkedin_api.get_company(company_id)
+            if self.linkedin_index:
+                await self.linkedin_index.set_entity_id(company_name, company_id)
+        
+        content = None
+        if self.linkedin_index:
+            content = await self.linkedin_index.get_content(company_id)
+        
+        if content is None:
+            # Get company details
+            company_info = await self.linkedin_session.call("get_company", company_id)
             
             # Extract relevant information
             content = {
@@ -340,7 +994,37 @@ class CompanyResearchAgent(Agent):
                 "employee_count": company_info.get('staffCount'),
                 #"recent_posts": company_info.get('posts', [])[:5]  # Get 5 most recent posts
             }
+            if self.linkedin_index:
+                await self.linkedin_index.set_content(company_id, content)
+        
+        return company_id, content
+
+    async def get_linkedin_info(self, ctx: RunContext[CompanyResearchRequest]) -> Dict:
+        """
+        Get information from the company's LinkedIn profile using the LinkedIn API.
+        """
+        company_name = ctx.deps.company_name
+        print(f"Gathering LinkedIn information for {company_name}")
+        
+        if not self.linkedin_session:
+            return {
+                "url": "",
+                "content": "LinkedIn integration not configured",
+                "status": "error",
+                "error": "LinkedIn integration not configured"
+            }
+        
+        try:
+            found = await self._lookup_linkedin(company_name)
+            if found is None:
+                return {
+                    "url": "",
+                    "content": "Company not found on LinkedIn",
+                    "status": "error",
+                    "error": "Company not found"
+                }
             
+            company_id, content = found
             return {
                 "url": f"https://www.linkedin.com/company/{company_id}",
                 "content": content,
@@ -354,4 +1038,59 @@ class CompanyResearchAgent(Agent):
                 "content": "",
                 "status": "error",
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
+
+    async def get_news_info(self, ctx: RunContext[CompanyResearchRequest]) -> Dict:
+        """
+        Get recent news about the company from news feeds and its website's newsroom, newest first.
+        """
+        company_name = ctx.deps.company_name
+        print(f"Gathering news for {company_name}")
+        
+        try:
+            articles = await self.news_gatherer.gather(company_name, site=lambda: self._website_snapshot(ctx))
+            return {
+                "content": [article.model_dump(mode="json") for article in articles],
+                "status": "success"
+            }
+            
+        except Exception as e:
+            print(f"Error gathering news: {str(e)}")
+            return {
+                "content": [],
+                "status": "error",
+                "error": str(e)
+            }
+
+    async def get_video_info(self, ctx: RunContext[CompanyResearchRequest]) -> Dict:
+        """
+        Get the videos on the company's website: embedded YouTube, Vimeo, Wistia and Loom players,
+        og:video tags and schema.org VideoObject data.
+        """
+        company_name = ctx.deps.company_name
+        print(f"Gathering videos for {company_name}")
+        
+        try:
+            snapshot = await self._website_snapshot(ctx)
+            if snapshot is None:
+                return {
+                    "url": "",
+                    "content": [],
+                    "status": "error",
+                    "error": "Website discovery failed"
+                }
+            
+            return {
+                "url": snapshot["url"],
+                "content": [video.model_dump(mode="json", exclude_none=True) for video in snapshot["videos"]],
+                "status": "success"
+            }
+            
+        except Exception as e:
+            print(f"Error gathering videos: {str(e)}")
+            return {
+                "url": "",
+                "content": [],
+                "status": "error",
+                "error": str(e)
+            }
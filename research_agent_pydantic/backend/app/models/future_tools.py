@@ -1,54 +0,0 @@
-from typing import List, Dict
-from pydantic_ai import Tool, RunContext
-from app.models.company_agent import CompanyResearchRequest
-
-# These tools will be implemented in the future
-# They are kept here for reference and future implementation
-
-async def get_news_info(ctx: RunContext[CompanyResearchRequest]) -> List[Dict]:
-    """
-    Get recent news about the company.
-    TODO: Implement proper news gathering logic using news APIs or web scraping
-    """
-    company_name = ctx.deps.company_name
-    print(f"Gathering news for {company_name}")
-    
-    try:
-        # TODO: Implement proper news gathering logic
-        return [
-            {
-                "title": f"Example news about {company_name}",
-                "url": "https://example.com/news",
-                "date": "2024-03-31",
-                "source": "Example News Source"
-            }
-        ]
-    except Exception as e:
-        print(f"Error gathering news: {str(e)}")
-        return []
-
-async def get_video_info(ctx: RunContext[CompanyResearchRequest]) -> List[Dict]:
-    """
-    Get relevant videos about the company.
-    TODO: Implement proper video gathering logic using YouTube API or other video platforms
-    """
-    company_name = ctx.deps.company_name
-    print(f"Gathering videos for {company_name}")
-    
-    try:
-        # TODO: Implement proper video gathering logic
-        return [
-            {
-                "title": f"Example video about {company_name}",
-                "url": "https://youtube.com/example",
-                "type": "product_demo",
-                "source": "YouTube"
-            }
-        ]
-    except Exception as e:
-        print(f"Error gathering videos: {str(e)}")
-        return []
-
-# Tool definitions for future use
-news_tool = Tool(get_news_info, takes_ctx=True)
-video_tool = Tool(get_video_info, takes_ctx=True) 
\ No newline at end of file
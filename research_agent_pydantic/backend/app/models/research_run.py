@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import JSON, Boolean, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+# JSONB on PostgreSQL, JSON text elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+class Base(DeclarativeBase):
+    pass
+
+#Defines one persisted research run; the schema is managed by the Alembic migrations in backend/migrations
+class ResearchRun(Base):
+    """A research agent run with its request, overview, sources, timings and token usage"""
+    __tablename__ = "research_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    company_name: Mapped[str] = mapped_column(String(255))
+    # Lowercase alphanumeric company name, the lookup key for a company's history
+    normalized_name: Mapped[str] = mapped_column(String(255))
+    # Hash of the normalized company name and additional info, the research cache key
+    request_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    request: Mapped[Dict] = mapped_column(JSONType)
+    overview: Mapped[Optional[Dict]] = mapped_column(JSONType, nullable=True)
+    source_urls: Mapped[List[str]] = mapped_column(JSONType, default=list)
+    # Content hash of each research tool's result by tool name, compared on refresh
+    source_hashes: Mapped[Optional[Dict[str, str]]] = mapped_column(JSONType, nullable=True)
+    # "run", "stream" or "refresh", and whether the tools were pre-gathered
+    mode: Mapped[str] = mapped_column(String(16))
+    pregather: Mapped[bool] = mapped_column(Boolean, default=False)
+    status: Mapped[str] = mapped_column(String(16))
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    duration_ms: Mapped[float] = mapped_column(Float)
+    # Milliseconds spent in each tool
+    timings: Mapped[Dict] = mapped_column(JSONType, default=dict)
+    model_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    model_requests: Mapped[int] = mapped_column(Integer, default=0)
+    request_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    response_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    total_tokens: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_research_runs_normalized_name_started_at", "normalized_name", "started_at"),
+        Index("ix_research_runs_started_at", "started_at"),
+        Index("ix_research_runs_request_key_started_at", "request_key", "started_at"),
+    )
@@ -0,0 +1,119 @@
+from typing import Any, Callable, Deque, Dict, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import threading
+import time
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when a bounded executor already has its maximum number of calls waiting"""
+
+#Defines a bounded thread pool for running blocking client calls off the event loop
+class BoundedExecutor:
+    """
+    Dedicated thread pool for a blocking client library.
+
+    Calls beyond `max_workers` wait in a queue of at most `max_queue` entries; anything
+    past that is rejected immediately instead of piling up. Each call has a timeout.
+    A call that times out stops being awaited, but its thread runs on until the
+    blocking function returns since Python threads cannot be interrupted.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_queue: int = 32, timeout: float = 20.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self._latencies: Deque[float] = deque(maxlen=1024)
+        self._queue_waits: Deque[float] = deque(maxlen=1024)
+
+    def _percentile(self, values: Deque[float], percentile: float) -> float:
+        """
+        Return a percentile of recent samples.
+        """
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+    def stats(self) -> Dict:
+        """
+        Return queue depth, outcome counters and recent latency percentiles in seconds.
+        """
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "queue_depth": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "latency_p50": self._percentile(self._latencies, 0.50),
+            "latency_p95": self._percentile(self._latencies, 0.95),
+            "queue_wait_p95": self._percentile(self._queue_waits, 0.95),
+        }
+
+    def _call(self, fn: Callable, submitted_at: float, state: Dict) -> Any:
+        """
+        Run a blocking call on a pool thread, recording how long it queued and ran.
+        """
+        started_at = time.perf_counter()
+        with self._lock:
+            if state["abandoned"]:
+                return None
+            state["started"] = True
+            self.queued -= 1
+            self.active += 1
+        self._queue_waits.append(started_at - submitted_at)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._latencies.append(time.perf_counter() - started_at)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking function on the pool and await its result.
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(f"{self.name} executor queue is full ({self.max_queue} waiting)")
+            self.queued += 1
+
+        state = {"started": False, "abandoned": False}
+        call = functools.partial(self._call, functools.partial(fn, *args, **kwargs), time.perf_counter(), state)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._pool, call)
+            result = await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                # A call that never reached a thread still holds its queue slot
+                if not state["started"]:
+                    state["abandoned"] = True
+                    self.queued -= 1
+        self.completed += 1
+        return result
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting work and release pool threads once running calls finish.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
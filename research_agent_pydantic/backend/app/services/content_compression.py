@@ -0,0 +1,195 @@
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+from collections import Counter
+
+from pydantic import BaseModel
+
+# Word pieces and single punctuation marks, the units a BPE tokenizer mostly splits on
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Sentence ends followed by the start of a new sentence
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+# What a research run is after, used to rank passages next to the company name and additional_info
+RESEARCH_GOAL = (
+    "company about overview mission purpose vision products services solutions platform features "
+    "customers industry market competitors competition pricing business model founded headquarters "
+    "team leadership funding investors raised series news announcement partnership"
+)
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or our that the their this "
+    "to was we were will with you your more all can not new".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the model token count of a text without a tokenizer.
+
+    Counts punctuation marks as one token and words as one token per five characters,
+    which tracks GPT-style BPE counts of English web text closely enough for budgeting.
+    """
+    return sum(1 + (len(piece) - 1) // 5 for piece in _TOKEN_PIECES.findall(text))
+
+def terms(text: str) -> List[str]:
+    """
+    Return lowercase, lightly stemmed content words of a text.
+    """
+    words = []
+    for word in _WORDS.findall(text.lower()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+#Defines the result of compressing page text for the model
+class CompressedContent(BaseModel):
+    """Compressed page text and what the compression saved"""
+    text: str
+    original_tokens: int
+    tokens: int
+    saved_tokens: int
+    duplicates_removed: int
+    passages_kept: int
+    passages_total: int
+
+    def report(self) -> Dict:
+        """
+        Return the compression numbers without the text.
+        """
+        return self.model_dump(exclude={"text"})
+
+#Compresses scraped page text to fit a token budget
+class ContentCompressor:
+    """
+    Fits scraped page text to a token budget before it reaches the model.
+
+    Works on the main content blocks of a page: repeated sentences are dropped, blocks are
+    cut into passages of about `passage_tokens`, and when the page is over budget passages
+    are ranked with BM25 against the research goal, the company name and additional_info.
+    The best passages that fit are kept in document order.
+    """
+
+    def __init__(self, token_budget: int = 1500, passage_tokens: int = 120):
+        self.token_budget = token_budget
+        self.passage_tokens = passage_tokens
+        self.compressions = 0
+        self.original_tokens = 0
+        self.tokens = 0
+
+    def stats(self) -> Dict:
+        """
+        Return token counters for this process.
+        """
+        return {
+            "token_budget": self.token_budget,
+            "compressions": self.compressions,
+            "original_tokens": self.original_tokens,
+            "tokens": self.tokens,
+            "saved_tokens": self.original_tokens - self.tokens,
+            "saved_ratio": 1 - self.tokens / self.original_tokens if self.original_tokens else 0.0,
+        }
+
+    def _passages(self, blocks: List[str]) -> Tuple[List[str], int]:
+        """
+        Deduplicate sentences across blocks and group them into passages.
+        """
+        seen = set()
+        duplicates = 0
+        passages: List[str] = []
+        current: List[str] = []
+        size = 0
+        for block in blocks:
+            for sentence in _SENTENCE_END.split(block):
+                key = " ".join(_WORDS.findall(sentence.lower()))
+                # Fragments without words are dropped but are not repeats
+                if not key:
+                    continue
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                tokens = estimate_tokens(sentence)
+                if current and size + tokens > self.passage_tokens:
+                    passages.append(" ".join(current))
+                    current, size = [], 0
+                current.append(sentence)
+                size += tokens
+            # Short blocks such as headings and list items run on into the next block
+            if size >= self.passage_tokens // 4:
+                passages.append(" ".join(current))
+                current, size = [], 0
+        if current:
+            passages.append(" ".join(current))
+        return passages, duplicates
+
+    def _rank(self, passages: List[str], query: Dict[str, float]) -> List[float]:
+        """
+        Score passages with BM25 against weighted query terms, with a slight lead for earlier passages.
+        """
+        k1, b = 1.2, 0.75
+        passage_terms = [Counter(terms(passage)) for passage in passages]
+        lengths = [sum(counts.values()) for counts in passage_terms]
+        average = (sum(lengths) / len(lengths)) or 1.0
+        frequency = Counter(term for counts in passage_terms for term in counts)
+        count = len(passages)
+        scores = []
+        for index, (counts, length) in enumerate(zip(passage_terms, lengths)):
+            score = 0.0
+            for term, weight in query.items():
+                tf = counts.get(term)
+                if not tf:
+                    continue
+                idf = math.log(1 + (count - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                score += weight * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average))
+            scores.append(score + 0.5 * (1 - index / count))
+        return scores
+
+    def compress(
+        self,
+        original_text: str,
+        blocks: List[str],
+        company_name: str,
+        additional_info: Optional[str] = None
+    ) -> CompressedContent:
+        """
+        Compress the main content blocks of a page, reporting savings against the full page text.
+        """
+        original_tokens = estimate_tokens(original_text)
+        passages, duplicates = self._passages(blocks or [original_text])
+        passage_tokens = [estimate_tokens(passage) for passage in passages]
+
+        keep = range(len(passages))
+        if sum(passage_tokens) > self.token_budget:
+            query: Dict[str, float] = {}
+            for text, weight in ((RESEARCH_GOAL, 1.0), (company_name, 1.5), (additional_info or "", 2.0)):
+                for term in terms(text):
+                    query[term] = max(query.get(term, 0.0), weight)
+            scores = self._rank(passages, query)
+            budget = self.token_budget
+            selected = []
+            for index in sorted(range(len(passages)), key=lambda i: -scores[i]):
+                if passage_tokens[index] <= budget:
+                    selected.append(index)
+                    budget -= passage_tokens[index]
+            keep = sorted(selected)
+
+        text = " ".join(passages[index] for index in keep)
+        tokens = estimate_tokens(text)
+        self.compressions += 1
+        self.original_tokens += original_tokens
+        self.tokens += tokens
+        return CompressedContent(
+            text=text,
+            original_tokens=original_tokens,
+            tokens=tokens,
+            saved_tokens=original_tokens - tokens,
+            duplicates_removed=duplicates,
+            passages_kept=len(keep),
+            passages_total=len(passages)
+        )
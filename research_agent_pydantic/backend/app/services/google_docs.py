@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional, Tuple
+import re
+
+# Characters the Docs API rejects in inserted text; newlines and tabs are kept
+_CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+
+def utf16_length(text: str) -> int:
+    """
+    Return the length of text in UTF-16 code units, the unit of Docs API indices.
+    Characters outside the Basic Multilingual Plane, like most emoji, count twice.
+    """
+    return len(text.encode("utf-16-le")) // 2
+
+def _clean(text, single_line: bool = False) -> str:
+    text = _CONTROL_CHARACTERS.sub("", str(text or ""))
+    if single_line:
+        text = " ".join(text.split())
+    return text
+
+#Builds a document body as one text insert plus styles at computed ranges
+class DocumentBuilder:
+    """
+    Accumulates paragraphs and records where headings, bullets and links land so that
+    the whole body is written with a single insertText at index 1 followed by style
+    requests whose ranges are computed from the final text.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        # The body of a new document starts at index 1
+        self._index = 1
+        self._headings: List[Tuple[int, int, str]] = []
+        self._bullets: List[Tuple[int, int]] = []
+        self._links: List[Tuple[int, int, str]] = []
+
+    def _append(self, text: str) -> Tuple[int, int]:
+        start = self._index
+        self._parts.append(text)
+        self._index += utf16_length(text)
+        return start, self._index
+
+    def heading(self, text: str, style: str = "HEADING_2") -> None:
+        start, end = self._append(_clean(text, single_line=True) + "\n")
+        self._headings.append((start, end, style))
+
+    def paragraph(self, text: str) -> None:
+        text = _clean(text).strip("\n")
+        if text:
+            self._append(text + "\n")
+
+    def labeled_link(self, label: str, url: Optional[str]) -> None:
+        """
+        Add a "Label: url" line with the url linked.
+        """
+        url = _clean(url, single_line=True)
+        if not url:
+            return
+        self._append(f"{label}: ")
+        start, end = self._append(url)
+        self._links.append((start, end, url))
+        self._append("\n")
+
+    def bullet(self, text: str, url: Optional[str] = None, details: str = "") -> None:
+        """
+        Add a bulleted paragraph, optionally linking its text to url and followed by details.
+        """
+        text = _clean(text, single_line=True) or _clean(url, single_line=True)
+        if not text:
+            return
+        paragraph_start, end = self._append(text)
+        if url:
+            self._links.append((paragraph_start, end, _clean(url, single_line=True)))
+        details = _clean(details, single_line=True)
+        if details:
+            self._append(f" ({details})")
+        _, paragraph_end = self._append("\n")
+        # Merge adjacent bullet paragraphs into one list range
+        if self._bullets and self._bullets[-1][1] == paragraph_start:
+            self._bullets[-1] = (self._bullets[-1][0], paragraph_end)
+        else:
+            self._bullets.append((paragraph_start, paragraph_end))
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def requests(self) -> List[Dict]:
+        """
+        Return the batchUpdate requests writing the document: the insert comes first and
+        none of the later requests changes the text, so every computed range stays valid.
+        """
+        requests: List[Dict] = [{"insertText": {"location": {"index": 1}, "text": self.text()}}]
+        for start, end, style in self._headings:
+            requests.append({
+                "updateParagraphStyle": {
+                    "range": {"startIndex": start, "endIndex": end},
+                    "paragraphStyle": {"namedStyleType": style},
+                    "fields": "namedStyleType",
+                }
+            })
+        for start, end in self._bullets:
+            requests.append({
+                "createParagraphBullets": {
+                    "range": {"startIndex": start, "endIndex": end},
+                    "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE",
+                }
+            })
+        for start, end, url in self._links:
+            requests.append({
+                "updateTextStyle": {
+                    "range": {"startIndex": start, "endIndex": end},
+                    "textStyle": {"link": {"url": url}},
+                    "fields": "link",
+                }
+            })
+        return requests
+
+def _details(item: Dict, keys: List[str]) -> str:
+    return " · ".join(str(item[key]) for key in keys if item.get(key))
+
+def build_document_requests(title: str, company_data: Dict) -> List[Dict]:
+    """
+    Build the batchUpdate requests writing a company overview into a new document.
+    """
+    doc = DocumentBuilder()
+    doc.heading(f"Company Research: {title}", "TITLE")
+    doc.labeled_link("Website", company_data.get("website"))
+    doc.labeled_link("LinkedIn", company_data.get("linkedin"))
+    for heading, key in (("Summary", "summary"), ("Purpose", "purpose")):
+        if company_data.get(key):
+            doc.heading(heading)
+            doc.paragraph(company_data[key])
+    for heading, key in (("Products", "products"), ("Competitors", "competitors")):
+        if company_data.get(key):
+            doc.heading(heading)
+            for item in company_data[key]:
+                doc.bullet(item)
+    if company_data.get("funding_info"):
+        doc.heading("Funding")
+        for key, value in company_data["funding_info"].items():
+            if value not in (None, ""):
+                doc.paragraph(f"{str(key).replace('_', ' ').capitalize()}: {value}")
+    if company_data.get("news"):
+        doc.heading("Recent News")
+        for news in company_data["news"]:
+            doc.bullet(news.get("title"), news.get("url"), _details(news, ["source", "date"]))
+    if company_data.get("videos"):
+        doc.heading("Videos")
+        for video in company_data["videos"]:
+            doc.bullet(video.get("title"), video.get("url"), _details(video, ["source", "type"]))
+    for heading, key in (("Follow-up Questions", "follow_up_questions"), ("Interview Questions", "interview_questions")):
+        if company_data.get(key):
+            doc.heading(heading)
+            for question in company_data[key]:
+                doc.bullet(question)
+    return doc.requests()
@@ -0,0 +1,338 @@
+from typing import Dict, List, Optional, Tuple
+from abc import ABC, abstractmethod
+import codecs
+import importlib.util
+import re
+
+from bs4 import BeautifulSoup
+
+# Parser backends in order of preference; lxml is C-accelerated, html.parser is pure Python
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+# Line breaks recognized by str.splitlines and pairs of spaces, the separators of the original cleanup
+_TEXT_SEPARATORS = re.compile(r"[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]| {2}")
+
+# Elements that carry page chrome rather than content
+_BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "nav", "header", "footer", "aside",
+    "form", "button", "select", "iframe", "svg", "dialog",
+)
+
+# ARIA landmark roles of page chrome
+_BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "dialog", "alertdialog", "search"}
+
+# id / class names of cookie banners, menus, footers, share bars and similar chrome
+_BOILERPLATE_NAMES = re.compile(
+    r"cookie|consent|gdpr|(?:^|[\s_-])(?:nav|navbar|navigation|menu|footer|sidebar|breadcrumbs?|"
+    r"newsletter|subscribe|popup|modal|share|social|skip)(?:$|[\s_-])",
+    re.IGNORECASE
+)
+
+# Elements whose text starts a new block
+_BLOCK_TAGS = (
+    "p", "div", "section", "article", "main", "li", "dt", "dd", "td", "th", "tr", "blockquote",
+    "pre", "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr", "table", "ul", "ol", "dl", "figcaption",
+)
+
+# Marks block boundaries in extracted text, a private use character lxml accepts in text nodes
+_BLOCK_MARK = "\ue000"
+
+# Charset declared in a <meta> tag near the top of a document
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Collapse page text in a single pass.
+
+    Produces the same output as stripping every line, splitting it on double spaces,
+    stripping each phrase and joining the non-empty phrases with single spaces.
+    """
+    return " ".join(filter(None, map(str.strip, _TEXT_SEPARATORS.split(text))))
+
+def is_boilerplate(tag: str, attrs) -> bool:
+    """
+    Check if an element is page chrome, from its tag name and attributes.
+    """
+    if tag in _BOILERPLATE_TAGS:
+        return True
+    if attrs.get("hidden") is not None or attrs.get("aria-hidden") == "true":
+        return True
+    if (attrs.get("role") or "").lower() in _BOILERPLATE_ROLES:
+        return True
+    names = " ".join(filter(None, [attrs.get("id") or "", attrs.get("class") or ""]))
+    return bool(names) and _BOILERPLATE_NAMES.search(names) is not None
+
+def split_blocks(text: str) -> List[str]:
+    """
+    Split text containing block marks into normalized, non-empty blocks.
+    """
+    return [block for block in map(normalize_whitespace, text.split(_BLOCK_MARK)) if block]
+
+def sniff_encoding(content: bytes) -> str:
+    """
+    Pick a document encoding from a <meta> declaration, falling back to UTF-8 or Windows-1252.
+    """
+    match = _META_CHARSET.search(content[:2048])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "windows-1252"
+
+def resolve_encoding(content: bytes, declared: Optional[str]) -> str:
+    """
+    Return the declared encoding if Python knows it, otherwise sniff one from the content.
+    """
+    if declared:
+        try:
+            return codecs.lookup(declared).name
+        except LookupError:
+            pass
+    return sniff_encoding(content)
+
+#Defines the parsed page interface shared by validation and text extraction
+class ParsedPage(ABC):
+    """A parsed HTML document"""
+
+    @abstractmethod
+    def title(self) -> str:
+        """
+        Return the document title, or an empty string.
+        """
+
+    @abstractmethod
+    def meta_content(self, name: str) -> str:
+        """
+        Return the content of the first <meta name=...> tag, or an empty string.
+        """
+
+    @abstractmethod
+    def leading_text(self, limit: int) -> str:
+        """
+        Return the first `limit` characters of document text without walking the whole page.
+        """
+
+    @abstractmethod
+    def attributes(self, tag: str) -> List[Dict[str, str]]:
+        """
+        Return the attributes of every element with the given tag name, in document order.
+        """
+
+    @abstractmethod
+    def attributes_with_children(self, tag: str, child: str) -> List[Tuple[Dict[str, str], List[Dict[str, str]]]]:
+        """
+        Return the attributes of every element with the given tag name together with the
+        attributes of its `child` elements, e.g. a <video> and its <source> elements.
+        """
+
+    @abstractmethod
+    def anchors(self) -> List[Tuple[str, str]]:
+        """
+        Return the href and normalized text of every link, in document order.
+        """
+
+    @abstractmethod
+    def script_texts(self, script_type: str) -> List[str]:
+        """
+        Return the contents of the <script> elements of a type, e.g. "application/ld+json".
+        Call it before text(), which removes scripts.
+        """
+
+    @abstractmethod
+    def text(self) -> str:
+        """
+        Return normalized visible text with script and style elements removed.
+        """
+
+    @abstractmethod
+    def blocks(self) -> List[str]:
+        """
+        Return the main content as normalized text blocks, without navigation, cookie
+        banners, footers and other page chrome. Call it after the other accessors, it
+        prunes the parsed tree.
+        """
+
+#BeautifulSoup page, the pure-Python fallback
+class SoupPage(ParsedPage):
+    """Page parsed with BeautifulSoup's html.parser"""
+
+    def __init__(self, content: bytes, encoding: Optional[str] = None):
+        # Decoding once here is cheaper than BeautifulSoup's own encoding detection
+        text = content.decode(resolve_encoding(content, encoding), errors="replace")
+        self.soup = BeautifulSoup(text, "html.parser")
+
+    def title(self) -> str:
+        return (self.soup.title.string or "") if self.soup.title else ""
+
+    def meta_content(self, name: str) -> str:
+        tag = self.soup.find("meta", attrs={"name": name})
+        return tag.get("content", "") if tag else ""
+
+    def leading_text(self, limit: int) -> str:
+        parts = []
+        size = 0
+        for string in self.soup.strings:
+            parts.append(string)
+            size += len(string)
+            if size >= limit:
+                break
+        return "".join(parts)[:limit]
+
+    @staticmethod
+    def _attrs(element) -> Dict[str, str]:
+        # Multi-valued attributes such as class come back as lists
+        return {k: " ".join(v) if isinstance(v, list) else v for k, v in element.attrs.items()}
+
+    def attributes(self, tag: str) -> List[Dict[str, str]]:
+        return [self._attrs(element) for element in self.soup.find_all(tag)]
+
+    def attributes_with_children(self, tag: str, child: str) -> List[Tuple[Dict[str, str], List[Dict[str, str]]]]:
+        return [
+            (self._attrs(element), [self._attrs(nested) for nested in element.find_all(child)])
+            for element in self.soup.find_all(tag)
+        ]
+
+    def anchors(self) -> List[Tuple[str, str]]:
+        return [(a["href"], normalize_whitespace(a.get_text())) for a in self.soup.find_all("a", href=True)]
+
+    def script_texts(self, script_type: str) -> List[str]:
+        return [
+            script.get_text() for script in self.soup.find_all("script")
+            if (script.get("type") or "").split(";")[0].strip().lower() == script_type
+        ]
+
+    def text(self) -> str:
+        for element in self.soup(["script", "style"]):
+            element.decompose()
+        return normalize_whitespace(self.soup.get_text())
+
+    def blocks(self) -> List[str]:
+        root = (
+            self.soup.find("main") or self.soup.find(attrs={"role": "main"})
+            or self.soup.find("article") or self.soup.body or self.soup
+        )
+        for element in root.find_all(True):
+            if element.decomposed:
+                continue
+            if is_boilerplate(element.name, self._attrs(element)):
+                element.decompose()
+        for element in root.find_all(_BLOCK_TAGS):
+            element.insert_before(_BLOCK_MARK)
+            element.append(_BLOCK_MARK)
+        return split_blocks(root.get_text())
+
+#lxml page, parses and walks the tree in C
+class LxmlPage(ParsedPage):
+    """Page parsed with lxml.html"""
+
+    def __init__(self, content: bytes, encoding: Optional[str] = None):
+        import lxml.html
+
+        parser = lxml.html.HTMLParser(encoding=resolve_encoding(content, encoding))
+        try:
+            self.root = lxml.html.document_fromstring(content, parser=parser)
+        except Exception:
+            # lxml rejects empty documents
+            self.root = lxml.html.document_fromstring(b"<html></html>")
+
+    def title(self) -> str:
+        title = self.root.find(".//title")
+        return (title.text or "") if title is not None and len(title) == 0 else ""
+
+    def meta_content(self, name: str) -> str:
+        for tag in self.root.iter("meta"):
+            if tag.get("name") == name:
+                return tag.get("content", "")
+        return ""
+
+    def leading_text(self, limit: int) -> str:
+        parts = []
+        size = 0
+        for string in self.root.itertext():
+            parts.append(string)
+            size += len(string)
+            if size >= limit:
+                break
+        return "".join(parts)[:limit]
+
+    def attributes(self, tag: str) -> List[Dict[str, str]]:
+        return [dict(element.attrib) for element in self.root.iter(tag)]
+
+    def attributes_with_children(self, tag: str, child: str) -> List[Tuple[Dict[str, str], List[Dict[str, str]]]]:
+        return [
+            (dict(element.attrib), [dict(nested.attrib) for nested in element.iterdescendants(child)])
+            for element in self.root.iter(tag)
+        ]
+
+    def anchors(self) -> List[Tuple[str, str]]:
+        return [
+            (a.get("href"), normalize_whitespace(a.text_content()))
+            for a in self.root.iter("a") if a.get("href")
+        ]
+
+    def script_texts(self, script_type: str) -> List[str]:
+        return [
+            script.text or "" for script in self.root.iter("script")
+            if (script.get("type") or "").split(";")[0].strip().lower() == script_type
+        ]
+
+    def text(self) -> str:
+        from lxml import etree
+
+        etree.strip_elements(self.root, "script", "style", with_tail=False)
+        return normalize_whitespace("".join(self.root.itertext()))
+
+    def blocks(self) -> List[str]:
+        candidates = self.root.xpath("//main | //*[@role='main'] | //article")
+        root = candidates[0] if candidates else (self.root.find("body") if self.root.find("body") is not None else self.root)
+        # Collect first, then detach, keeping the text that follows a removed element
+        chrome = [
+            element for element in root.iterdescendants()
+            if isinstance(element.tag, str) and is_boilerplate(element.tag, element.attrib)
+        ]
+        for element in chrome:
+            if element.getparent() is not None:
+                element.drop_tree()
+        for element in root.iter(_BLOCK_TAGS):
+            element.text = _BLOCK_MARK + (element.text or "")
+            element.tail = _BLOCK_MARK + (element.tail or "")
+        return split_blocks("".join(root.itertext()))
+
+_PAGE_CLASSES = {
+    "lxml": LxmlPage,
+    "html.parser": SoupPage,
+}
+
+def is_backend_available(backend: str) -> bool:
+    """
+    Check if a parser backend can be used in this environment.
+    """
+    if backend not in _PAGE_CLASSES:
+        return False
+    if backend == "html.parser":
+        return True
+    return importlib.util.find_spec(backend) is not None
+
+def resolve_backend(preferred: str = "auto") -> str:
+    """
+    Return the parser backend to use, picking the fastest installed one for "auto".
+    """
+    if preferred != "auto":
+        if not is_backend_available(preferred):
+            raise ValueError(f"HTML parser backend '{preferred}' is not available")
+        return preferred
+    for backend in PARSER_BACKENDS:
+        if is_backend_available(backend):
+            return backend
+    return "html.parser"
+
+def parse_html(content: bytes, encoding: Optional[str] = None, backend: str = "html.parser") -> ParsedPage:
+    """
+    Parse raw response bytes with the given backend, decoding them with the declared charset.
+    """
+    return _PAGE_CLASSES[backend](content, encoding)
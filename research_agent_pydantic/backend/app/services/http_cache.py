@@ -0,0 +1,185 @@
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import httpx
+
+#Persistent HTTP response cache shared by the agent's fetch layer
+class HTTPResponseCache:
+    """
+    On-disk cache of HTTP responses keyed by URL.
+
+    Bodies are stored zlib-compressed in a SQLite file so several workers can share it.
+    Fresh entries are served without touching the network; stale entries are revalidated
+    with ETag / Last-Modified and refreshed in place when the server answers 304.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600.0, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, size INTEGER, "
+            "etag TEXT, last_modified TEXT, stored_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def stats(self) -> Dict:
+        """
+        Return hit/miss counters for this process.
+        """
+        lookups = self.hits + self.revalidations + self.misses
+        return {
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.revalidations) / lookups if lookups else 0.0,
+        }
+
+    def _load(self, url: str) -> Optional[Dict]:
+        """
+        Load a cached entry and mark it as recently used.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, etag, last_modified, stored_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        status, headers, body, etag, last_modified, stored_at = row
+        return {
+            "status": status,
+            "headers": json.loads(headers),
+            "body": zlib.decompress(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": stored_at,
+        }
+
+    def _store(self, url: str, response: httpx.Response) -> None:
+        """
+        Store a response body compressed and evict least recently used entries over the size limit.
+        """
+        body = zlib.compress(response.content, 6)
+        now = time.time()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    response.status_code,
+                    json.dumps(headers),
+                    body,
+                    len(body),
+                    response.headers.get("etag"),
+                    response.headers.get("last-modified"),
+                    now,
+                    now,
+                )
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 1"
+                ).fetchone()
+                if oldest is None or oldest[0] == url:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (oldest[0],))
+                total -= oldest[1]
+                self.evictions += 1
+            self._conn.commit()
+
+    def _refresh(self, url: str) -> None:
+        """
+        Reset the freshness timestamp of an entry after a 304 revalidation.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _to_response(self, url: str, entry: Dict) -> httpx.Response:
+        """
+        Rebuild an httpx response from a cached entry so callers can treat it like a live one.
+        """
+        return httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            content=entry["body"],
+            request=httpx.Request("GET", url),
+            extensions={"from_cache": True},
+        )
+
+    def _is_cacheable(self, response: httpx.Response) -> bool:
+        """
+        Check if a response may be stored; partial bodies never are.
+        """
+        cache_control = response.headers.get("cache-control", "").lower()
+        return (
+            response.status_code == 200
+            and "no-store" not in cache_control
+            and not response.extensions.get("truncated")
+            and not response.extensions.get("aborted")
+        )
+
+    async def get(
+        self,
+        url: str,
+        headers: Optional[Dict],
+        send: Callable[[Dict], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """
+        GET a URL through the cache, using `send(headers)` for the network request.
+        """
+        entry = await asyncio.to_thread(self._load, url)
+        if entry is not None and time.time() - entry["stored_at"] < self.ttl_seconds:
+            self.hits += 1
+            return self._to_response(url, entry)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await send(request_headers)
+        if response.status_code == 304 and entry is not None:
+            self.revalidations += 1
+            await asyncio.to_thread(self._refresh, url)
+            return self._to_response(url, entry)
+
+        self.misses += 1
+        if self._is_cacheable(response):
+            await asyncio.to_thread(self._store, url, response)
+        return response
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
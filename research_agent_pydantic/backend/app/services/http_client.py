@@ -0,0 +1,358 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.request import getproxies
+import asyncio
+import importlib.util
+import ipaddress
+import socket
+import threading
+import time
+import weakref
+
+import httpcore
+import httpx
+from pydantic import BaseModel
+
+#Defines connection pool settings of the shared HTTP client
+class HTTPClientLimits(BaseModel):
+    """Connection pool, keep-alive, HTTP/2 and DNS cache settings"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    # Seconds to reuse resolved addresses, 0 resolves on every new connection
+    dns_cache_ttl: float = 300.0
+
+def is_http2_available() -> bool:
+    """
+    Return whether the optional h2 package needed for HTTP/2 is installed.
+    """
+    return importlib.util.find_spec("h2") is not None
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+#Network backend that resolves each host once per TTL
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    Wraps an httpcore network backend and connects to cached addresses of a host instead
+    of resolving it for every new connection. TLS still verifies the original host name,
+    which httpcore passes to start_tls separately.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, ttl_seconds: float = 300.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._addresses: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._pending: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        key = (host, port)
+        with self._lock:
+            entry = self._addresses.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            # Connections opened together for a new host share one lookup
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._pending[key] = asyncio.ensure_future(self._lookup(host, port))
+            else:
+                self.hits += 1
+        return await asyncio.shield(pending)
+
+    async def _lookup(self, host: str, port: int) -> List[str]:
+        key = (host, port)
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+            with self._lock:
+                self._addresses[key] = (time.monotonic() + self.ttl_seconds, addresses)
+            return addresses
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self._addresses.pop((host, port), None)
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        if _is_ip_address(host):
+            return await self.backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        try:
+            addresses = await self._resolve(host, port)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # Every cached address failed, the host may have moved
+        self.forget(host, port)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hosts = len(self._addresses)
+        lookups = self.hits + self.misses
+        return {
+            "hosts": hosts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+# httpcore errors and the httpx errors they are raised as, most specific first
+_HTTPCORE_ERRORS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+@contextmanager
+def _httpx_errors() -> Iterator[None]:
+    """
+    Raise httpcore errors as their httpx counterparts, as httpx's own transport does.
+    """
+    try:
+        yield
+    except Exception as e:
+        for source, target in _HTTPCORE_ERRORS:
+            if isinstance(e, source):
+                raise target(str(e)) from e
+        raise
+
+#Response body stream that marks its request finished when closed
+class _TrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream, transport: "PooledTransport"):
+        self.stream = stream
+        self.transport = transport
+        self.closed = False
+
+    async def __aiter__(self):
+        with _httpx_errors():
+            async for chunk in self.stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        # httpx may close a response more than once
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            with _httpx_errors():
+                await self.stream.aclose()
+        finally:
+            self.transport.in_flight -= 1
+
+#Transport that tracks in-flight requests and exposes pool utilization
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an httpcore connection pool, optionally through an HTTP(S) proxy,
+    with pool utilization stats and an optional DNS cache as the pool's network backend.
+    """
+
+    def __init__(self, limits: HTTPClientLimits, proxy: Optional[str] = None, trust_env: bool = True):
+        self.limits = limits
+        # Proxy host and port without credentials, for stats
+        self.proxy_address: Optional[str] = None
+        self.dns_cache: Optional[CachingDNSBackend] = None
+        if limits.dns_cache_ttl > 0:
+            self.dns_cache = CachingDNSBackend(httpcore.AnyIOBackend(), limits.dns_cache_ttl)
+        options = dict(
+            ssl_context=httpx.create_ssl_context(trust_env=trust_env),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=limits.http2,
+            network_backend=self.dns_cache
+        )
+        if proxy:
+            url = httpx.URL(proxy)
+            self.proxy_address = f"{url.host}:{url.port or (443 if url.scheme == 'https' else 80)}"
+            self.pool = httpcore.AsyncHTTPProxy(
+                proxy_url=httpcore.URL(scheme=url.raw_scheme, host=url.raw_host, port=url.port, target=url.raw_path),
+                proxy_auth=(url.username, url.password) if url.username else None,
+                **options
+            )
+        else:
+            self.pool = httpcore.AsyncConnectionPool(**options)
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queued = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.queued += 1
+        waiting = True
+        outer_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict) -> None:
+            # The first connection event means the pool handed the request a connection
+            nonlocal waiting
+            if waiting:
+                waiting = False
+                self.queued -= 1
+            if outer_trace:
+                await outer_trace(event_name, info)
+
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions={**request.extensions, "trace": trace}
+        )
+        try:
+            with _httpx_errors():
+                response = await self.pool.handle_async_request(core_request)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        finally:
+            if waiting:
+                waiting = False
+                self.queued -= 1
+        # The connection stays busy until the body is read or the response is closed
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, self),
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+    def stats(self) -> Dict:
+        """
+        Return pool size and utilization: open, active and idle connections, requests
+        waiting for a connection, and in-flight requests now and at peak.
+        """
+        connections = list(self.pool.connections)
+        active = sum(1 for connection in connections if not connection.is_idle())
+        http2 = sum(1 for connection in connections if "HTTP/2" in connection.info())
+        stats = {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.limits.http2,
+            "proxy": self.proxy_address,
+            "connections": len(connections),
+            "active": active,
+            "idle": len(connections) - active,
+            "http2_connections": http2,
+            "utilization": active / self.limits.max_connections if self.limits.max_connections else 0.0,
+            "queued": self.queued,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+        if self.dns_cache:
+            stats["dns_cache"] = self.dns_cache.stats()
+        return stats
+
+def environment_proxies() -> Dict[str, Optional[str]]:
+    """
+    Map URL patterns to the proxy in HTTP_PROXY, HTTPS_PROXY or ALL_PROXY, and hosts in
+    NO_PROXY to None (a direct connection), the way httpx reads them for its own transport.
+    """
+    proxies = getproxies()
+    mounts: Dict[str, Optional[str]] = {}
+    for scheme in ("http", "https", "all"):
+        url = proxies.get(scheme)
+        if url:
+            mounts[f"{scheme}://"] = url if "://" in url else f"http://{url}"
+    for host in (host.strip() for host in proxies.get("no", "").split(",")):
+        if not host:
+            continue
+        if host == "*":
+            return {}
+        if "://" in host:
+            mounts[host] = None
+        elif _is_ip_address(host) or host == "localhost":
+            mounts[f"all://{host}"] = None
+        else:
+            mounts[f"all://*{host}"] = None
+    return mounts
+
+# Transports of the clients built by create_http_client, for pool_stats
+_client_transports: "weakref.WeakKeyDictionary[httpx.AsyncClient, Tuple[PooledTransport, Dict[str, PooledTransport]]]" = weakref.WeakKeyDictionary()
+
+def create_http_client(limits: Optional[HTTPClientLimits] = None, trust_env: bool = True) -> httpx.AsyncClient:
+    """
+    Build the shared client for website fetches and probes. HTTP/2 is only enabled when the
+    h2 package is installed. With `trust_env` the proxies from the environment are mounted,
+    since httpx only reads them itself for clients it builds the transport of.
+    """
+    limits = limits or HTTPClientLimits()
+    if limits.http2 and not is_http2_available():
+        print("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        limits = limits.model_copy(update={"http2": False})
+    transport = PooledTransport(limits, trust_env=trust_env)
+    proxies: Dict[str, PooledTransport] = {}
+    mounts: Dict[str, Optional[PooledTransport]] = {}
+    for pattern, url in (environment_proxies() if trust_env else {}).items():
+        if url is None:
+            mounts[pattern] = None
+        elif not url.startswith(("http://", "https://")):
+            print(f"Ignoring unsupported proxy {url} for {pattern}")
+        else:
+            # One pool per proxy, however many schemes use it
+            if url not in proxies:
+                proxies[url] = PooledTransport(limits, proxy=url, trust_env=trust_env)
+            mounts[pattern] = proxies[url]
+    client = httpx.AsyncClient(transport=transport, mounts=mounts, trust_env=trust_env)
+    _client_transports[client] = (transport, proxies)
+    return client
+
+def pool_stats(client: httpx.AsyncClient) -> Dict:
+    """
+    Return connection pool stats of a client built by create_http_client, with the pools
+    of any proxies it connects through.
+    """
+    transports = _client_transports.get(client)
+    if transports is None:
+        return {"managed": False}
+    transport, proxies = transports
+    stats = {"managed": True, **transport.stats()}
+    if proxies:
+        stats["proxies"] = [proxy.stats() for proxy in proxies.values()]
+    return stats
@@ -1,227 +1,321 @@
-from typing import Dict, Optional
-from notion_client import Client as NotionClient
-# from google.oauth2.credentials import Credentials
-# from googleapiclient.discovery import build
-# from google.oauth2 import service_account
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+import asyncio
+import json
+import threading
+import httpx
+from notion_client import AsyncClient as NotionClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+from google.oauth2 import service_account
 from pydantic import BaseModel
+from app.services.rate_limiter import TokenBucket, backoff_delay
+from app.services import metrics
+from app.services.google_docs import build_document_requests
+
+# Notion accepts at most 100 child blocks per pages.create or blocks.children.append request
+NOTION_MAX_BLOCKS_PER_REQUEST = 100
+
+# Notion rejects text objects longer than 2000 characters
+NOTION_MAX_TEXT_LENGTH = 2000
+
+def _rich_text(content: str, url: Optional[str] = None) -> List[Dict]:
+    """
+    Build Notion rich text, split into objects within Notion's length limit.
+    """
+    content = content or ""
+    chunks = [content[i:i + NOTION_MAX_TEXT_LENGTH] for i in range(0, len(content), NOTION_MAX_TEXT_LENGTH)] or [""]
+    text = []
+    for chunk in chunks:
+        item = {"type": "text", "text": {"content": chunk}}
+        if url:
+            item["text"]["link"] = {"url": url}
+        text.append(item)
+    return text
+
+def _section_block(title: str, children: List[Dict]) -> Dict:
+    """
+    Build a toggleable heading holding a section's first child blocks, so the whole
+    section can later be replaced by deleting one block.
+    """
+    return {
+        "object": "block",
+        "type": "heading_2",
+        "heading_2": {"rich_text": _rich_text(title), "is_toggleable": True, "children": children},
+    }
+
+def _link_block(item: Dict, details: List[str]) -> Dict:
+    """
+    Build a bulleted list item linking to a news or video entry, followed by its details.
+    """
+    url = item.get("url") or None
+    rich_text = _rich_text(item.get("title") or url or "Untitled", url)
+    extra = " · ".join(str(item[key]) for key in details if item.get(key))
+    if extra:
+        rich_text.extend(_rich_text(f" ({extra})"))
+    return {"object": "block", "type": "bulleted_list_item", "bulleted_list_item": {"rich_text": rich_text}}
+
+def _company_title(company_data: Dict) -> str:
+    """
+    Return the company name, or the website host when the overview has no name.
+    """
+    if company_data.get("name"):
+        return company_data["name"]
+    host = urlparse(company_data.get("website") or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+def is_retryable_notion_error(error: Exception) -> bool:
+    """
+    Return whether a failed Notion request may succeed later: rate limiting, server errors and timeouts.
+    """
+    if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+        return True
+    status = getattr(error, "status", None) if isinstance(error, HTTPResponseError) else None
+    return status is not None and (status == 429 or status >= 500)
+
+def notion_retry_after(error: Exception) -> Optional[float]:
+    """
+    Return the Retry-After delay Notion sent with a 429, if any.
+    """
+    headers = getattr(error, "headers", None)
+    try:
+        return float(headers["retry-after"]) if headers and "retry-after" in headers else None
+    except ValueError:
+        return None
 
 class IntegrationService:
     def __init__(self):
         self.notion_client = None
-        # self.google_docs_service = None
+        self.google_docs_credentials = None
+        # httplib2 connections are not thread-safe, so each worker thread builds its own Docs service
+        self._google_docs_local = threading.local()
 
-    def setup_notion(self, notion_token: str, database_id: str):
+    def setup_notion(self, notion_token: str, database_id: str, requests_per_second: float = 3.0, max_retries: int = 4):
         """
         Set up Notion integration with API token and database ID.
+
+        Every Notion request goes through one token bucket at `requests_per_second`, Notion's
+        average rate limit, and is retried up to `max_retries` times on 429, 5xx and timeouts.
         """
         self.notion_client = NotionClient(auth=notion_token)
         self.notion_database_id = database_id
+        self.notion_limiter = TokenBucket(requests_per_second)
+        self.notion_max_retries = max_retries
 
-    # def setup_google_docs(self, credentials_json: str):
-    #     """
-    #     Set up Google Docs integration with service account credentials.
-    #     """
-    #     credentials = service_account.Credentials.from_service_account_info(
-    #         credentials_json,
-    #         scopes=['https://www.googleapis.com/auth/drive.file']
-    #     )
-    #     self.google_docs_service = build('docs', 'v1', credentials=credentials)
+    def setup_google_docs(self, credentials_json, api_endpoint: Optional[str] = None, num_retries: int = 3):
+        """
+        Set up Google Docs integration with service account credentials.
 
-    async def export_to_notion(self, company_data: Dict) -> Dict:
+        `credentials_json` is the service account key as a dict, a JSON string or a file path.
+        `api_endpoint` points the client at another Docs API host, such as a local stand-in,
+        in which case credentials may be None.
         """
-        Export company research to Notion database.
+        if credentials_json is None:
+            credentials = AnonymousCredentials()
+        else:
+            if isinstance(credentials_json, str) and credentials_json.lstrip().startswith("{"):
+                credentials_json = json.loads(credentials_json)
+            elif isinstance(credentials_json, str):
+                with open(credentials_json) as f:
+                    credentials_json = json.load(f)
+            credentials = service_account.Credentials.from_service_account_info(
+                credentials_json,
+                scopes=['https://www.googleapis.com/auth/drive.file']
+            )
+        self.google_docs_credentials = credentials
+        self.google_docs_endpoint = api_endpoint
+        # googleapiclient retries 429 and 5xx responses with exponential backoff
+        self.google_docs_num_retries = num_retries
+
+    def _google_docs_service(self):
+        service = getattr(self._google_docs_local, "service", None)
+        if service is None:
+            service = self._google_docs_local.service = build(
+                'docs', 'v1',
+                credentials=self.google_docs_credentials,
+                client_options={"api_endpoint": self.google_docs_endpoint} if self.google_docs_endpoint else None,
+                cache_discovery=False
+            )
+        return service
+
+    async def close(self) -> None:
+        """
+        Close the Notion client's HTTP connections.
+        """
+        if self.notion_client:
+            await self.notion_client.aclose()
+
+    async def _notion_request(
+        self,
+        endpoint: Callable[..., Awaitable[Any]],
+        *args,
+        max_retries: Optional[int] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Call a Notion endpoint within the rate limit, backing off exponentially (or as long as
+        Retry-After asks) on retryable errors, up to `max_retries` times (default notion_max_retries).
+        """
+        max_retries = self.notion_max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            await self.notion_limiter.acquire()
+            try:
+                response = await endpoint(*args, **kwargs)
+                metrics.NOTION_REQUESTS.inc(outcome="success")
+                return response
+            except Exception as e:
+                if attempt >= max_retries or not is_retryable_notion_error(e):
+                    metrics.NOTION_REQUESTS.inc(outcome="error")
+                    raise
+                metrics.NOTION_REQUESTS.inc(outcome="retry")
+                delay = notion_retry_after(e) or backoff_delay(attempt)
+                print(f"Notion request failed ({str(e)}), retrying in {delay:.1f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    def _notion_properties(self, company_data: Dict) -> Dict:
+        """
+        Map an overview to the properties of the Notion research database.
+        """
+        funding_info = company_data.get("funding_info") or {}
+        return {
+            "Company Name": {"title": _rich_text(_company_title(company_data))},
+            "Website": {"url": company_data.get("website") or None},
+            "LinkedIn": {"url": company_data.get("linkedin") or None},
+            "Summary": {"rich_text": _rich_text(company_data.get("summary", ""))},
+            "Purpose": {"rich_text": _rich_text(company_data.get("purpose", ""))},
+            "Products": {"multi_select": [{"name": product} for product in company_data.get("products") or []]},
+            "Competitors": {"multi_select": [{"name": competitor} for competitor in company_data.get("competitors") or []]},
+            "Funding Round": {"select": {"name": funding_info["round"]} if funding_info.get("round") else None},
+            "Funding Amount": {"rich_text": _rich_text(str(funding_info.get("amount") or ""))}
+        }
+
+    def _notion_sections(self, company_data: Dict) -> List[Tuple[str, List[Dict]]]:
+        """
+        Build the page body sections: news and videos with one linked list item per entry.
+        """
+        sections = []
+        if company_data.get("news"):
+            sections.append(("Recent News", [_link_block(news, ["source", "date"]) for news in company_data["news"]]))
+        if company_data.get("videos"):
+            sections.append(("Videos", [_link_block(video, ["source", "type"]) for video in company_data["videos"]]))
+        return sections
+
+    async def create_notion_page(self, company_data: Dict, max_retries: Optional[int] = None) -> str:
+        """
+        Create the company's page in the research database with its properties only and return its id.
+        """
+        if not self.notion_client:
+            raise ValueError("Notion integration not set up")
+        response = await self._notion_request(
+            self.notion_client.pages.create,
+            parent={"database_id": self.notion_database_id},
+            properties=self._notion_properties(company_data),
+            max_retries=max_retries
+        )
+        return response["id"]
+
+    async def write_notion_page(
+        self,
+        page_id: str,
+        company_data: Dict,
+        section_block_ids: Sequence[str] = (),
+        update_properties: bool = True,
+        max_retries: Optional[int] = None
+    ) -> Dict:
+        """
+        Write an overview to an existing company page: update its properties, delete the
+        sections written by the previous export and append the new ones.
+
+        All sections go in one blocks.children.append request with up to 100 items nested
+        under each heading; longer sections get the rest appended 100 per request. Callers
+        that retry the whole write themselves pass `max_retries=0`.
         """
         if not self.notion_client:
             raise ValueError("Notion integration not set up")
+        requests = 0
+        if update_properties:
+            await self._notion_request(
+                self.notion_client.pages.update, page_id,
+                properties=self._notion_properties(company_data), max_retries=max_retries
+            )
+            requests += 1
+        for block_id in section_block_ids:
+            try:
+                await self._notion_request(self.notion_client.blocks.delete, block_id, max_retries=max_retries)
+            except HTTPResponseError as e:
+                # Already deleted by an earlier, interrupted export or by hand
+                if e.status not in (400, 404):
+                    raise
+            requests += 1
+
+        sections = self._notion_sections(company_data)
+        new_section_ids: List[str] = []
+        if sections:
+            response = await self._notion_request(
+                self.notion_client.blocks.children.append,
+                page_id,
+                children=[_section_block(title, items[:NOTION_MAX_BLOCKS_PER_REQUEST]) for title, items in sections],
+                max_retries=max_retries
+            )
+            requests += 1
+            new_section_ids = [block["id"] for block in response["results"]]
+            for section_id, (_, items) in zip(new_section_ids, sections):
+                for start in range(NOTION_MAX_BLOCKS_PER_REQUEST, len(items), NOTION_MAX_BLOCKS_PER_REQUEST):
+                    await self._notion_request(
+                        self.notion_client.blocks.children.append,
+                        section_id,
+                        children=items[start:start + NOTION_MAX_BLOCKS_PER_REQUEST],
+                        max_retries=max_retries
+                    )
+                    requests += 1
 
-        # Format the data for Notion
-        notion_data = {
-            "parent": {"database_id": self.notion_database_id},
-            "properties": {
-                "Company Name": {"title": [{"text": {"content": company_data.get("name", "")}}]},
-                "Website": {"url": company_data.get("website", "")},
-                "LinkedIn": {"url": company_data.get("linkedin", "")},
-                "Summary": {"rich_text": [{"text": {"content": company_data.get("summary", "")}}]},
-                "Purpose": {"rich_text": [{"text": {"content": company_data.get("purpose", "")}}]},
-                "Products": {"multi_select": [{"name": product} for product in company_data.get("products", [])]},
-                "Competitors": {"multi_select": [{"name": competitor} for competitor in company_data.get("competitors", [])]},
-                "Funding Round": {"select": {"name": company_data.get("funding_info", {}).get("round", "")}},
-                "Funding Amount": {"rich_text": [{"text": {"content": company_data.get("funding_info", {}).get("amount", "")}}]}
-            }
+        return {
+            "notion_page_id": page_id,
+            "section_block_ids": new_section_ids,
+            "blocks": sum(len(items) + 1 for _, items in sections),
+            "requests": requests,
         }
 
-        # Create the page in Notion
-        response = self.notion_client.pages.create(**notion_data)
-        
-        # TODO: Implement news and video integration once those features are available
-        # if company_data.get("news"):
-        #     await self._add_news_to_notion(response["id"], company_data["news"])
-        
-        # if company_data.get("videos"):
-        #     await self._add_videos_to_notion(response["id"], company_data["videos"])
-
-        return {"notion_page_id": response["id"]}
-
-    # TODO: Implement news and video integration once those features are available
-    # async def _add_news_to_notion(self, parent_page_id: str, news_items: list):
-    #     """
-    #     Add news items as child pages in Notion.
-    #     """
-    #     for news in news_items:
-    #         news_data = {
-    #             "parent": {"page_id": parent_page_id},
-    #             "properties": {
-    #                 "Title": {"title": [{"text": {"content": news.get("title", "")}}]},
-    #                 "URL": {"url": news.get("url", "")}
-    #             }
-    #         }
-    #         self.notion_client.pages.create(**news_data)
-
-    # async def _add_videos_to_notion(self, parent_page_id: str, video_items: list):
-    #     """
-    #     Add video items as child pages in Notion.
-    #     """
-    #     for video in video_items:
-    #         video_data = {
-    #             "parent": {"page_id": parent_page_id},
-    #             "properties": {
-    #                 "Title": {"title": [{"text": {"content": video.get("title", "")}}]},
-    #                 "URL": {"url": video.get("url", "")}
-    #             }
-    #         }
-    #         self.notion_client.pages.create(**video_data)
-
-    # async def export_to_google_docs(self, company_data: Dict) -> Dict:
-    #     """
-    #     Export company research to Google Docs.
-    #     """
-    #     if not self.google_docs_service:
-    #         raise ValueError("Google Docs integration not set up")
-    #
-    #     # Create a new document
-    #     document = {
-    #         'title': f"Company Research: {company_data.get('name', '')}"
-    #     }
-    #     doc = self.google_docs_service.documents().create(body=document).execute()
-    #     doc_id = doc.get('documentId')
-    #
-    #     # Format the content
-    #     content = [
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 1
-    #                 },
-    #                 'text': f"Company Research: {company_data.get('name', '')}\n\n"
-    #             }
-    #         },
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 2
-    #                 },
-    #                 'text': f"Website: {company_data.get('website', '')}\n"
-    #             }
-    #         },
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 3
-    #                 },
-    #                 'text': f"LinkedIn: {company_data.get('linkedin', '')}\n\n"
-    #             }
-    #         },
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 4
-    #                 },
-    #                 'text': f"Summary:\n{company_data.get('summary', '')}\n\n"
-    #             }
-    #         },
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 5
-    #                 },
-    #                 'text': f"Purpose:\n{company_data.get('purpose', '')}\n\n"
-    #             }
-    #         },
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 6
-    #                 },
-    #                 'text': f"Products:\n{', '.join(company_data.get('products', []))}\n\n"
-    #             }
-    #         },
-    #         {
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 7
-    #                 },
-    #                 'text': f"Competitors:\n{', '.join(company_data.get('competitors', []))}\n\n"
-    #             }
-    #         }
-    #     ]
-    #
-    #     # Add funding information if available
-    #     if company_data.get("funding_info"):
-    #         content.append({
-    #             'insertText': {
-    #                 'location': {
-    #                     'index': 8
-    #                 },
-    #                 'text': f"Funding:\nRound: {company_data['funding_info'].get('round', '')}\n"
-    #                        f"Amount: {company_data['funding_info'].get('amount', '')}\n\n"
-    #             }
-    #         })
-    #
-    #     # TODO: Implement news and video sections once those features are available
-    #     # # Add news section
-    #     # if company_data.get("news"):
-    #     #     content.append({
-    #     #         'insertText': {
-    #     #             'location': {
-    #     #                 'index': 9
-    #     #             },
-    #     #             'text': "Recent News:\n"
-    #     #         }
-    #     #     })
-    #     #     for news in company_data["news"]:
-    #     #         content.append({
-    #     #             'insertText': {
-    #     #                 'location': {
-    #     #                     'index': 10
-    #     #                 },
-    #     #                 'text': f"- {news.get('title', '')}: {news.get('url', '')}\n"
-    #     #             }
-    #     #         })
-    #
-    #     # # Add videos section
-    #     # if company_data.get("videos"):
-    #     #     content.append({
-    #     #         'insertText': {
-    #     #             'location': {
-    #     #                 'index': 11
-    #     #             },
-    #     #             'text': "\nVideos:\n"
-    #     #         }
-    #     #     })
-    #     #     for video in company_data["videos"]:
-    #     #         content.append({
-    #     #             'insertText': {
-    #     #                 'location': {
-    #     #                     'index': 12
-    #     #                 },
-    #     #                 'text': f"- {video.get('title', '')}: {video.get('url', '')}\n"
-    #     #             }
-    #     #         })
-    #
-    #     # Update the document with content
-    #     self.google_docs_service.documents().batchUpdate(
-    #         documentId=doc_id,
-    #         body={'requests': content}
-    #     ).execute()
-    #
-    #     return {"google_doc_id": doc_id} 
\ No newline at end of file
+    async def export_to_notion(self, company_data: Dict, page_id: Optional[str] = None, section_block_ids: Sequence[str] = ()) -> Dict:
+        """
+        Export company research to Notion database.
+
+        Creates the company page unless `page_id` is given, in which case that page is
+        updated in place. A company with 50 news items and 50 videos takes two requests.
+        """
+        if not self.notion_client:
+            raise ValueError("Notion integration not set up")
+        if page_id is None:
+            page_id = await self.create_notion_page(company_data)
+            result = await self.write_notion_page(page_id, company_data, update_properties=False)
+            result["requests"] += 1
+            return result
+        return await self.write_notion_page(page_id, company_data, section_block_ids)
+
+    def _export_to_google_docs(self, company_data: Dict) -> Dict:
+        documents = self._google_docs_service().documents()
+        title = _company_title(company_data)
+        doc = documents.create(body={'title': f"Company Research: {title}"}).execute(num_retries=self.google_docs_num_retries)
+        doc_id = doc.get('documentId')
+        metrics.GOOGLE_DOCS_REQUESTS.inc(method="create")
+
+        requests = build_document_requests(title, company_data)
+        documents.batchUpdate(documentId=doc_id, body={'requests': requests}).execute(num_retries=self.google_docs_num_retries)
+        metrics.GOOGLE_DOCS_REQUESTS.inc(method="batchUpdate")
+        return {"google_doc_id": doc_id, "requests": 2, "batch_requests": len(requests)}
+
+    async def export_to_google_docs(self, company_data: Dict) -> Dict:
+        """
+        Export company research to Google Docs.
+
+        The document is created and then written with a single batchUpdate: the whole body is
+        inserted at once and headings, bullets and links are styled at offsets computed from
+        that text, so every export takes two API requests however long the overview is.
+        """
+        if not self.google_docs_credentials:
+            raise ValueError("Google Docs integration not set up")
+        # googleapiclient is synchronous; keep its round trips off the event loop
+        return await asyncio.to_thread(self._export_to_google_docs, company_data)
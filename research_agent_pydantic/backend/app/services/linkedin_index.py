@@ -0,0 +1,150 @@
+from typing import Dict, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.services.website_discovery import normalize_company_name
+
+#Persistent index of company names to LinkedIn entities
+class LinkedInEntityIndex:
+    """
+    SQLite-backed map from normalized company name to LinkedIn `entity_id`, plus a TTL'd
+    cache of the company content dict extracted from `get_company`.
+
+    A known name skips `search_companies`; fresh content skips `get_company` as well.
+    Entity ids rarely change, so they do not expire; the content does.
+    """
+
+    def __init__(self, path: str, content_ttl_seconds: float = 7 * 86400.0):
+        self.content_ttl_seconds = content_ttl_seconds
+        self.index_hits = 0
+        self.index_misses = 0
+        self.content_hits = 0
+        self.content_misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS linkedin_entities ("
+            "name TEXT PRIMARY KEY, entity_id TEXT NOT NULL, updated_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS linkedin_content ("
+            "entity_id TEXT PRIMARY KEY, content TEXT NOT NULL, fetched_at REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(company_name: str) -> str:
+        """
+        Normalize a company name to its lowercase alphanumeric form.
+        """
+        return normalize_company_name(company_name)
+
+    def stats(self) -> Dict:
+        """
+        Return index and content cache counters.
+        """
+        with self._lock:
+            entities = self._conn.execute("SELECT COUNT(*) FROM linkedin_entities").fetchone()[0]
+        return {
+            "entities": entities,
+            "index_hits": self.index_hits,
+            "index_misses": self.index_misses,
+            "content_hits": self.content_hits,
+            "content_misses": self.content_misses,
+        }
+
+    def _get_entity_id(self, company_name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entity_id FROM linkedin_entities WHERE name = ?", (self.normalize(company_name),)
+            ).fetchone()
+        if row is None:
+            self.index_misses += 1
+            return None
+        self.index_hits += 1
+        return row[0]
+
+    def _set_entity_id(self, company_name: str, entity_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO linkedin_entities VALUES (?, ?, ?)",
+                (self.normalize(company_name), str(entity_id), time.time())
+            )
+            self._conn.commit()
+
+    def _get_content(self, entity_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, fetched_at FROM linkedin_content WHERE entity_id = ?", (str(entity_id),)
+            ).fetchone()
+        if row is None or time.time() - row[1] >= self.content_ttl_seconds:
+            self.content_misses += 1
+            return None
+        self.content_hits += 1
+        return json.loads(row[0])
+
+    def _set_content(self, entity_id: str, content: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO linkedin_content VALUES (?, ?, ?)",
+                (str(entity_id), json.dumps(content), time.time())
+            )
+            self._conn.commit()
+
+    async def get_entity_id(self, company_name: str) -> Optional[str]:
+        """
+        Return the indexed entity id for a company name, or None.
+        """
+        return await asyncio.to_thread(self._get_entity_id, company_name)
+
+    async def set_entity_id(self, company_name: str, entity_id: str) -> None:
+        """
+        Record the entity id for a company name.
+        """
+        await asyncio.to_thread(self._set_entity_id, company_name, entity_id)
+
+    async def get_content(self, entity_id: str) -> Optional[Dict]:
+        """
+        Return cached company content for an entity if it is younger than the TTL.
+        """
+        return await asyncio.to_thread(self._get_content, entity_id)
+
+    async def set_content(self, entity_id: str, content: Dict) -> None:
+        """
+        Cache the extracted company content for an entity.
+        """
+        await asyncio.to_thread(self._set_content, entity_id, content)
+
+    def export(self) -> Dict[str, str]:
+        """
+        Export the whole name to entity id index.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT name, entity_id FROM linkedin_entities ORDER BY name").fetchall()
+        return {name: entity_id for name, entity_id in rows}
+
+    def load(self, entries: Dict[str, str]) -> int:
+        """
+        Bulk load company name to entity id pairs in one transaction, returning how many were written.
+        """
+        now = time.time()
+        rows = [(self.normalize(name), str(entity_id), now) for name, entity_id in entries.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO linkedin_entities VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
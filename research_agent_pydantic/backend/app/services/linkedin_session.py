@@ -0,0 +1,168 @@
+from typing import Any, Optional, Tuple
+from contextlib import contextmanager
+import asyncio
+import json
+import os
+import time
+
+from linkedin_api import Linkedin
+from linkedin_api.cookie_repository import LinkedinSessionExpired
+import requests
+
+from app.services.bounded_executor import BoundedExecutor
+from app.services import tracing
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms fall back to in-process locking only
+    fcntl = None
+
+class LinkedInCredentialsError(ValueError):
+    """Raised when no LinkedIn credentials are configured"""
+
+#Defines where LinkedIn credentials come from without prompting
+class LinkedInCredentialProvider:
+    """
+    Resolve LinkedIn credentials from settings or a JSON secrets file.
+
+    Explicit values win; otherwise the secrets file is read and must contain
+    "email" and "password" keys.
+    """
+
+    def __init__(self, email: Optional[str] = None, password: Optional[str] = None, secrets_file: Optional[str] = None):
+        self.email = email
+        self.password = password
+        self.secrets_file = secrets_file
+
+    def configured(self) -> bool:
+        """
+        Check whether credentials are set or a secrets file exists, without reading it.
+        """
+        return bool(self.email and self.password) or bool(self.secrets_file and os.path.exists(self.secrets_file))
+
+    def get(self) -> Tuple[str, str]:
+        """
+        Return the configured (email, password) pair.
+        """
+        email, password = self.email, self.password
+        if not (email and password) and self.secrets_file and os.path.exists(self.secrets_file):
+            with open(self.secrets_file) as f:
+                secrets = json.load(f)
+            email = email or secrets.get("email")
+            password = password or secrets.get("password")
+        if not (email and password):
+            raise LinkedInCredentialsError(
+                "LinkedIn credentials are not configured, set LINKEDIN_EMAIL and LINKEDIN_PASSWORD "
+                "or LINKEDIN_SECRETS_FILE"
+            )
+        return email.strip(), password
+
+#Defines a shared LinkedIn session that persists cookies and re-logs in once on expiry
+class LinkedInSessionManager:
+    """
+    Own the process-wide LinkedIn client.
+
+    Session cookies are persisted by linkedin_api's cookie repository under `cookies_dir`,
+    so new processes and other workers reuse a valid session instead of logging in.
+    Logins are serialized with an asyncio lock inside the process and a file lock across
+    processes; callers that hit an expired session all wait for the same single re-login.
+    """
+
+    def __init__(self, credentials: LinkedInCredentialProvider, executor: BoundedExecutor, cookies_dir: str = ".cache/linkedin/"):
+        self.credentials = credentials
+        self.executor = executor
+        self.cookies_dir = os.path.join(cookies_dir, "")
+        self.logins = 0
+        self._client: Optional[Linkedin] = None
+        self._client_created_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @contextmanager
+    def _process_lock(self):
+        """
+        Hold an exclusive file lock so only one worker process logs in at a time.
+        """
+        os.makedirs(self.cookies_dir, exist_ok=True)
+        with open(os.path.join(self.cookies_dir, ".login.lock"), "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _login(self, stale_since: Optional[float]) -> Linkedin:
+        """
+        Build an authenticated client.
+
+        Persisted cookies are reused on first load, or on re-login when another process
+        saved them after our session went stale; otherwise a fresh login is forced and counted.
+        """
+        email, password = self.credentials.get()
+        with self._process_lock():
+            cookies_path = f"{self.cookies_dir}{email}.jr"
+            # Without saved cookies linkedin_api logs in itself, so that case takes the counted path
+            reusable = os.path.exists(cookies_path) and (
+                stale_since is None or os.path.getmtime(cookies_path) > stale_since
+            )
+            if reusable:
+                try:
+                    return Linkedin(email, password, cookies_dir=self.cookies_dir)
+                except LinkedinSessionExpired:
+                    pass
+            self.logins += 1
+            return Linkedin(email, password, refresh_cookies=True, cookies_dir=self.cookies_dir)
+
+    async def get_client(self) -> Linkedin:
+        """
+        Return the shared client, loading the persisted session or logging in on first use.
+        """
+        if self._client is not None:
+            return self._client
+        async with self._lock:
+            if self._client is None:
+                self._client = await self.executor.run(self._login, None)
+                self._client_created_at = time.time()
+            return self._client
+
+    async def relogin(self, stale_client: Linkedin) -> Linkedin:
+        """
+        Replace an expired client. Only the first caller for a given stale client logs in.
+        """
+        async with self._lock:
+            if self._client is stale_client or self._client is None:
+                self._client = await self.executor.run(self._login, self._client_created_at)
+                self._client_created_at = time.time()
+            return self._client
+
+    @staticmethod
+    def is_session_error(error: Exception) -> bool:
+        """
+        Check if an error from the LinkedIn client means the session is no longer valid.
+        """
+        if isinstance(error, (LinkedinSessionExpired, requests.exceptions.JSONDecodeError)):
+            return True
+        response = getattr(error, "response", None)
+        return response is not None and response.status_code in (401, 403)
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Call a LinkedIn client method on the executor, re-logging in once if the session expired.
+        """
+        with tracing.tracer.span(f"linkedin.{method}", retries=0) as span:
+            client = await self.get_client()
+            try:
+                return await self.executor.run(getattr(client, method), *args, **kwargs)
+            except Exception as e:
+                if not self.is_session_error(e):
+                    raise
+            span.set(retries=1)
+            client = await self.relogin(client)
+            return await self.executor.run(getattr(client, method), *args, **kwargs)
+
+    def clear(self) -> None:
+        """
+        Drop the in-memory client; persisted cookies stay on disk for the next process.
+        """
+        self._client = None
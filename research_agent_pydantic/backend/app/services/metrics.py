@@ -0,0 +1,296 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Tuple
+import functools
+import math
+import threading
+import time
+
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+# Latency buckets in seconds, wide enough for whole agent runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Token count buckets for a single agent run
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+_INF_BOUND = 'le="+Inf"'
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+#Base class of a labelled metric family
+class _Metric(ABC):
+    """A metric family with a fixed set of label names"""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """
+        Return the sample lines of every label combination.
+        """
+
+    def render(self) -> str:
+        """
+        Render the family in Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+#Monotonically increasing counter
+class Counter(_Metric):
+    """Counter metric"""
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """
+        Return a copy of the current value of every label combination.
+        """
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+#Gauge whose value is read from a callback at scrape time
+class CallbackGauge(_Metric):
+    """Gauge metric sampled from a function returning {label values: value}"""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def _samples(self) -> List[str]:
+        try:
+            items = sorted(self.collect().items())
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {str(e)}")
+            return []
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+#Cumulative histogram
+class Histogram(_Metric):
+    """Histogram metric with fixed upper bounds"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}) for key, s in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, _INF_BOUND)} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state['count']}")
+        return lines
+
+#Holds the metric families of this process
+class MetricsRegistry:
+    """In-process metrics registry rendered as Prometheus text, no metrics server needed"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add a metric family, replacing any previous family of the same name.
+        """
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, labels: Iterable[str], collect: Callable[[], Dict[Tuple[str, ...], float]]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, labels, collect))
+
+    def render(self) -> str:
+        """
+        Render all families in Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Prometheus text exposition content type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "research_http_requests_total", "API requests served.", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "research_http_request_duration_seconds", "API request latency until response headers are sent.", ("method", "route")
+)
+AGENT_RUNS = REGISTRY.counter(
+    "research_agent_runs_total", "Research agent runs.", ("mode", "pregather", "outcome")
+)
+AGENT_RUN_DURATION = REGISTRY.histogram(
+    "research_agent_run_duration_seconds", "Research agent run duration.", ("mode", "pregather")
+)
+TOOL_CALLS = REGISTRY.counter(
+    "research_tool_calls_total", "Agent tool calls.", ("tool", "status")
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "research_tool_duration_seconds", "Agent tool call latency.", ("tool",)
+)
+MODEL_REQUESTS = REGISTRY.counter(
+    "research_model_requests_total", "Model requests.", ("model", "streamed", "outcome")
+)
+MODEL_REQUEST_DURATION = REGISTRY.histogram(
+    "research_model_request_duration_seconds", "Model request latency, to the end of the stream for streamed requests.", ("model", "streamed")
+)
+MODEL_TOKENS = REGISTRY.counter(
+    "research_model_tokens_total", "Model tokens used by agent runs.", ("model", "type")
+)
+RUN_TOKENS = REGISTRY.histogram(
+    "research_agent_run_tokens", "Model tokens used per agent run.", ("model", "type"), TOKEN_BUCKETS
+)
+RUN_COMPRESSION_SAVED_TOKENS = REGISTRY.histogram(
+    "research_agent_run_compression_saved_tokens", "Estimated tokens saved per agent run by compressing scraped text.",
+    ("mode",), TOKEN_BUCKETS
+)
+FETCHES = REGISTRY.counter(
+    "research_fetches_total", "Website fetches by result.", ("source", "result")
+)
+FETCH_BYTES = REGISTRY.counter(
+    "research_fetch_bytes_total", "Website body bytes read.", ("source",)
+)
+WEBSITE_DISCOVERY = REGISTRY.counter(
+    "research_website_discovery_total", "Website discovery attempts by strategy and result.", ("strategy", "result")
+)
+RESEARCH_CACHE_LOOKUPS = REGISTRY.counter(
+    "research_cache_lookups_total", "Research result cache lookups.", ("status",)
+)
+NEWS_FETCHES = REGISTRY.counter(
+    "research_news_fetches_total", "News feed and newsroom fetches by result: ok, not_modified, not_found or error.", ("result",)
+)
+RESEARCH_REFRESHES = REGISTRY.counter(
+    "research_refreshes_total", "Incremental refreshes by result: unchanged, partial or full.", ("result",)
+)
+NOTION_REQUESTS = REGISTRY.counter(
+    "research_notion_requests_total", "Notion API requests by outcome.", ("outcome",)
+)
+GOOGLE_DOCS_REQUESTS = REGISTRY.counter(
+    "research_google_docs_requests_total", "Google Docs API requests by method.", ("method",)
+)
+
+def record_usage(model_name: str, usage) -> None:
+    """
+    Record prompt and completion tokens of a finished run from its usage.
+    """
+    for token_type, tokens in (("prompt", usage.request_tokens), ("completion", usage.response_tokens)):
+        if tokens:
+            MODEL_TOKENS.inc(tokens, model=model_name, type=token_type)
+            RUN_TOKENS.observe(tokens, model=model_name, type=token_type)
+
+def instrument_tool(name: str, function: Callable) -> Callable:
+    """
+    Wrap an async tool function to count calls by returned status and time them.
+    """
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = "exception"
+        try:
+            result = await function(*args, **kwargs)
+            status = result.get("status", "success") if isinstance(result, dict) else "success"
+            return result
+        finally:
+            TOOL_CALLS.inc(tool=name, status=status)
+            TOOL_DURATION.observe(time.perf_counter() - start, tool=name)
+    return wrapper
+
+#Model wrapper that times every model request
+class MeteredModel(WrapperModel):
+    """Records the latency and outcome of each request to the wrapped model"""
+
+    def __init__(self, wrapped: Model):
+        super().__init__(wrapped)
+
+    def _record(self, streamed: str, outcome: str, start: float) -> None:
+        MODEL_REQUESTS.inc(model=self.model_name, streamed=streamed, outcome=outcome)
+        MODEL_REQUEST_DURATION.observe(time.perf_counter() - start, model=self.model_name, streamed=streamed)
+
+    async def request(self, *args: Any, **kwargs: Any):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await self.wrapped.request(*args, **kwargs)
+            outcome = "success"
+            return result
+        finally:
+            self._record("false", outcome, start)
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings, model_request_parameters) -> AsyncIterator:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            async with self.wrapped.request_stream(messages, model_settings, model_request_parameters) as response_stream:
+                yield response_stream
+            outcome = "success"
+        finally:
+            self._record("true", outcome, start)
@@ -0,0 +1,478 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, quote_plus, urlencode, urljoin, urlsplit, urlunsplit
+from xml.etree import ElementTree
+import asyncio
+import hashlib
+import html
+import re
+import time
+
+import httpx
+from pydantic import BaseModel
+
+from app.services import metrics, tracing
+from app.services.html_parsing import ParsedPage, is_backend_available, normalize_whitespace, parse_html, resolve_backend
+from app.services.web_fetcher import FetchLimits, content_type, stream_fetch
+from app.services.website_discovery import normalize_company_name
+
+# Media types of RSS and Atom documents, as served and as advertised in <link rel="alternate">
+FEED_CONTENT_TYPES = (
+    "application/rss+xml", "application/atom+xml", "application/rdf+xml",
+    "application/xml", "text/xml",
+)
+
+# Newsroom paths tried on the company website
+DEFAULT_NEWSROOM_PATHS = ("/news", "/newsroom", "/press", "/blog")
+
+# Query parameters that only track clicks and never change the article
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ocid", "cmpid"}
+
+# Dates in article URLs such as /2024/05/01/ or /2024-05/
+_URL_DATE = re.compile(r"/(20\d{2})[/-](0?[1-9]|1[0-2])(?:[/-](0?[1-9]|[12]\d|3[01]))?(?:/|$)")
+
+_TAGS = re.compile(r"<[^>]+>")
+
+# Links on a newsroom page shorter than this are navigation, not headlines
+_MIN_HEADLINE_CHARS = 15
+
+#Defines a news article gathered from a feed or newsroom page
+class NewsArticle(BaseModel):
+    """A news article about a company"""
+    title: str
+    url: str
+    source: str
+    date: Optional[datetime] = None
+    summary: Optional[str] = None
+
+def _local(tag) -> str:
+    """
+    Return an XML tag name without its namespace.
+    """
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+def _clean(value: Optional[str], limit: Optional[int] = None) -> str:
+    """
+    Strip markup and entities from feed text and collapse its whitespace.
+    """
+    text = normalize_whitespace(html.unescape(_TAGS.sub(" ", value or "")))
+    if limit and len(text) > limit:
+        text = text[:limit].rsplit(" ", 1)[0] + "…"
+    return text
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an RFC 822 (RSS) or ISO 8601 (Atom, Dublin Core) date; naive dates are taken as UTC.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize an article URL for deduplication: no scheme difference, www prefix,
+    fragment, trailing slash or tracking parameters.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit(("https", host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+def content_hash(article: NewsArticle) -> str:
+    """
+    Hash an article's normalized title and summary, equal for syndicated copies under other URLs.
+    """
+    words = " ".join(re.findall(r"\w+", f"{article.title}\n{article.summary or ''}".lower()))
+    return hashlib.sha256(words.encode("utf-8")).hexdigest()
+
+def rank_articles(articles: Sequence[NewsArticle], limit: int) -> List[NewsArticle]:
+    """
+    Order articles newest first, undated ones last, and drop later copies of the same
+    article by canonical URL or content hash.
+    """
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    ordered = sorted(articles, key=lambda article: article.date or oldest, reverse=True)
+    seen = set()
+    ranked = []
+    for article in ordered:
+        keys = (canonical_url(article.url), content_hash(article))
+        if seen.intersection(keys):
+            continue
+        seen.update(keys)
+        ranked.append(article)
+        if len(ranked) >= limit:
+            break
+    return ranked
+
+def is_http_url(url: str) -> bool:
+    """
+    Return whether a URL parses and is an absolute http(s) URL with a host.
+    """
+    try:
+        parsed = httpx.URL(url)
+    except httpx.InvalidURL:
+        return False
+    return parsed.scheme in ("http", "https") and bool(parsed.host)
+
+def _parse_xml(content: bytes):
+    """
+    Parse an XML document, recovering from broken markup with lxml when it is installed.
+    """
+    try:
+        return ElementTree.fromstring(content)
+    except ElementTree.ParseError:
+        if not is_backend_available("lxml"):
+            raise ValueError("Malformed XML document")
+        from lxml import etree
+
+        root = etree.fromstring(content, etree.XMLParser(recover=True, resolve_entities=False, no_network=True))
+        if root is None:
+            raise ValueError("Malformed XML document")
+        return root
+
+def _child(element, *names: str):
+    for child in element:
+        if _local(child.tag) in names:
+            return child
+    return None
+
+def _child_text(element, *names: str) -> str:
+    child = _child(element, *names)
+    return "".join(child.itertext()).strip() if child is not None else ""
+
+def _atom_link(entry) -> str:
+    for child in entry:
+        if _local(child.tag) == "link" and child.get("rel", "alternate") == "alternate" and child.get("href"):
+            return child.get("href")
+    return ""
+
+def _rss_link(item) -> str:
+    link = _child_text(item, "link")
+    if link:
+        return link
+    guid = _child(item, "guid")
+    if guid is not None and guid.get("isPermaLink", "true") != "false":
+        return (guid.text or "").strip()
+    return ""
+
+def parse_feed(content: bytes, feed_url: str) -> List[NewsArticle]:
+    """
+    Parse an RSS 2.0, RSS 1.0 (RDF) or Atom feed into articles with absolute URLs.
+    Raises ValueError if the document is not a feed.
+    """
+    root = _parse_xml(content)
+    kind = _local(root.tag)
+    if kind == "feed":
+        source = _clean(_child_text(root, "title")) or urlsplit(feed_url).netloc
+        entries = [
+            (entry, _atom_link(entry), _child_text(entry, "published", "updated"), _child_text(entry, "summary", "content"))
+            for entry in root if _local(entry.tag) == "entry"
+        ]
+    elif kind in ("rss", "RDF"):
+        channel = _child(root, "channel")
+        source = _clean(_child_text(channel, "title") if channel is not None else "") or urlsplit(feed_url).netloc
+        entries = [
+            (item, _rss_link(item), _child_text(item, "pubDate", "date", "published"), _child_text(item, "description", "summary"))
+            for item in root.iter() if _local(item.tag) == "item"
+        ]
+    else:
+        raise ValueError(f"Not a feed: <{kind}>")
+
+    articles = []
+    for entry, link, date, summary in entries:
+        title = _clean(_child_text(entry, "title"), 300)
+        if not title or not link:
+            continue
+        articles.append(NewsArticle(
+            title=title,
+            url=urljoin(feed_url, link.strip()),
+            source=source,
+            date=parse_date(date),
+            summary=_clean(summary, 300) or None,
+        ))
+    return articles
+
+def _join(base: str, href: str) -> Optional[str]:
+    """
+    Resolve a link against its page, or return None for a malformed one such as a broken IPv6 host.
+    """
+    try:
+        return urljoin(base, href.strip())
+    except ValueError:
+        return None
+
+def feed_links(page: ParsedPage, page_url: str) -> List[str]:
+    """
+    Return the RSS and Atom feeds a page advertises with <link rel="alternate">.
+    """
+    feeds = []
+    for link in page.attributes("link"):
+        rel = (link.get("rel") or "").lower().split()
+        media_type = (link.get("type") or "").lower().split(";")[0].strip()
+        if "alternate" in rel and media_type in FEED_CONTENT_TYPES and link.get("href"):
+            url = _join(page_url, link["href"])
+            if url and is_http_url(url):
+                feeds.append(url)
+    return list(dict.fromkeys(feeds))
+
+def newsroom_articles(page: ParsedPage, page_url: str) -> List[NewsArticle]:
+    """
+    Return the headlines a newsroom page links to: links on the same site below the
+    newsroom path whose text reads like a title, dated when the URL carries a date.
+    """
+    base = urlsplit(page_url)
+    host = base.netloc.lower().removeprefix("www.")
+    prefix = base.path.rstrip("/") + "/"
+    articles = []
+    seen = set()
+    for href, text in page.anchors():
+        url = _join(page_url, href)
+        if url is None:
+            continue
+        url = url.split("#")[0]
+        parts = urlsplit(url)
+        if parts.netloc.lower().removeprefix("www.") != host or not parts.path.startswith(prefix):
+            continue
+        if len(parts.path.rstrip("/")) <= len(prefix) or len(text) < _MIN_HEADLINE_CHARS or url in seen:
+            continue
+        seen.add(url)
+        date = None
+        match = _URL_DATE.search(parts.path)
+        if match:
+            date = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3) or 1), tzinfo=timezone.utc)
+        articles.append(NewsArticle(title=text[:300], url=url, source=host, date=date))
+    return articles
+
+#Gathers company news from feeds and newsroom pages
+class NewsGatherer:
+    """
+    Gathers recent company news from RSS/Atom feeds and company newsroom pages.
+
+    Sources are the configured feed URLs (a `{company}` placeholder is replaced with the
+    company name; feeds without one are filtered to items that mention the company), the
+    feeds the company website advertises, and its newsroom pages together with the feeds
+    they advertise. Everything is fetched concurrently with conditional GETs: validators
+    and parsed articles are kept per URL, so an unchanged feed costs a 304 and no parsing.
+    Articles are deduplicated by canonical URL and content hash, ranked newest first, and
+    the result is cached per company for `cache_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        feed_urls: Sequence[str] = (),
+        newsroom_paths: Sequence[str] = DEFAULT_NEWSROOM_PATHS,
+        max_articles: int = 20,
+        max_concurrency: int = 8,
+        cache_ttl_seconds: float = 900.0,
+        max_companies: int = 1024,
+        max_documents: int = 4096,
+        fetch_limits: Optional[FetchLimits] = None,
+        headers: Optional[Dict] = None,
+        html_parser: str = "auto"
+    ):
+        self.http_client = http_client
+        # A malformed feed URL is dropped here instead of failing every gather
+        self.feed_urls = []
+        for url in feed_urls:
+            if is_http_url(url.replace("{company}", "company")):
+                self.feed_urls.append(url)
+            else:
+                print(f"Ignoring invalid news feed URL: {url}")
+        self.newsroom_paths = list(newsroom_paths)
+        self.max_articles = max_articles
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_companies = max_companies
+        self.max_documents = max_documents
+        # Feeds and HTML newsrooms, capped well below a website fetch
+        self.fetch_limits = (fetch_limits or FetchLimits(max_bytes=1024 * 1024)).model_copy(
+            update={"allowed_content_types": FEED_CONTENT_TYPES + ("text/html", "application/xhtml+xml")}
+        )
+        self.headers = dict(headers or {})
+        self.html_parser = resolve_backend(html_parser)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Validators and parsed content per URL, for conditional GETs
+        self._documents: "OrderedDict[str, Dict]" = OrderedDict()
+        # Ranked articles per normalized company name, with the time they were gathered
+        self._results: "OrderedDict[str, Tuple[float, List[NewsArticle]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = {"ok": 0, "not_modified": 0, "not_found": 0, "error": 0}
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "companies_cached": len(self._results),
+            "documents_cached": len(self._documents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "fetches": dict(self.fetches),
+        }
+
+    def _record_fetch(self, result: str) -> None:
+        self.fetches[result] += 1
+        metrics.NEWS_FETCHES.inc(result=result)
+
+    def _parse(self, response: httpx.Response) -> Dict:
+        """
+        Parse a fetched feed into articles, or an HTML newsroom into headlines and advertised feeds.
+        """
+        url = str(response.url)
+        media_type = content_type(response)
+        if media_type in FEED_CONTENT_TYPES or response.content.lstrip()[:5] in (b"<?xml", b"<rss ", b"<feed"):
+            try:
+                return {"articles": parse_feed(response.content, url), "feeds": []}
+            except ValueError:
+                if media_type in FEED_CONTENT_TYPES:
+                    raise
+        page = parse_html(response.content, response.charset_encoding, self.html_parser)
+        return {"articles": newsroom_articles(page, url), "feeds": feed_links(page, url)}
+
+    async def _fetch(self, url: str) -> Dict:
+        """
+        Conditionally GET a feed or newsroom page and return its parsed content, reusing the
+        previous parse when the server answers 304. Failures return no content.
+        """
+        empty = {"articles": [], "feeds": []}
+        cached = self._documents.get(url)
+        headers = dict(self.headers)
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        with tracing.tracer.span("news.fetch", url=url) as span:
+            try:
+                async with self._semaphore:
+                    response = await stream_fetch(self.http_client, url, headers=headers, limits=self.fetch_limits)
+            except (httpx.HTTPError, httpx.InvalidURL, httpx.StreamError, asyncio.TimeoutError) as e:
+                # Includes URLs a page advertised that httpx cannot request, such as a broken host
+                # or a non-HTTP scheme; only this source is skipped
+                if not isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError)):
+                    print(f"Error fetching news source {url}: {type(e).__name__}: {str(e)}")
+                span.set(result="error", error=type(e).__name__)
+                self._record_fetch("error")
+                return empty
+            span.set(status=response.status_code)
+            if response.status_code == 304 and cached:
+                self._documents.move_to_end(url)
+                self._record_fetch("not_modified")
+                return cached
+            if response.status_code in (404, 410):
+                # Most sites have only some of the newsroom paths
+                self._record_fetch("not_found")
+                return empty
+            if response.status_code != 200 or not response.content:
+                self._record_fetch("error")
+                return empty
+            try:
+                document = self._parse(response)
+            except (ValueError, LookupError, SyntaxError) as e:
+                # Malformed feeds and pages with an unknown charset
+                print(f"Error parsing news source {url}: {str(e)}")
+                self._record_fetch("error")
+                return empty
+            self._record_fetch("ok")
+        etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+        if etag or last_modified:
+            self._documents[url] = {**document, "etag": etag, "last_modified": last_modified}
+            self._documents.move_to_end(url)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return document
+
+    def _configured_feeds(self, company_name: str) -> List[Tuple[str, bool]]:
+        """
+        Return each configured feed URL for a company and whether its items must mention the company.
+        """
+        feeds = []
+        for template in self.feed_urls:
+            if "{company}" in template:
+                feeds.append((template.replace("{company}", quote_plus(company_name)), False))
+            else:
+                feeds.append((template, True))
+        return feeds
+
+    async def gather(
+        self,
+        company_name: str,
+        site: Optional[Callable[[], Awaitable[Optional[Dict]]]] = None
+    ) -> List[NewsArticle]:
+        """
+        Return recent news about a company, newest first. `site` resolves the company website
+        as a dict with its "url" and advertised "feeds"; configured feeds are fetched while it runs.
+        """
+        key = normalize_company_name(company_name)
+        cached = self._results.get(key)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl_seconds:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return cached[1]
+        self.misses += 1
+
+        with tracing.tracer.span("gather_news", company_name=company_name) as span:
+            configured = self._configured_feeds(company_name)
+            tasks = [asyncio.create_task(self._fetch(url)) for url, _ in configured]
+            mentions = [mention for _, mention in configured]
+            try:
+                website = None
+                if site:
+                    try:
+                        website = await site()
+                    except Exception as e:
+                        print(f"Error finding the website for news about {company_name}: {str(e)}")
+                requested = {url for url, _ in configured}
+                newsrooms = []
+                if website and website.get("url"):
+                    sources = list(website.get("feeds") or [])
+                    newsrooms = [urljoin(website["url"], path) for path in self.newsroom_paths]
+                    for url in sources + newsrooms:
+                        if url not in requested:
+                            requested.add(url)
+                            tasks.append(asyncio.create_task(self._fetch(url)))
+                            mentions.append(False)
+                documents = list(await asyncio.gather(*tasks))
+
+                # Follow the feeds newsroom pages advertise
+                followed = [
+                    url for document in documents for url in document["feeds"] if url not in requested
+                ]
+                followed = list(dict.fromkeys(followed))
+                tasks = [asyncio.create_task(self._fetch(url)) for url in followed]
+                documents += await asyncio.gather(*tasks)
+                mentions += [False] * len(followed)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            pattern = re.compile(r"\b" + re.escape(" ".join(company_name.lower().split())) + r"\b")
+            articles = [
+                article
+                for document, mention in zip(documents, mentions)
+                for article in document["articles"]
+                if not mention or pattern.search(f"{article.title} {article.summary or ''}".lower())
+            ]
+            ranked = rank_articles(articles, self.max_articles)
+            span.set(sources=len(documents), articles=len(articles), ranked=len(ranked))
+
+        self._results[key] = (time.monotonic(), ranked)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_companies:
+            self._results.popitem(last=False)
+        return ranked
@@ -0,0 +1,337 @@
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.services.integration_service import IntegrationService, is_retryable_notion_error, notion_retry_after
+from app.services.rate_limiter import backoff_delay
+from app.services.website_discovery import normalize_company_name
+
+def notion_company_key(company_data: Dict) -> str:
+    """
+    Return the key a company's Notion page is indexed by: its normalized name, or the
+    website host when the overview has no name.
+    """
+    if company_data.get("name"):
+        key = normalize_company_name(company_data["name"])
+        if key:
+            return key
+    host = urlparse(company_data.get("website") or "").netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host:
+        return host
+    if company_data.get("linkedin"):
+        return company_data["linkedin"].rstrip("/").lower()
+    raise ValueError("Overview has no company name, website or LinkedIn URL to key its Notion page by")
+
+#Durable queue of Notion exports worked off in the background
+class NotionExportQueue:
+    """
+    SQLite-backed export queue in front of IntegrationService.
+
+    Exports are grouped into jobs that callers poll by id. Workers run them through the
+    service's rate limiter; the queue owns retries, so an export that fails with a retryable
+    error is rescheduled with exponential backoff (or Retry-After) and survives restarts. A
+    company to `notion_page_id` index makes re-exports update the existing page instead of
+    creating another one.
+
+    Several processes may share the queue file. Claims are atomic, one company is exported
+    by one worker at a time, and a running task holds a lease its worker renews; tasks whose
+    lease lapsed because their process died are picked up again by the others.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        integration_service: IntegrationService,
+        workers: int = 2,
+        max_attempts: int = 6,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 300.0,
+        poll_interval: float = 5.0,
+        lease_seconds: float = 60.0
+    ):
+        self.integration_service = integration_service
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS export_jobs (job_id TEXT PRIMARY KEY, created_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS export_tasks ("
+            "task_id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, position INTEGER, "
+            "company_key TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER DEFAULT 0, "
+            "next_attempt_at REAL, notion_page_id TEXT, error TEXT, updated_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_export_tasks_due ON export_tasks (status, next_attempt_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_export_tasks_job ON export_tasks (job_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS notion_pages ("
+            "company_key TEXT PRIMARY KEY, notion_page_id TEXT NOT NULL, section_block_ids TEXT, updated_at REAL)"
+        )
+        self._conn.commit()
+
+    def _enqueue(self, overviews: List[Dict]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        rows = [
+            (job_id, position, notion_company_key(overview), json.dumps(overview), "pending", now, now)
+            for position, overview in enumerate(overviews)
+        ]
+        with self._lock:
+            self._conn.execute("INSERT INTO export_jobs VALUES (?, ?)", (job_id, now))
+            self._conn.executemany(
+                "INSERT INTO export_tasks (job_id, position, company_key, payload, status, next_attempt_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        return job_id
+
+    def _requeue_stale(self, now: float) -> int:
+        """
+        Make running tasks whose lease lapsed pending again. Call with the lock held.
+        """
+        return self._conn.execute(
+            "UPDATE export_tasks SET status = 'pending' WHERE status = 'running' AND updated_at < ?",
+            (now - self.lease_seconds,)
+        ).rowcount
+
+    def _claim(self) -> Optional[Tuple[int, str, Dict, int]]:
+        """
+        Mark the oldest due task running, skipping companies another worker is exporting.
+        """
+        now = time.time()
+        with self._lock:
+            # Take the database write lock before reading, so no other process can claim the same
+            # task, or a task of the same company, between the select and the update
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._requeue_stale(now)
+                row = self._conn.execute(
+                    "SELECT task_id, company_key, payload, attempts FROM export_tasks "
+                    "WHERE status = 'pending' AND next_attempt_at <= ? AND company_key NOT IN "
+                    "(SELECT company_key FROM export_tasks WHERE status = 'running') "
+                    "ORDER BY next_attempt_at, task_id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE export_tasks SET status = 'running', updated_at = ? WHERE task_id = ?", (now, row[0])
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]), row[3]
+
+    def _renew(self, task_id: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE export_tasks SET updated_at = ? WHERE task_id = ? AND status = 'running'", (time.time(), task_id)
+            )
+            self._conn.commit()
+
+    def _finish(self, task_id: int, status: str, attempts: int, next_attempt_at: Optional[float] = None,
+                notion_page_id: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE export_tasks SET status = ?, attempts = ?, next_attempt_at = ?, notion_page_id = ?, "
+                "error = ?, updated_at = ? WHERE task_id = ?",
+                (status, attempts, next_attempt_at, notion_page_id, error, time.time(), task_id)
+            )
+            self._conn.commit()
+
+    def _get_page(self, company_key: str) -> Optional[Tuple[str, List[str]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT notion_page_id, section_block_ids FROM notion_pages WHERE company_key = ?", (company_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1] or "[]")
+
+    def _set_page(self, company_key: str, notion_page_id: str, section_block_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO notion_pages VALUES (?, ?, ?, ?)",
+                (company_key, notion_page_id, json.dumps(section_block_ids), time.time())
+            )
+            self._conn.commit()
+
+    def _job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._conn.execute("SELECT created_at FROM export_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT position, company_key, status, attempts, notion_page_id, error FROM export_tasks "
+                "WHERE job_id = ? ORDER BY position",
+                (job_id,)
+            ).fetchall()
+        counts = {status: 0 for status in ("pending", "running", "done", "failed")}
+        for row in rows:
+            counts[row[2]] += 1
+        if counts["pending"] or counts["running"]:
+            status = "running" if counts["running"] or counts["done"] or counts["failed"] else "pending"
+        else:
+            status = "failed" if counts["failed"] == len(rows) else "partial" if counts["failed"] else "done"
+        return {
+            "job_id": job_id,
+            "created_at": job[0],
+            "status": status,
+            "total": len(rows),
+            **counts,
+            "items": [
+                {
+                    "index": position,
+                    "company_key": company_key,
+                    "status": task_status,
+                    "attempts": attempts,
+                    "notion_page_id": notion_page_id,
+                    "error": error,
+                }
+                for position, company_key, task_status, attempts, notion_page_id, error in rows
+            ],
+        }
+
+    def stats(self) -> Dict:
+        """
+        Return task counts by status and the number of indexed company pages.
+        """
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM export_tasks GROUP BY status").fetchall())
+            pages = self._conn.execute("SELECT COUNT(*) FROM notion_pages").fetchone()[0]
+        return {
+            "tasks": {status: counts.get(status, 0) for status in ("pending", "running", "done", "failed")},
+            "pages": pages,
+        }
+
+    async def enqueue(self, overviews: List[Dict]) -> str:
+        """
+        Queue overviews for export and return the id of the job tracking them.
+        """
+        job_id = await asyncio.to_thread(self._enqueue, overviews)
+        if self._wakeup:
+            self._wakeup.set()
+        return job_id
+
+    async def job(self, job_id: str) -> Optional[Dict]:
+        """
+        Return the status of a job and each of its exports, or None for an unknown job.
+        """
+        return await asyncio.to_thread(self._job, job_id)
+
+    async def page_id(self, company_data: Dict) -> Optional[str]:
+        """
+        Return the Notion page a company was last exported to, if any.
+        """
+        page = await asyncio.to_thread(self._get_page, notion_company_key(company_data))
+        return page[0] if page else None
+
+    async def _export(self, company_key: str, company_data: Dict) -> str:
+        """
+        Export one overview, creating the company page only when the index has none.
+        """
+        page = await asyncio.to_thread(self._get_page, company_key)
+        update_properties = True
+        if page is None:
+            page_id = await self.integration_service.create_notion_page(company_data, max_retries=0)
+            # Record the page before writing its body so a retry updates it instead of creating another
+            await asyncio.to_thread(self._set_page, company_key, page_id, [])
+            page = (page_id, [])
+            update_properties = False
+        page_id, section_block_ids = page
+        result = await self.integration_service.write_notion_page(
+            page_id, company_data, section_block_ids, update_properties=update_properties, max_retries=0
+        )
+        await asyncio.to_thread(self._set_page, company_key, page_id, result["section_block_ids"])
+        return page_id
+
+    async def _keep_lease(self, task_id: int) -> None:
+        """
+        Renew a running task's lease until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self._renew, task_id)
+
+    async def _run_task(self, task_id: int, company_key: str, company_data: Dict, attempts: int) -> None:
+        attempts += 1
+        try:
+            page_id = await self._export(company_key, company_data)
+        except asyncio.CancelledError:
+            # Shutting down mid-export; run it again on the next start
+            await asyncio.to_thread(self._finish, task_id, "pending", attempts - 1, time.time())
+            raise
+        except Exception as e:
+            if attempts < self.max_attempts and is_retryable_notion_error(e):
+                delay = max(
+                    backoff_delay(attempts - 1, self.retry_base_seconds, self.retry_max_seconds),
+                    notion_retry_after(e) or 0.0
+                )
+                print(f"Notion export of {company_key} failed ({str(e)}), retrying in {delay:.0f}s")
+                await asyncio.to_thread(self._finish, task_id, "pending", attempts, time.time() + delay, error=str(e))
+            else:
+                print(f"Notion export of {company_key} failed: {str(e)}")
+                await asyncio.to_thread(self._finish, task_id, "failed", attempts, error=str(e))
+            return
+        await asyncio.to_thread(self._finish, task_id, "done", attempts, notion_page_id=page_id)
+
+    async def _work(self) -> None:
+        while True:
+            claimed = await asyncio.to_thread(self._claim)
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            lease = asyncio.create_task(self._keep_lease(claimed[0]))
+            try:
+                await self._run_task(*claimed)
+            finally:
+                lease.cancel()
+
+    def start(self) -> None:
+        """
+        Requeue exports whose worker stopped renewing their lease, such as those interrupted by
+        a crash, and start the workers on the running loop. Tasks other live processes are
+        exporting are left alone.
+        """
+        with self._lock:
+            self._requeue_stale(time.time())
+            self._conn.commit()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        """
+        Stop the workers and close the database; unfinished exports resume on the next start.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._conn.close()
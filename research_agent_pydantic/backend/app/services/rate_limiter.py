@@ -0,0 +1,42 @@
+from typing import Optional
+import asyncio
+import random
+import time
+
+#Async token bucket shared by every caller of a rate-limited API
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average with bursts of up to `capacity`.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.waits = 0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available and take it.
+        """
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.waits += 1
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Exponential backoff with full jitter for the given zero-based retry attempt.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
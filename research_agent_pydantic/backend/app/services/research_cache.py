@@ -0,0 +1,222 @@
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.models.company_agent import CompanyOverview, CompanyResearchRequest, research_request_key
+
+# Cache status values reported to callers
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+
+#Defines the storage interface used by the research result cache
+class ResearchCacheBackend(ABC):
+    """Storage backend for cached research results"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        """
+        Return the stored payload and its timestamp, or None.
+        """
+
+    @abstractmethod
+    def set(self, key: str, payload: Dict, stored_at: float) -> None:
+        """
+        Store a payload under a key.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Remove a key if present.
+        """
+
+    def close(self) -> None:
+        """
+        Release backend resources.
+        """
+
+#In-process LRU backend, fastest but private to one worker
+class InMemoryResearchCacheBackend(ResearchCacheBackend):
+    """In-process LRU research cache backend"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, payload: Dict, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (payload, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+#SQLite backend in WAL mode, shared by every uvicorn worker on the host
+class SQLiteResearchCacheBackend(ResearchCacheBackend):
+    """SQLite research cache backend shared across worker processes"""
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS research_results ("
+            "key TEXT PRIMARY KEY, payload TEXT, stored_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_research_accessed ON research_results (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at FROM research_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE research_results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, payload: Dict, stored_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_results VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload), stored_at, time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM research_results WHERE key IN ("
+                "SELECT key FROM research_results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM research_results WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+#Defines the research result cache with TTL and stale-while-revalidate
+class ResearchCache:
+    """
+    Cache of CompanyOverview results keyed on the normalized research request.
+
+    Entries younger than `ttl_seconds` are returned as hits. Entries older than that but
+    within `stale_seconds` more are returned immediately while a single background
+    refresh recomputes them. Anything older is recomputed inline.
+    """
+
+    def __init__(self, backend: ResearchCacheBackend, ttl_seconds: float = 86400.0, stale_seconds: float = 604800.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def make_key(request: CompanyResearchRequest) -> str:
+        """
+        Build a cache key from the normalized company name and additional info.
+        """
+        return research_request_key(request)
+
+    async def _load(self, key: str) -> Optional[Tuple[CompanyOverview, float]]:
+        """
+        Load a cached overview without re-running validation, the payload was validated when stored.
+        """
+        entry = await asyncio.to_thread(self.backend.get, key)
+        if entry is None:
+            return None
+        payload, stored_at = entry
+        return CompanyOverview.model_construct(**payload), stored_at
+
+    async def _store(self, key: str, overview: CompanyOverview) -> None:
+        """
+        Store an overview in the backend.
+        """
+        await asyncio.to_thread(self.backend.set, key, overview.model_dump(mode="json"), time.time())
+
+    async def lookup(self, request: CompanyResearchRequest) -> Optional[CompanyOverview]:
+        """
+        Return a fresh cached overview for the request without computing anything.
+        """
+        cached = await self._load(self.make_key(request))
+        if cached is not None and time.time() - cached[1] < self.ttl_seconds:
+            return cached[0]
+        return None
+
+    async def store(self, request: CompanyResearchRequest, overview: CompanyOverview) -> None:
+        """
+        Store an overview computed outside get_or_compute.
+        """
+        await self._store(self.make_key(request), overview)
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[CompanyOverview]]) -> None:
+        """
+        Recompute a stale entry in the background.
+        """
+        try:
+            await self._store(key, await compute())
+        except Exception as e:
+            print(f"Error refreshing cached research result: {str(e)}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def get_or_compute(
+        self,
+        request: CompanyResearchRequest,
+        compute: Callable[[], Awaitable[CompanyOverview]]
+    ) -> Tuple[CompanyOverview, str]:
+        """
+        Return a cached overview for the request, computing it when needed, plus the cache status.
+        """
+        key = self.make_key(request)
+        cached = await self._load(key)
+        if cached is not None:
+            overview, stored_at = cached
+            age = time.time() - stored_at
+            if age < self.ttl_seconds:
+                return overview, CACHE_HIT
+            if age < self.ttl_seconds + self.stale_seconds:
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._refresh(key, compute))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                return overview, CACHE_STALE
+
+        overview = await compute()
+        await self._store(key, overview)
+        return overview, CACHE_MISS
+
+    def close(self) -> None:
+        """
+        Close the underlying backend.
+        """
+        self.backend.close()
@@ -0,0 +1,203 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import os
+import threading
+
+from pydantic import BaseModel, Field
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.company_agent import CompanyOverview
+from app.models.research_run import ResearchRun
+from app.services.website_discovery import normalize_company_name
+
+# Alembic configuration of the research store schema
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+#Defines a stored research run as returned by the history endpoints
+class StoredResearchRun(BaseModel):
+    """Summary of a persisted research run"""
+    id: int
+    company_name: str
+    status: str
+    mode: str
+    pregather: bool
+    started_at: datetime
+    duration_ms: float
+    source_urls: List[str] = Field(default_factory=list)
+    timings: Dict = Field(default_factory=dict)
+    model_name: Optional[str] = None
+    model_requests: int = 0
+    request_tokens: int = 0
+    response_tokens: int = 0
+    total_tokens: int = 0
+    error: Optional[str] = None
+
+# Columns read for run summaries, leaving out the request and overview documents
+_SUMMARY_COLUMNS = [getattr(ResearchRun, name) for name in StoredResearchRun.model_fields]
+
+def run_migrations(database_url: str, revision: str = "head") -> None:
+    """
+    Upgrade the research store schema with the Alembic migrations.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    # ConfigParser treats % as interpolation, which URL-encoded passwords contain
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    command.upgrade(config, revision)
+
+#SQL store of every research run
+class ResearchStore:
+    """
+    Persists research runs to the database at DATABASE_URL.
+
+    Runs are buffered and written with one multi-row INSERT per flush, either when
+    `batch_size` runs are waiting or `flush_interval` seconds after the first one, so
+    responses never wait on the database and batch research is stored in bulk. Reads
+    build models from stored rows with model_construct, skipping validation of data
+    that was validated before it was written.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10000
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.dropped = 0
+        self.engine = create_engine(database_url, pool_pre_ping=True)
+        self._sessions = sessionmaker(self.engine, expire_on_commit=False)
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Flushes of full batches still writing; the set keeps the tasks referenced until done
+        self._batch_flushes: Set[asyncio.Task] = set()
+
+    def insert_many(self, runs: List[Dict]) -> int:
+        """
+        Insert run records in one executemany batch and return how many were written.
+        """
+        if not runs:
+            return 0
+        rows = [{**run, "normalized_name": normalize_company_name(run["company_name"])} for run in runs]
+        with self._sessions.begin() as session:
+            session.execute(insert(ResearchRun), rows)
+        self.written += len(rows)
+        return len(rows)
+
+    async def add(self, run: Dict) -> None:
+        """
+        Queue a run record for the next bulk insert.
+        """
+        with self._lock:
+            self._buffer.append(run)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            task = asyncio.create_task(self.flush())
+            self._batch_flushes.add(task)
+            task.add_done_callback(self._batch_flushes.discard)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write all buffered runs; on failure they are kept for the next flush up to `max_buffer`.
+        """
+        with self._lock:
+            runs, self._buffer = self._buffer, []
+        if not runs:
+            return 0
+        try:
+            return await asyncio.to_thread(self.insert_many, runs)
+        except Exception as e:
+            print(f"Error storing {len(runs)} research runs: {str(e)}")
+            with self._lock:
+                self._buffer = runs + self._buffer
+                overflow = len(self._buffer) - self.max_buffer
+                if overflow > 0:
+                    self._buffer = self._buffer[overflow:]
+                    self.dropped += overflow
+            return 0
+
+    def _latest(self, company_name: str) -> Optional[CompanyOverview]:
+        with self._sessions() as session:
+            overview = session.execute(
+                select(ResearchRun.overview)
+                .where(ResearchRun.normalized_name == normalize_company_name(company_name), ResearchRun.status == "success")
+                .order_by(ResearchRun.started_at.desc())
+                .limit(1)
+            ).scalar_one_or_none()
+        return CompanyOverview.model_construct(**overview) if overview else None
+
+    def _latest_sources(self, request_key: str) -> Optional[Tuple[CompanyOverview, Dict[str, str]]]:
+        with self._sessions() as session:
+            row = session.execute(
+                select(ResearchRun.overview, ResearchRun.source_hashes)
+                .where(ResearchRun.request_key == request_key, ResearchRun.status == "success")
+                .order_by(ResearchRun.started_at.desc())
+                .limit(1)
+            ).first()
+        # Runs stored before source hashing can't be compared and count as no prior run
+        if row is None or not row.overview or not row.source_hashes:
+            return None
+        return CompanyOverview.model_construct(**row.overview), row.source_hashes
+
+    def _history(self, company_name: Optional[str], since: Optional[datetime], limit: int) -> List[StoredResearchRun]:
+        query = select(*_SUMMARY_COLUMNS).order_by(ResearchRun.started_at.desc()).limit(limit)
+        if company_name:
+            query = query.where(ResearchRun.normalized_name == normalize_company_name(company_name))
+        if since:
+            query = query.where(ResearchRun.started_at >= since)
+        with self._sessions() as session:
+            rows = session.execute(query).mappings().all()
+        return [StoredResearchRun.model_construct(**row) for row in rows]
+
+    async def latest(self, company_name: str) -> Optional[CompanyOverview]:
+        """
+        Return the overview of the most recent successful run for a company, or None.
+        Buffered runs are written first.
+        """
+        await self.flush()
+        return await asyncio.to_thread(self._latest, company_name)
+
+    async def latest_sources(self, request_key: str) -> Optional[Tuple[CompanyOverview, Dict[str, str]]]:
+        """
+        Return the overview and source content hashes of the most recent successful run
+        for a research request key, or None. Buffered runs are written first.
+        """
+        await self.flush()
+        return await asyncio.to_thread(self._latest_sources, request_key)
+
+    async def history(self, company_name: Optional[str] = None, since: Optional[datetime] = None, limit: int = 50) -> List[StoredResearchRun]:
+        """
+        Return run summaries, newest first, for one company or all companies.
+        """
+        return await asyncio.to_thread(self._history, company_name, since, limit)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {"written": self.written, "buffered": buffered, "dropped": self.dropped}
+
+    async def close(self) -> None:
+        """
+        Write any buffered runs and release the connection pool.
+        """
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._batch_flushes:
+            await asyncio.gather(*self._batch_flushes)
+        await self.flush()
+        self.engine.dispose()
@@ -0,0 +1,75 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+#Tracks one in-flight call and how many requests are waiting on it
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+#Defines single-flight coalescing of concurrent identical calls
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the work as a task; later callers with the same key
+    await that task instead of starting their own. A caller that is cancelled only stops
+    waiting, the shared task keeps running for the others. When every waiter has gone
+    the task is cancelled so abandoned work does not keep running.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.cancelled_waiters = 0
+        self.abandoned = 0
+
+    def stats(self) -> Dict:
+        """
+        Return coalescing counters.
+        """
+        total = self.executed + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "cancelled_waiters": self.cancelled_waiters,
+            "abandoned": self.abandoned,
+            "coalesced_ratio": self.coalesced / total if total else 0.0,
+        }
+
+    def _forget(self, key: str, call: _Call) -> None:
+        """
+        Drop a finished or abandoned call so the next request for the key starts fresh.
+        """
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` for `key`, or join the call already in flight for it.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self._calls[key] = call
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.cancelled():
+                self.cancelled_waiters += 1
+            raise
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to receive the result
+                call.task.cancel()
+                self._forget(key, call)
+                self.abandoned += 1
@@ -0,0 +1,187 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+import functools
+import json
+import logging
+import os
+import time
+import uuid
+
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+#Defines one timed operation in a research run
+class Span:
+    """A timed operation with a parent span and attributes"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "status")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set(self, **attributes) -> None:
+        """
+        Add or replace attributes, e.g. bytes read or tokens used once they are known.
+        """
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+#Writes finished spans as JSON lines to a size-rotated file
+class JSONLSpanExporter:
+    """
+    Appends one JSON object per finished span to `path`, rotating to `path.1` ...
+    `path.N` when the file grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def export(self, span: Span) -> None:
+        record = logging.LogRecord("tracing", logging.INFO, __file__, 0, json.dumps(span.to_dict(), default=str), None, None)
+        self._handler.handle(record)
+
+    def close(self) -> None:
+        self._handler.close()
+
+# Innermost open span of the current task
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+#Creates spans and hands finished ones to the exporter
+class Tracer:
+    """Span factory; spans are only recorded once an exporter is configured"""
+
+    def __init__(self, exporter: Optional[JSONLSpanExporter] = None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Time a block as a child of the current span, or as the root of a new trace.
+        """
+        parent = _current_span.get()
+        span = Span(name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end = time.time()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A generator holding the span was resumed from another context
+                pass
+            if self.exporter:
+                try:
+                    self.exporter.export(span)
+                except Exception as e:
+                    print(f"Error exporting span {name}: {str(e)}")
+
+    def close(self) -> None:
+        if self.exporter:
+            self.exporter.close()
+            self.exporter = None
+
+tracer = Tracer()
+
+def configure(path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 5) -> Tracer:
+    """
+    Start exporting spans of this process to a rotating JSONL file.
+    """
+    tracer.close()
+    tracer.exporter = JSONLSpanExporter(path, max_bytes=max_bytes, backup_count=backup_count)
+    return tracer
+
+def current_span() -> Optional[Span]:
+    """
+    Return the innermost open span, if any.
+    """
+    return _current_span.get()
+
+def trace_tool(name: str, function: Callable) -> Callable:
+    """
+    Wrap an async tool function in a span recording the returned status.
+    """
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        with tracer.span(f"tool.{name}", tool=name) as span:
+            result = await function(*args, **kwargs)
+            if isinstance(result, dict):
+                span.set(status=result.get("status", "success"), url=result.get("url") or None)
+            return result
+    return wrapper
+
+#Model wrapper that opens a span per model request
+class TracedModel(WrapperModel):
+    """Traces each request to the wrapped model with its token usage"""
+
+    def __init__(self, wrapped: Model):
+        super().__init__(wrapped)
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        with tracer.span("model.request", model=self.model_name, streamed=False, messages=len(messages)) as span:
+            response, usage = await self.wrapped.request(messages, model_settings, model_request_parameters)
+            span.set(request_tokens=usage.request_tokens, response_tokens=usage.response_tokens)
+            return response, usage
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings, model_request_parameters) -> AsyncIterator:
+        with tracer.span("model.request", model=self.model_name, streamed=True, messages=len(messages)) as span:
+            async with self.wrapped.request_stream(messages, model_settings, model_request_parameters) as response_stream:
+                yield response_stream
+                usage = response_stream.usage()
+                span.set(request_tokens=usage.request_tokens, response_tokens=usage.response_tokens)
+
+def load_spans(path: str) -> List[Dict]:
+    """
+    Read spans from a JSONL trace file and its rotated backups, oldest first.
+    """
+    paths = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        paths.append(f"{path}.{index}")
+        index += 1
+    paths.reverse()
+    if os.path.exists(path):
+        paths.append(path)
+    spans = []
+    for file_path in paths:
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
@@ -0,0 +1,210 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urljoin, urlsplit
+import json
+import os
+import re
+
+from pydantic import BaseModel
+
+from app.services.html_parsing import ParsedPage, normalize_whitespace
+
+# Video platforms: host names, player or watch path with the video id, and the canonical watch URL
+_PLATFORMS = (
+    ("YouTube", ("youtube.com", "m.youtube.com", "youtube-nocookie.com"),
+     re.compile(r"^/(?:embed|v|shorts|live)/([\w-]{6,})"), "https://www.youtube.com/watch?v={id}"),
+    ("YouTube", ("youtu.be",), re.compile(r"^/([\w-]{6,})"), "https://www.youtube.com/watch?v={id}"),
+    ("Vimeo", ("vimeo.com", "player.vimeo.com"), re.compile(r"^/(?:video/)?(\d+)"), "https://vimeo.com/{id}"),
+    ("Wistia", ("fast.wistia.net", "fast.wistia.com", "wistia.com"),
+     re.compile(r"^/(?:embed/(?:iframe|medias)|medias)/(\w+)"), "https://fast.wistia.net/embed/iframe/{id}"),
+    ("Loom", ("loom.com",), re.compile(r"^/(?:embed|share)/(\w+)"), "https://www.loom.com/share/{id}"),
+)
+
+# Kind of video by words in its title or description, first match wins
+_VIDEO_TYPES = (
+    ("product_demo", re.compile(r"\b(?:demo|walkthrough|product tour|in action)\b", re.IGNORECASE)),
+    ("tutorial", re.compile(r"\b(?:tutorial|how to|getting started|guide)\b", re.IGNORECASE)),
+    ("webinar", re.compile(r"\b(?:webinar|keynote|livestream|conference|talk)\b", re.IGNORECASE)),
+    ("customer_story", re.compile(r"\b(?:customer|case study|testimonial|success story)\b", re.IGNORECASE)),
+    ("interview", re.compile(r"\b(?:interview|podcast|fireside)\b", re.IGNORECASE)),
+)
+
+#Defines a video found on a company page
+class VideoEntry(BaseModel):
+    """A video embedded in or described by a company page"""
+    title: str
+    url: str
+    # Platform name, or the host of a self-hosted video
+    source: str
+    # product_demo, tutorial, webinar, customer_story, interview or video
+    type: str = "video"
+    # Where on the page it was found: "schema.org", "og:video" or "embedded_player"
+    found_in: str
+    page_url: str
+    embed_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    # ISO 8601 duration as published, e.g. "PT2M30S"
+    duration: Optional[str] = None
+    upload_date: Optional[str] = None
+    description: Optional[str] = None
+
+def identify_video(url: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Return the platform, video id and canonical watch URL of a player or watch URL on a
+    known video platform, or None.
+    """
+    parts = urlsplit(url)
+    host = parts.netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if host in ("youtube.com", "m.youtube.com") and parts.path == "/watch":
+        video_id = (parse_qs(parts.query).get("v") or [""])[0]
+        return ("YouTube", video_id, f"https://www.youtube.com/watch?v={video_id}") if video_id else None
+    for platform, hosts, pattern, watch_url in _PLATFORMS:
+        if host in hosts or any(host.endswith("." + name) for name in hosts):
+            match = pattern.match(parts.path)
+            if match:
+                return platform, match.group(1), watch_url.format(id=match.group(1))
+    return None
+
+def video_type(*texts: Optional[str]) -> str:
+    """
+    Classify a video by words in its title and description.
+    """
+    text = " ".join(filter(None, texts))
+    for kind, pattern in _VIDEO_TYPES:
+        if pattern.search(text):
+            return kind
+    return "video"
+
+def _url(value) -> Optional[str]:
+    """
+    Return the first URL of a schema.org property: a string, an ImageObject or a list of either.
+    """
+    if isinstance(value, list):
+        return next(filter(None, map(_url, value)), None)
+    if isinstance(value, dict):
+        return _url(value.get("url") or value.get("contentUrl"))
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+def _text(value, limit: int = 300) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    text = normalize_whitespace(value)
+    if len(text) > limit:
+        text = text[:limit].rsplit(" ", 1)[0] + "…"
+    return text or None
+
+def _video_objects(node) -> Iterator[Dict]:
+    """
+    Yield the schema.org VideoObject nodes of a JSON-LD document, including nested and @graph ones.
+    """
+    if isinstance(node, list):
+        for item in node:
+            yield from _video_objects(item)
+    elif isinstance(node, dict):
+        types = node.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if any(isinstance(kind, str) and kind.rsplit("/", 1)[-1].rsplit(":", 1)[-1] == "VideoObject" for kind in types):
+            yield node
+        for value in node.values():
+            if isinstance(value, (list, dict)):
+                yield from _video_objects(value)
+
+def _candidate(url: str, page_url: str, found_in: str, **fields) -> Optional[Tuple[str, Dict]]:
+    """
+    Build the identity key and fields of a video at `url`, resolved against the page.
+    """
+    url = urljoin(page_url, url.strip())
+    if not url.startswith(("http://", "https://")):
+        return None
+    identity = identify_video(url)
+    if identity:
+        platform, video_id, watch_url = identity
+        key = f"{platform}:{video_id}"
+        fields = {"url": watch_url, "source": platform, "embed_url": url if url != watch_url else None, **fields}
+        if platform == "YouTube" and not fields.get("thumbnail_url"):
+            fields["thumbnail_url"] = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+        untitled = f"{platform} video {video_id}"
+    else:
+        parts = urlsplit(url)
+        key = url.split("#")[0]
+        fields = {"url": url, "source": parts.netloc.lower().removeprefix("www."), **fields}
+        untitled = os.path.basename(parts.path.rstrip("/")) or url
+    return key, {**fields, "found_in": found_in, "page_url": page_url, "untitled": untitled}
+
+def find_videos(page: ParsedPage, page_url: str, limit: int = 20) -> List[VideoEntry]:
+    """
+    Find the videos of an already parsed page without any network request: schema.org
+    VideoObject JSON-LD, og:video meta tags, and embedded players (YouTube, Vimeo, Wistia and
+    Loom iframes, <video> elements and their <source> children). Several mentions of one
+    video merge into one entry, the richest source first. Call it before text extraction,
+    which removes scripts.
+    """
+    candidates: List[Optional[Tuple[str, Dict]]] = []
+
+    for script in page.script_texts("application/ld+json"):
+        try:
+            document = json.loads(script)
+        except ValueError:
+            continue
+        for video in _video_objects(document):
+            url = _url(video.get("embedUrl")) or _url(video.get("contentUrl")) or _url(video.get("url"))
+            if url:
+                candidates.append(_candidate(
+                    url, page_url, "schema.org",
+                    title=_text(video.get("name"), 200),
+                    thumbnail_url=_url(video.get("thumbnailUrl")),
+                    duration=_text(video.get("duration"), 40),
+                    upload_date=_text(video.get("uploadDate"), 40),
+                    description=_text(video.get("description")),
+                ))
+
+    meta = {}
+    for tag in page.attributes("meta"):
+        key = (tag.get("property") or tag.get("name") or "").lower()
+        if key and tag.get("content") and key not in meta:
+            meta[key] = tag["content"]
+    og_video = meta.get("og:video:secure_url") or meta.get("og:video:url") or meta.get("og:video")
+    if og_video:
+        candidates.append(_candidate(
+            og_video, page_url, "og:video",
+            title=_text(meta.get("og:title"), 200) or _text(page.title(), 200),
+            thumbnail_url=meta.get("og:image"),
+            description=_text(meta.get("og:description")),
+        ))
+
+    for iframe in page.attributes("iframe"):
+        src = iframe.get("src") or iframe.get("data-src")
+        # Other iframes are maps, forms and ads
+        if src and identify_video(urljoin(page_url, src)):
+            candidates.append(_candidate(src, page_url, "embedded_player", title=_text(iframe.get("title"), 200)))
+    for video, sources in page.attributes_with_children("video", "source"):
+        # Players often list their files in <source> children, and lazy loaders move src to data-src
+        src = video.get("src") or video.get("data-src") or next(
+            filter(None, (source.get("src") or source.get("data-src") for source in sources)), None
+        )
+        if src:
+            candidates.append(_candidate(
+                src, page_url, "embedded_player",
+                title=_text(video.get("title") or video.get("aria-label"), 200),
+                thumbnail_url=urljoin(page_url, video["poster"]) if video.get("poster") else None,
+            ))
+
+    merged: Dict[str, Dict] = {}
+    for candidate in filter(None, candidates):
+        key, fields = candidate
+        if key in merged:
+            # Keep the first source's fields and fill in what it lacked
+            existing = merged[key]
+            for name, value in fields.items():
+                if value and not existing.get(name):
+                    existing[name] = value
+        elif len(merged) < limit:
+            merged[key] = fields
+    videos = []
+    for fields in merged.values():
+        # A title any source provided beats a name made up from the URL
+        untitled = fields.pop("untitled")
+        fields["title"] = fields.get("title") or untitled
+        videos.append(VideoEntry(**fields, type=video_type(fields["title"], fields.get("description"))))
+    return videos
@@ -0,0 +1,92 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+from pydantic import BaseModel
+import httpx
+
+# Response headers that describe the wire encoding of a body we have already decoded
+_WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+#Defines size, type and timeout limits for website fetches
+class FetchLimits(BaseModel):
+    """Limits applied to a streamed website fetch"""
+    max_bytes: int = 2 * 1024 * 1024
+    connect_timeout: float = 3.0
+    first_byte_timeout: float = 5.0
+    read_timeout: float = 5.0
+    total_timeout: float = 10.0
+    allowed_content_types: Tuple[str, ...] = ("text/html", "application/xhtml+xml")
+
+def content_type(response: httpx.Response) -> str:
+    """
+    Return the bare media type of a response, e.g. "text/html".
+    """
+    return response.headers.get("content-type", "").split(";")[0].strip().lower()
+
+async def stream_fetch(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Dict] = None,
+    limits: Optional[FetchLimits] = None
+) -> httpx.Response:
+    """
+    GET a URL as a stream, reading at most `max_bytes` of an HTML body.
+
+    Non-HTML responses are closed without reading the body. Connect, first-byte (response
+    headers), per-read and total timeouts apply separately; hitting the total deadline while
+    reading the body keeps what was read. The returned response carries the body read so far
+    and reports `truncated`, `aborted` and `bytes` in its extensions.
+    """
+    limits = limits or FetchLimits()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + limits.total_timeout
+    timeout = httpx.Timeout(
+        limits.total_timeout,
+        connect=limits.connect_timeout,
+        read=limits.read_timeout
+    )
+    request = client.build_request("GET", url, headers=headers, timeout=timeout)
+    response = await asyncio.wait_for(
+        client.send(request, stream=True, follow_redirects=True),
+        min(limits.first_byte_timeout, limits.total_timeout)
+    )
+
+    chunks: List[bytes] = []
+    size = 0
+    truncated = False
+    aborted = None
+    try:
+        media_type = content_type(response)
+        # Only a 200 body is used; error pages, unfollowed redirects and 304s are closed unread
+        if response.status_code == 200 and media_type and media_type not in limits.allowed_content_types:
+            aborted = f"content_type:{media_type}"
+        elif response.status_code == 200:
+            async def read_body() -> bool:
+                nonlocal size
+                async for chunk in response.aiter_bytes():
+                    remaining = limits.max_bytes - size
+                    if len(chunk) > remaining:
+                        chunks.append(chunk[:remaining])
+                        size += remaining
+                        return True
+                    chunks.append(chunk)
+                    size += len(chunk)
+                return False
+
+            try:
+                truncated = await asyncio.wait_for(read_body(), max(0.0, deadline - loop.time()))
+                if truncated:
+                    aborted = "max_bytes"
+            except asyncio.TimeoutError:
+                truncated = True
+                aborted = "total_timeout"
+    finally:
+        await response.aclose()
+
+    return httpx.Response(
+        response.status_code,
+        headers=[(k, v) for k, v in response.headers.multi_items() if k.lower() not in _WIRE_HEADERS],
+        content=b"".join(chunks),
+        request=httpx.Request("GET", str(response.url)),
+        extensions={"truncated": truncated, "aborted": aborted, "bytes": size},
+    )
@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional
+import asyncio
+import re
+import threading
+
+import httpx
+
+# Strategies in the order discovery tries them
+STRATEGIES = ("linkedin", "domain_probe", "ai_agent")
+
+# Domain patterns for a normalized company name, most likely first
+CANDIDATE_PATTERNS = (
+    "{name}.com", "{name}.io", "{name}.ai", "{name}.co", "{name}.net", "{name}.org",
+    "{name}.app", "get{name}.com", "{name}hq.com",
+)
+
+def normalize_company_name(company_name: str) -> str:
+    """
+    Normalize a company name to the lowercase alphanumeric form used in domain checks.
+    """
+    return re.sub(r'[^a-zA-Z0-9]', '', company_name.lower())
+
+def normalize_website(website: str) -> Optional[str]:
+    """
+    Turn a website as people write it ("acme.com", "www.acme.com/") into an absolute URL.
+    """
+    website = (website or "").strip()
+    if not website:
+        return None
+    if not website.startswith(("http://", "https://")):
+        website = "https://" + website.lstrip("/")
+    return website
+
+def candidate_urls(company_name: str, patterns=CANDIDATE_PATTERNS) -> List[str]:
+    """
+    Generate candidate homepage URLs from the normalized company name.
+    """
+    name = normalize_company_name(company_name)
+    if not name:
+        return []
+    return [f"https://{pattern.format(name=name)}" for pattern in patterns]
+
+async def _probe(client: httpx.AsyncClient, url: str, headers: Optional[Dict], timeout: float) -> Optional[str]:
+    """
+    HEAD a candidate and return the URL it finally resolves to, or None if it is not a live site.
+    """
+    try:
+        response = await client.head(url, headers=headers, timeout=timeout, follow_redirects=True)
+    except (httpx.HTTPError, asyncio.TimeoutError):
+        return None
+    # Some servers refuse HEAD but are otherwise up
+    if response.status_code < 400 or response.status_code in (403, 405, 501):
+        return str(response.url)
+    return None
+
+async def probe_websites(
+    client: httpx.AsyncClient,
+    urls: List[str],
+    headers: Optional[Dict] = None,
+    timeout: float = 3.0,
+    limit: int = 2
+) -> List[str]:
+    """
+    Probe candidate URLs concurrently with HEAD requests.
+
+    Returns up to `limit` live sites in candidate order, resolved through redirects and
+    deduplicated, without waiting on lower-ranked candidates once enough are found.
+    """
+    tasks = [asyncio.create_task(_probe(client, url, headers, timeout)) for url in urls]
+    found: List[str] = []
+    try:
+        for task in tasks:
+            resolved = await task
+            if resolved and resolved not in found:
+                found.append(resolved)
+                if len(found) >= limit:
+                    break
+    finally:
+        for task in tasks:
+            task.cancel()
+    return found
+
+#Counts how often each discovery strategy finds the company website
+class WebsiteDiscoveryStats:
+    """Per-strategy attempt and hit counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {strategy: {"attempts": 0, "hits": 0} for strategy in STRATEGIES}
+
+    def record(self, strategy: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(strategy, {"attempts": 0, "hits": 0})
+            counts["attempts"] += 1
+            counts["hits"] += int(hit)
+
+    def stats(self) -> Dict:
+        """
+        Return attempts, hits and hit rate for each strategy.
+        """
+        with self._lock:
+            return {
+                strategy: {
+                    **counts,
+                    "hit_rate": counts["hits"] / counts["attempts"] if counts["attempts"] else 0.0,
+                }
+                for strategy, counts in self._counts.items()
+            }
@@ -2,19 +2,42 @@ import streamlit as st
 import asyncio
 import os
 import sys
+import threading
 
-# Add the project root to the Python path
-project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+# Add the backend directory to the Python path so the app package resolves the same way as under uvicorn
+backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
 
-from research_agent_pydantic.backend.app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
-from pydantic_ai.models.openai import OpenAIModel
-from research_agent_pydantic.backend.app.core.config import settings
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
+from app.core.config import settings
+from app.core.dependencies import build_research_agent
 
-# Initialize the research agent
-model = OpenAIModel("gpt-4")
-research_agent = CompanyResearchAgent(model)
+@st.cache_resource
+def get_research_agent() -> CompanyResearchAgent:
+    """
+    Build the research agent and its pooled HTTP client once per process instead of on
+    every script rerun.
+    """
+    return build_research_agent(settings)
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start one event loop in a background thread for all research runs, so the pooled
+    connections of the shared client stay usable across reruns.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="research-event-loop", daemon=True).start()
+    return loop
+
+def run_async(coroutine):
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result()
+
+research_agent = get_research_agent()
 
 # Set page config
 st.set_page_config(
@@ -74,7 +97,7 @@ if st.button("Research Company", type="primary"):
                 )
                 
                 # Run research
-                result = asyncio.run(research_agent.research_company(request))
+                result = run_async(research_agent.research_company(request))
                 
                 # Display results in tabs
                 tab1, tab2, tab3, tab4 = st.tabs(["Overview", "Products & Competitors", "Funding & News", "Interview Questions"])
@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+import os
+import sys
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+# Add the backend directory to the Python path so the app package resolves
+backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+from app.models.research_run import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+def database_url() -> str:
+    """
+    Return the URL set by run_migrations, else DATABASE_URL from the environment or settings.
+    """
+    url = config.get_main_option("sqlalchemy.url") or os.environ.get("DATABASE_URL")
+    if not url:
+        from app.core.config import settings
+        url = settings.DATABASE_URL
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set")
+    return url
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        {"sqlalchemy.url": database_url()},
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        # SQLite needs batch mode to alter tables in later migrations
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,46 @@
+"""Create the research_runs table
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-06-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+JSONType = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+def upgrade() -> None:
+    op.create_table(
+        "research_runs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("company_name", sa.String(255), nullable=False),
+        sa.Column("normalized_name", sa.String(255), nullable=False),
+        sa.Column("request", JSONType, nullable=False),
+        sa.Column("overview", JSONType, nullable=True),
+        sa.Column("source_urls", JSONType, nullable=False),
+        sa.Column("mode", sa.String(16), nullable=False),
+        sa.Column("pregather", sa.Boolean(), nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.Column("timings", JSONType, nullable=False),
+        sa.Column("model_name", sa.String(100), nullable=True),
+        sa.Column("model_requests", sa.Integer(), nullable=False),
+        sa.Column("request_tokens", sa.Integer(), nullable=False),
+        sa.Column("response_tokens", sa.Integer(), nullable=False),
+        sa.Column("total_tokens", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_research_runs_normalized_name_started_at", "research_runs", ["normalized_name", "started_at"])
+    op.create_index("ix_research_runs_started_at", "research_runs", ["started_at"])
+
+def downgrade() -> None:
+    op.drop_index("ix_research_runs_started_at", table_name="research_runs")
+    op.drop_index("ix_research_runs_normalized_name_started_at", table_name="research_runs")
+    op.drop_table("research_runs")
@@ -0,0 +1,28 @@
+"""Add request keys and source content hashes to research runs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-15 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+JSONType = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+def upgrade() -> None:
+    with op.batch_alter_table("research_runs") as batch_op:
+        batch_op.add_column(sa.Column("request_key", sa.String(64), nullable=True))
+        batch_op.add_column(sa.Column("source_hashes", JSONType, nullable=True))
+    op.create_index("ix_research_runs_request_key_started_at", "research_runs", ["request_key", "started_at"])
+
+def downgrade() -> None:
+    op.drop_index("ix_research_runs_request_key_started_at", table_name="research_runs")
+    with op.batch_alter_table("research_runs") as batch_op:
+        batch_op.drop_column("source_hashes")
+        batch_op.drop_column("request_key")
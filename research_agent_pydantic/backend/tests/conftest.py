@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional, Tuple, Union
+import os
+import sys
+
+import httpx
+import pytest
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+# Add the backend directory to the Python path so the app package resolves the same way as under uvicorn
+backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+# Settings for importing the app: no OpenAI key is used, and nothing is written under .cache
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("HTTP_CACHE_ENABLED", "false")
+os.environ.setdefault("TRACING_ENABLED", "false")
+os.environ.setdefault("LINKEDIN_INDEX_PATH", "")
+os.environ.setdefault("RESEARCH_CACHE_BACKEND", "memory")
+
+from app.models.company_agent import CompanyOverview
+
+def make_overview(**fields) -> CompanyOverview:
+    """
+    Build a minimal valid overview, with `fields` overriding the defaults.
+    """
+    values = {
+        "website": "https://acme.example",
+        "linkedin": "https://www.linkedin.com/company/acme",
+        "summary": "Acme makes anvils.",
+        "purpose": "Supply roadrunner-grade equipment.",
+        "products": ["Anvil"],
+        "competitors": ["Ajax"],
+        "follow_up_questions": ["Who buys anvils?"],
+        "interview_questions": ["Why Acme?"],
+    }
+    values.update(fields)
+    return CompanyOverview(**values)
+
+@pytest.fixture
+def overview():
+    return make_overview
+
+ACME_HOME = b"""<!doctype html>
+<html><head><title>Acme Corp - Anvils and Rockets</title>
+<meta name="description" content="Acme Corp makes anvils, rockets and roadrunner-grade equipment.">
+</head><body><main><h1>Acme Corp</h1>
+<p>Acme Corp makes anvils, rockets and roadrunner-grade equipment for desert logistics.</p>
+<p>Founded in 1949, Acme ships to forty countries.</p>
+</main></body></html>
+"""
+
+#Serves fixed pages through httpx.MockTransport and records every request
+class MockSite:
+    def __init__(self, pages: Optional[Dict[str, Union[bytes, Tuple[int, Dict, bytes]]]] = None):
+        # Full URL to a body served as text/html, or to (status, headers, body)
+        self.pages = pages if pages is not None else {"https://acme.com/": ACME_HOME}
+        self.requests: List[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        url = str(request.url)
+        # Probes request bare hosts such as https://acme.com
+        page = self.pages.get(url + "/" if request.url.raw_path in (b"", b"/") and not url.endswith("/") else url)
+        if page is None:
+            return httpx.Response(404, headers={"content-type": "text/html"}, content=b"<html>Not found</html>")
+        status, headers, body = page if isinstance(page, tuple) else (200, {"content-type": "text/html; charset=utf-8"}, page)
+        return httpx.Response(status, headers=headers, content=b"" if request.method == "HEAD" else body)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    def gets(self) -> List[str]:
+        return [str(request.url) for request in self.requests if request.method == "GET"]
+
+def overview_args(**fields) -> Dict:
+    """
+    Arguments of the result tool call for a minimal overview.
+    """
+    return make_overview(**fields).model_dump(mode="json")
+
+def called_tools(messages: List[ModelMessage]) -> bool:
+    return any(isinstance(part, ToolReturnPart) for message in messages for part in message.parts)
+
+def research_model(**fields) -> FunctionModel:
+    """
+    A model that calls every research tool once and then returns an overview with `fields`.
+    Tool results it received are kept on the model as `tool_results`.
+    """
+    def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        for message in messages:
+            for part in message.parts:
+                if isinstance(part, ToolReturnPart):
+                    model.tool_results[part.tool_name] = part.content
+        if not called_tools(messages):
+            return ModelResponse([ToolCallPart(tool.name, {}) for tool in info.function_tools])
+        return ModelResponse([ToolCallPart(info.result_tools[0].name, overview_args(**fields))])
+
+    model = FunctionModel(respond)
+    model.tool_results = {}
+    return model
+
+@pytest.fixture
+def site():
+    return MockSite()
+
+@pytest.fixture
+def model():
+    return research_model
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+pytest.importorskip("uvicorn")
+pytest.importorskip("notion_client")
+
+from app import main
+from app.models.company_agent import BatchResearchRequest, CompanyResearchRequest
+from app.services.single_flight import SingleFlight
+
+#Stands in for the research agent, recording how many runs overlap
+class FakeAgent:
+    def __init__(self, overview, delay: float = 0.02, fail: str = None):
+        self.overview = overview
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def research_company(self, request: CompanyResearchRequest):
+        self.calls.append(request.company_name)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if request.company_name == self.fail:
+                raise RuntimeError(f"no data for {request.company_name}")
+            return self.overview(summary=request.company_name)
+        finally:
+            self.running -= 1
+
+@pytest.fixture
+def agent(monkeypatch, overview):
+    agent = FakeAgent(overview, fail="Broken")
+    monkeypatch.setattr(main, "research_agent", agent)
+    monkeypatch.setattr(main, "research_cache", None)
+    monkeypatch.setattr(main, "research_flight", SingleFlight())
+    return agent
+
+async def post_batch(payload: dict) -> httpx.Response:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/research/batch", json=payload)
+
+def test_batch_streams_one_line_per_item_with_bounded_concurrency(agent):
+    names = [f"Company {i}" for i in range(6)] + ["Broken"]
+    response = asyncio.run(post_batch({
+        "requests": [{"company_name": name} for name in names],
+        "concurrency": 2,
+    }))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(len(names)))
+    by_name = {line["company_name"]: line for line in lines}
+    assert by_name["Broken"]["status"] == "error"
+    assert "no data" in by_name["Broken"]["error"]
+    assert by_name["Company 3"]["status"] == "success"
+    assert by_name["Company 3"]["result"]["summary"] == "Company 3"
+    assert by_name["Company 3"]["cache"] == "BYPASS"
+    assert agent.max_running == 2
+
+def test_identical_items_share_one_run(agent):
+    response = asyncio.run(post_batch({"requests": [{"company_name": "Acme"}, {"company_name": " acme "}]}))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["status"] for line in lines] == ["success", "success"]
+    assert agent.calls == ["Acme"]
+
+def test_batch_over_the_size_limit_is_rejected(agent, monkeypatch):
+    monkeypatch.setattr(main.settings, "RESEARCH_BATCH_MAX_ITEMS", 2)
+    response = asyncio.run(post_batch({"requests": [{"company_name": f"Company {i}"} for i in range(3)]}))
+    assert response.status_code == 413
+    assert agent.calls == []
+
+def test_outstanding_items_are_cancelled_when_the_client_goes_away(agent):
+    agent.delay = 0.5
+    batch = BatchResearchRequest(requests=[CompanyResearchRequest(company_name=f"Company {i}") for i in range(4)])
+
+    async def run():
+        stream = main.stream_batch_research(batch, concurrency=4)
+        first_line = asyncio.create_task(stream.__anext__())
+        await asyncio.sleep(0.05)
+        # The client disconnects before any item finishes
+        first_line.cancel()
+        await asyncio.gather(first_line, return_exceptions=True)
+        await asyncio.sleep(0)
+        # Checked before asyncio.run cancels whatever is left over
+        return agent.running
+
+    assert asyncio.run(run()) == 0
+    assert len(agent.calls) == 4
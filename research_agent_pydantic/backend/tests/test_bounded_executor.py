@@ -0,0 +1,128 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+
+def blocker():
+    """
+    Return an event and a blocking function that waits for it, recording each call.
+    """
+    release = threading.Event()
+    calls = []
+
+    def block(name: str) -> str:
+        calls.append(name)
+        release.wait(5)
+        return name
+
+    return release, calls, block
+
+def test_calls_run_off_the_loop_and_are_counted():
+    executor = BoundedExecutor("test", max_workers=2)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        return await asyncio.gather(*(executor.run(threading.get_ident) for _ in range(3))), loop_thread
+
+    threads, loop_thread = asyncio.run(run())
+    assert loop_thread not in threads
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["queue_depth"], stats["active"]) == (3, 0, 0, 0)
+    assert stats["latency_p95"] >= 0
+    executor.shutdown()
+
+def test_errors_are_counted_and_raised():
+    executor = BoundedExecutor("test")
+
+    def fail():
+        raise ValueError("bad credentials")
+
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run(fail))
+    assert (executor.failed, executor.completed) == (1, 0)
+    executor.shutdown()
+
+def test_calls_past_the_queue_limit_are_rejected():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=2)
+    release, calls, block = blocker()
+
+    async def run():
+        running = asyncio.create_task(executor.run(block, "running"))
+        await asyncio.sleep(0.05)
+        waiting = [asyncio.create_task(executor.run(block, f"waiting {i}")) for i in range(2)]
+        await asyncio.sleep(0.05)
+        depth, active = executor.queued, executor.active
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(block, "rejected")
+        release.set()
+        return await asyncio.gather(running, *waiting), depth, active
+
+    results, depth, active = asyncio.run(run())
+    assert (depth, active) == (2, 1)
+    assert results == ["running", "waiting 0", "waiting 1"]
+    assert "rejected" not in calls
+    stats = executor.stats()
+    assert (stats["rejected"], stats["completed"], stats["queue_depth"], stats["active"]) == (1, 3, 0, 0)
+    executor.shutdown()
+
+def test_timed_out_running_call_keeps_its_thread_until_it_returns():
+    executor = BoundedExecutor("test", max_workers=1, timeout=0.05)
+    release, calls, block = blocker()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(block, "slow")
+        active_after_timeout = executor.active
+        release.set()
+        # The pool thread finishes the call on its own
+        await asyncio.sleep(0.05)
+        return active_after_timeout
+
+    assert asyncio.run(run()) == 1
+    assert (executor.timeouts, executor.active, executor.queued, executor.completed) == (1, 0, 0, 0)
+    executor.shutdown()
+
+def test_call_that_times_out_in_the_queue_never_runs():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release, calls, block = blocker()
+
+    async def run():
+        running = asyncio.create_task(executor.run(block, "running"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(block, "queued", timeout=0.05)
+        # Its queue slot is free again even though no thread picked it up
+        depth = executor.queued
+        release.set()
+        await running
+        await asyncio.sleep(0.05)
+        return depth
+
+    assert asyncio.run(run()) == 0
+    assert calls == ["running"]
+    assert (executor.timeouts, executor.completed, executor.queued) == (1, 1, 0)
+    executor.shutdown()
+
+def test_cancelled_queued_call_releases_its_slot():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release, calls, block = blocker()
+
+    async def run():
+        running = asyncio.create_task(executor.run(block, "running"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(executor.run(block, "queued"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        depth = executor.queued
+        release.set()
+        await running
+        await asyncio.sleep(0.05)
+        return depth
+
+    assert asyncio.run(run()) == 0
+    assert calls == ["running"]
+    assert (executor.failed, executor.timeouts) == (0, 0)
+    executor.shutdown()
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
+from app.services import metrics
+from app.services.content_compression import ContentCompressor, estimate_tokens, terms
+
+FILLER = [
+    f"Cookie notice number {i} explains that this site stores small files on your device to remember settings."
+    for i in range(40)
+]
+
+def test_token_estimate_counts_words_by_length_and_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Acme makes anvils.") == 5
+    assert estimate_tokens("internationalization") == 4
+
+def test_terms_drop_stopwords_and_plural_s():
+    assert terms("The anvils and the rockets of Acme") == ["anvil", "rocket", "acme"]
+
+def test_page_under_budget_is_kept_except_repeated_sentences():
+    compressor = ContentCompressor(token_budget=1000)
+    blocks = ["Acme makes anvils.", "Subscribe to our newsletter.", "Acme ships worldwide.", "Subscribe to our newsletter."]
+    result = compressor.compress(" ".join(blocks), blocks, "Acme")
+    assert result.text == "Acme makes anvils. Subscribe to our newsletter. Acme ships worldwide."
+    assert result.duplicates_removed == 1
+    assert result.passages_kept == result.passages_total
+    assert result.saved_tokens == estimate_tokens("Subscribe to our newsletter.")
+
+def test_page_over_budget_fits_the_budget_and_keeps_relevant_passages_in_order():
+    compressor = ContentCompressor(token_budget=120, passage_tokens=40)
+    product = "Acme Corp products include the Anvil 3000 and rocket skates for desert logistics customers."
+    pricing = "Pricing for the Anvil 3000 starts at 499 dollars with volume discounts for enterprise customers."
+    funding = "Acme raised a 40 million dollar Series B from Roadrunner Ventures and other investors."
+    blocks = FILLER[:15] + [product] + FILLER[15:30] + [pricing] + FILLER[30:] + [funding]
+    original = " ".join(blocks)
+
+    result = compressor.compress(original, blocks, "Acme Corp", additional_info="pricing")
+    assert result.tokens <= 120 < estimate_tokens(original)
+    assert result.passages_kept < result.passages_total
+    for passage in (product, pricing, funding):
+        assert passage in result.text
+    # Kept passages stay in document order
+    assert result.text.index(product) < result.text.index(pricing) < result.text.index(funding)
+    assert result.saved_tokens == result.original_tokens - result.tokens
+
+def test_passage_larger_than_the_budget_is_skipped_for_smaller_ones():
+    compressor = ContentCompressor(token_budget=30, passage_tokens=200)
+    huge = " ".join(f"Acme pricing plan {i} suits another customer segment." for i in range(10))
+    small = "Acme pricing starts at 499 dollars."
+    result = compressor.compress(huge + "\n" + small, [huge, small], "Acme", additional_info="pricing")
+    assert result.text == small
+    assert result.tokens <= 30
+
+def test_stats_accumulate_across_pages():
+    compressor = ContentCompressor(token_budget=40, passage_tokens=20)
+    first = compressor.compress(" ".join(FILLER), FILLER, "Acme")
+    second = compressor.compress("Acme makes anvils.", ["Acme makes anvils."], "Acme")
+    stats = compressor.stats()
+    assert stats["compressions"] == 2
+    assert stats["original_tokens"] == first.original_tokens + second.original_tokens
+    assert stats["saved_tokens"] == first.saved_tokens + second.saved_tokens
+    assert 0 < stats["saved_ratio"] < 1
+
+def test_fragments_without_words_are_not_counted_as_repeats():
+    compressor = ContentCompressor(token_budget=1000)
+    blocks = ["Acme makes anvils.", "—", "…", "Acme makes anvils."]
+    result = compressor.compress(" ".join(blocks), blocks, "Acme")
+    assert result.text == "Acme makes anvils."
+    assert result.duplicates_removed == 1
+
+def test_research_run_records_compression_savings(site, model):
+    research_model = model()
+    agent = CompanyResearchAgent(
+        research_model, http_client=site.client(), content_compressor=ContentCompressor(token_budget=10, passage_tokens=10)
+    )
+    before = dict(metrics.RUN_COMPRESSION_SAVED_TOKENS._values.get(("run",), {"count": 0, "sum": 0.0}))
+    asyncio.run(agent.research_company(CompanyResearchRequest(company_name="Acme")))
+
+    saved = research_model.tool_results["scrape_company_website"]["compression"]["saved_tokens"]
+    assert saved > 0
+    state = metrics.RUN_COMPRESSION_SAVED_TOKENS._values[("run",)]
+    assert (state["count"], state["sum"]) == (before["count"] + 1, before["sum"] + saved)
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from app.services.google_docs import DocumentBuilder, build_document_requests, utf16_length
+
+scripts_root = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+if scripts_root not in sys.path:
+    sys.path.insert(0, scripts_root)
+
+def units(text: str, range_: dict) -> str:
+    """
+    Return the text a Docs API range covers in a body starting at index 1.
+    """
+    return text.encode("utf-16-le")[(range_["startIndex"] - 1) * 2:(range_["endIndex"] - 1) * 2].decode("utf-16-le")
+
+def overview() -> dict:
+    return {
+        "name": "Acme 🚀 Rockets",
+        "website": "https://acme.example",
+        "linkedin": "https://www.linkedin.com/company/acme",
+        "summary": "Acme builds rockets 🚀🛰️ and anvils.\nShips worldwide.",
+        "products": ["Anvil 3000", "Rocket skates 🛼"],
+        "news": [
+            {"title": "Acme raises $40M 💰", "url": "https://news.example/acme/1", "source": "Example News", "date": "2026-05-01"},
+            {"title": "Café opening ☕ at HQ", "url": "https://news.example/acme/2"},
+        ],
+        "videos": [
+            {"title": "Rocket skates 🛼 demo", "url": "https://video.example/watch?v=1", "source": "YouTube", "type": "product_demo"},
+        ],
+        "follow_up_questions": ["Who buys 🚀?"],
+    }
+
+HEADINGS = [
+    ("Company Research: Acme 🚀 Rockets\n", "TITLE"),
+    ("Summary\n", "HEADING_2"),
+    ("Products\n", "HEADING_2"),
+    ("Recent News\n", "HEADING_2"),
+    ("Videos\n", "HEADING_2"),
+    ("Follow-up Questions\n", "HEADING_2"),
+]
+
+LINKS = [
+    ("https://acme.example", "https://acme.example"),
+    ("https://www.linkedin.com/company/acme", "https://www.linkedin.com/company/acme"),
+    ("Acme raises $40M 💰", "https://news.example/acme/1"),
+    ("Café opening ☕ at HQ", "https://news.example/acme/2"),
+    ("Rocket skates 🛼 demo", "https://video.example/watch?v=1"),
+]
+
+def test_emoji_count_as_two_index_units():
+    assert utf16_length("🚀") == 2
+    assert utf16_length("café") == 4
+
+def test_style_ranges_cover_their_text_in_utf16_units():
+    requests = build_document_requests("Acme 🚀 Rockets", overview())
+    text = requests[0]["insertText"]["text"]
+    assert requests[0]["insertText"]["location"] == {"index": 1}
+    # Nothing after the insert changes the text
+    assert all("insertText" not in request for request in requests[1:])
+
+    headings = [request["updateParagraphStyle"] for request in requests if "updateParagraphStyle" in request]
+    assert [(units(text, heading["range"]), heading["paragraphStyle"]["namedStyleType"]) for heading in headings] == HEADINGS
+    links = [request["updateTextStyle"] for request in requests if "updateTextStyle" in request]
+    assert [(units(text, link["range"]), link["textStyle"]["link"]["url"]) for link in links] == LINKS
+    bullets = [units(text, request["createParagraphBullets"]["range"]) for request in requests if "createParagraphBullets" in request]
+    assert bullets == [
+        "Anvil 3000\nRocket skates 🛼\n",
+        "Acme raises $40M 💰 (Example News · 2026-05-01)\nCafé opening ☕ at HQ\n",
+        "Rocket skates 🛼 demo (YouTube · product_demo)\n",
+        "Who buys 🚀?\n",
+    ]
+
+def test_builder_drops_control_characters_and_empty_entries():
+    doc = DocumentBuilder()
+    doc.heading("Line\none\x07")
+    doc.bullet("", url=None)
+    doc.labeled_link("Website", "")
+    doc.paragraph("\n\n")
+    assert doc.text() == "Line one\n"
+
+def test_export_writes_the_document_in_two_requests():
+    pytest.importorskip("notion_client")
+    pytest.importorskip("googleapiclient")
+    import google_docs_standin
+
+    from app.services.integration_service import IntegrationService
+
+    server = google_docs_standin.start()
+    try:
+        service = IntegrationService()
+        service.setup_google_docs(None, api_endpoint=f"http://127.0.0.1:{server.server_address[1]}/")
+        result = asyncio.run(service.export_to_google_docs(overview()))
+        document = server.documents[result["google_doc_id"]].to_dict()
+    finally:
+        server.shutdown()
+
+    assert document["apiRequests"] == {"create": 1, "get": 0, "batchUpdate": 1}
+    assert document["title"] == "Company Research: Acme 🚀 Rockets"
+    # The stand-in recomputes every range against its own UTF-16 body
+    assert [(style["text"], style["namedStyleType"]) for style in document["paragraphStyles"]] == HEADINGS
+    assert [(link["text"], link["url"]) for link in document["links"]] == LINKS
+    assert google_docs_standin.check_document(document) == []
@@ -0,0 +1,49 @@
+import glob
+import os
+
+import pytest
+
+from app.services.html_parsing import LxmlPage, ParsedPage, SoupPage, is_backend_available, parse_html
+
+pytestmark = pytest.mark.skipif(not is_backend_available("lxml"), reason="lxml is not installed")
+
+CORPUS = sorted(glob.glob(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "benchmarks", "corpus", "*.html"
+)))
+
+CHROME_PAGE = b"""<!doctype html><html><head><title>Acme</title><style>p { color: red }</style></head>
+<body><nav><a href="/">Home</a> <a href="/pricing">Pricing</a></nav>
+<div id="cookie-banner">We use cookies. <button>Accept</button></div>
+<main><h1>Acme Corp</h1><p>Acme makes <b>anvils</b>,&nbsp;rockets and <a href="/skates">rocket skates</a>.</p>
+<ul><li>Founded 1949</li><li>Ships worldwide<br>to forty countries</li></ul>
+<script>window.tracking = true;</script><table><tr><td>Anvil</td><td>$499</td></tr></table></main>
+<footer class="site-footer">Copyright Acme <a href="/legal">Legal</a></footer></body></html>
+"""
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+PAGES = {**{os.path.basename(path): read(path) for path in CORPUS}, "chrome": CHROME_PAGE, "empty": b""}
+
+@pytest.mark.parametrize("content", PAGES.values(), ids=list(PAGES))
+def test_backends_extract_the_same_text_blocks_and_links(content):
+    # blocks() prunes the tree, so each accessor gets its own parse
+    for extract in (lambda page: page.text(), lambda page: page.blocks(), lambda page: page.anchors()):
+        soup, lxml = SoupPage(content), LxmlPage(content)
+        assert extract(soup) == extract(lxml)
+
+def test_blocks_drop_page_chrome():
+    assert parse_html(CHROME_PAGE, "utf-8", "lxml").blocks() == [
+        "Acme Corp",
+        "Acme makes anvils,\xa0rockets and rocket skates.",
+        "Founded 1949",
+        "Ships worldwide",
+        "to forty countries",
+        "Anvil",
+        "$499",
+    ]
+
+def test_parsed_page_is_abstract():
+    with pytest.raises(TypeError):
+        ParsedPage()
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from app.services.http_cache import HTTPResponseCache
+
+HTML = {"content-type": "text/html; charset=utf-8"}
+
+#Origin server that answers conditional requests and records the headers it saw
+class Origin:
+    def __init__(self, bodies=None, etag='"v1"', last_modified="Tue, 03 Mar 2026 10:00:00 GMT"):
+        self.bodies = bodies or {}
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.etag and request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        headers = {**HTML, "etag": self.etag or "", "last-modified": self.last_modified or ""}
+        headers = {k: v for k, v in headers.items() if v}
+        body = self.bodies.get(str(request.url), b"<html>Acme</html>")
+        return httpx.Response(200, headers=headers, content=body)
+
+    def fetch(self, cache: HTTPResponseCache, *urls: str):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(self.handler)) as client:
+                async def get(url):
+                    return await cache.get(url, {"User-Agent": "test"}, lambda headers: client.get(url, headers=headers))
+                return [await get(url) for url in urls]
+        return asyncio.run(run())
+
+def test_fresh_hit_makes_no_request(tmp_path):
+    cache = HTTPResponseCache(str(tmp_path / "http.sqlite3"), ttl_seconds=60)
+    origin = Origin()
+    first, second = origin.fetch(cache, "https://acme.com/", "https://acme.com/")
+    assert len(origin.requests) == 1
+    assert second.content == first.content == b"<html>Acme</html>"
+    assert second.extensions["from_cache"] is True
+    assert second.headers["etag"] == '"v1"'
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["revalidations"]) == (1, 1, 0)
+    assert stats["hit_ratio"] == 0.5
+    cache.close()
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "http.sqlite3")
+    origin = Origin()
+    writer = HTTPResponseCache(path, ttl_seconds=60)
+    origin.fetch(writer, "https://acme.com/")
+    writer.close()
+
+    reader = HTTPResponseCache(path, ttl_seconds=60)
+    (response,) = origin.fetch(reader, "https://acme.com/")
+    assert len(origin.requests) == 1
+    assert response.content == b"<html>Acme</html>"
+    reader.close()
+
+def test_stale_entry_is_revalidated_and_served_on_304(tmp_path):
+    cache = HTTPResponseCache(str(tmp_path / "http.sqlite3"), ttl_seconds=0)
+    origin = Origin()
+    first, second = origin.fetch(cache, "https://acme.com/", "https://acme.com/")
+    conditional = origin.requests[1].headers
+    assert conditional["if-none-match"] == '"v1"'
+    assert conditional["if-modified-since"] == "Tue, 03 Mar 2026 10:00:00 GMT"
+    assert conditional["user-agent"] == "test"
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert cache.stats()["revalidations"] == 1
+    cache.close()
+
+def test_changed_resource_replaces_the_stored_body(tmp_path):
+    cache = HTTPResponseCache(str(tmp_path / "http.sqlite3"), ttl_seconds=0)
+    origin = Origin()
+    origin.fetch(cache, "https://acme.com/")
+    origin.etag = '"v2"'
+    origin.bodies["https://acme.com/"] = b"<html>Acme, now with rockets</html>"
+    (changed,) = origin.fetch(cache, "https://acme.com/")
+    assert changed.content == b"<html>Acme, now with rockets</html>"
+    assert cache.stats()["misses"] == 2
+    cache.close()
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    cache = HTTPResponseCache(str(tmp_path / "http.sqlite3"), ttl_seconds=60)
+
+    def handler(request):
+        if request.url.path == "/private":
+            return httpx.Response(200, headers={**HTML, "cache-control": "private, no-store"}, content=b"secret")
+        return httpx.Response(404, headers=HTML, content=b"missing")
+
+    origin = Origin()
+    origin.handler = handler
+    origin.fetch(cache, "https://acme.com/private", "https://acme.com/private", "https://acme.com/gone", "https://acme.com/gone")
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 4
+    cache.close()
+
+def test_eviction_keeps_the_total_under_the_limit_by_last_access(tmp_path):
+    # Random bodies don't compress, so each entry takes about 1000 bytes
+    bodies = {f"https://acme.com/{name}": os.urandom(1000) for name in ("a", "b", "c")}
+    cache = HTTPResponseCache(str(tmp_path / "http.sqlite3"), ttl_seconds=60, max_bytes=2500)
+    origin = Origin(bodies)
+    origin.fetch(cache, "https://acme.com/a")
+    time.sleep(0.01)
+    origin.fetch(cache, "https://acme.com/b")
+    time.sleep(0.01)
+    # Reading a makes b the least recently used
+    origin.fetch(cache, "https://acme.com/a")
+    time.sleep(0.01)
+    origin.fetch(cache, "https://acme.com/c")
+
+    stored = dict(cache._conn.execute("SELECT url, size FROM responses").fetchall())
+    assert sorted(stored) == ["https://acme.com/a", "https://acme.com/c"]
+    assert sum(stored.values()) <= 2500
+    assert cache.stats()["evictions"] == 1
+    cache.close()
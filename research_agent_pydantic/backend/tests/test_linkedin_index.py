@@ -0,0 +1,77 @@
+from collections import Counter
+import asyncio
+import json
+
+import pytest
+
+from app.models.company_agent import CompanyResearchAgent
+from app.services.linkedin_index import LinkedInEntityIndex
+
+from conftest import research_model
+
+#Stands in for LinkedInSessionManager, counting the linkedin_api calls made through it
+class FakeSession:
+    def __init__(self):
+        self.calls = Counter()
+
+    async def call(self, method: str, *args, **kwargs):
+        self.calls[method] += 1
+        if method == "search_companies":
+            return [{"entity_id": "1035"}]
+        return {"name": "Acme Corp", "description": "Anvils", "staffCount": 120, "website": "https://acme.com"}
+
+@pytest.fixture
+def index(tmp_path):
+    index = LinkedInEntityIndex(str(tmp_path / "linkedin.sqlite3"), content_ttl_seconds=3600)
+    yield index
+    index.close()
+
+def lookup(index: LinkedInEntityIndex, session: FakeSession, *names: str):
+    agent = CompanyResearchAgent(research_model(), linkedin_session=session, linkedin_index=index)
+
+    async def run():
+        return [await agent._lookup_linkedin(name) for name in names]
+
+    return asyncio.run(run())
+
+def test_warm_lookup_makes_no_linkedin_calls(index):
+    cold = FakeSession()
+    ((company_id, content),) = lookup(index, cold, "Acme Corp")
+    assert (company_id, content["name"]) == ("1035", "Acme Corp")
+    assert cold.calls == {"search_companies": 1, "get_company": 1}
+
+    # Another process, or a spelling that normalizes to the same name
+    warm = FakeSession()
+    ((company_id, cached),) = lookup(index, warm, "ACME corp.")
+    assert company_id == "1035"
+    assert cached == content
+    assert warm.calls == {}
+    assert index.stats() == {"entities": 1, "index_hits": 1, "index_misses": 1, "content_hits": 1, "content_misses": 1}
+
+def test_expired_content_is_fetched_again_without_a_search(index):
+    lookup(index, FakeSession(), "Acme Corp")
+    index._conn.execute("UPDATE linkedin_content SET fetched_at = fetched_at - 7200")
+    index._conn.commit()
+
+    session = FakeSession()
+    lookup(index, session, "Acme Corp")
+    assert session.calls == {"get_company": 1}
+
+def test_entity_ids_do_not_expire(tmp_path):
+    index = LinkedInEntityIndex(str(tmp_path / "linkedin.sqlite3"), content_ttl_seconds=0)
+    lookup(index, FakeSession(), "Acme Corp")
+    session = FakeSession()
+    lookup(index, session, "Acme Corp")
+    assert session.calls == {"get_company": 1}
+    index.close()
+
+def test_export_and_load_round_trip(index, tmp_path):
+    assert index.load({"Acme Corp": "1035", "Ajax, Inc.": 2048}) == 2
+    exported = index.export()
+    assert exported == {"acmecorp": "1035", "ajaxinc": "2048"}
+
+    copy = LinkedInEntityIndex(str(tmp_path / "copy.sqlite3"))
+    copy.load(json.loads(json.dumps(exported)))
+    assert copy.export() == exported
+    assert asyncio.run(copy.get_entity_id("Ajax Inc")) == "2048"
+    copy.close()
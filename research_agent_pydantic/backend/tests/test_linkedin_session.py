@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from linkedin_api.cookie_repository import LinkedinSessionExpired
+
+from app.core.config import Settings
+from app.core.dependencies import build_research_agent
+from app.services import linkedin_session as linkedin_session_module
+from app.services.bounded_executor import BoundedExecutor
+from app.services.linkedin_session import (
+    LinkedInCredentialProvider,
+    LinkedInCredentialsError,
+    LinkedInSessionManager,
+)
+
+#Stands in for linkedin_api.Linkedin, saving a cookie file on fresh logins
+class FakeLinkedin:
+    clients = []
+    # Loading saved cookies fails as if they had expired
+    saved_session_expired = False
+
+    def __init__(self, email, password, refresh_cookies=False, cookies_dir=""):
+        if not refresh_cookies:
+            if FakeLinkedin.saved_session_expired:
+                raise LinkedinSessionExpired
+            assert os.path.exists(f"{cookies_dir}{email}.jr"), "linkedin_api would log in without counting"
+        else:
+            with open(f"{cookies_dir}{email}.jr", "w") as f:
+                f.write("cookies")
+        self.fresh_login = refresh_cookies
+        self.expired = False
+        FakeLinkedin.clients.append(self)
+
+    def get_company(self, company_id):
+        time.sleep(0.02)
+        if self.expired:
+            raise LinkedinSessionExpired
+        if company_id == "missing":
+            raise KeyError(company_id)
+        return {"name": company_id}
+
+@pytest.fixture
+def fake_linkedin(monkeypatch):
+    FakeLinkedin.clients = []
+    FakeLinkedin.saved_session_expired = False
+    monkeypatch.setattr(linkedin_session_module, "Linkedin", FakeLinkedin)
+    return FakeLinkedin
+
+@pytest.fixture
+def session(tmp_path, fake_linkedin):
+    manager = LinkedInSessionManager(
+        LinkedInCredentialProvider("ops@acme.example", "secret"),
+        BoundedExecutor("linkedin", max_workers=8),
+        cookies_dir=str(tmp_path / "cookies")
+    )
+    yield manager
+    manager.executor.shutdown()
+
+def test_credentials_come_from_settings_or_secrets_file(tmp_path):
+    secrets = tmp_path / "linkedin.json"
+    secrets.write_text(json.dumps({"email": " ops@acme.example ", "password": "from-file"}))
+    assert LinkedInCredentialProvider("me@acme.example", "pw").get() == ("me@acme.example", "pw")
+    assert LinkedInCredentialProvider(secrets_file=str(secrets)).get() == ("ops@acme.example", "from-file")
+    assert LinkedInCredentialProvider(secrets_file=str(secrets)).configured()
+
+    missing = LinkedInCredentialProvider(secrets_file=str(tmp_path / "missing.json"))
+    assert not missing.configured()
+    with pytest.raises(LinkedInCredentialsError):
+        missing.get()
+
+def test_first_login_is_counted_and_saved_cookies_are_reused(session, fake_linkedin):
+    asyncio.run(session.call("get_company", "acme"))
+    assert session.logins == 1
+    assert fake_linkedin.clients[0].fresh_login
+
+    # A new process finds the saved session and does not log in
+    session.clear()
+    asyncio.run(session.call("get_company", "acme"))
+    assert session.logins == 1
+    assert not fake_linkedin.clients[1].fresh_login
+
+def test_concurrent_callers_share_one_relogin(session, fake_linkedin):
+    async def run():
+        await session.call("get_company", "warmup")
+        session._client.expired = True
+        return await asyncio.gather(*(session.call("get_company", f"company {i}") for i in range(6)))
+
+    results = asyncio.run(run())
+    assert [result["name"] for result in results] == [f"company {i}" for i in range(6)]
+    # The first login plus exactly one re-login
+    assert session.logins == 2
+    assert len(fake_linkedin.clients) == 2
+
+def test_relogin_reuses_cookies_another_process_refreshed(session, fake_linkedin):
+    async def run():
+        await session.call("get_company", "warmup")
+        stale = session._client
+        stale.expired = True
+        # Another worker logs in after our session went stale and saves new cookies
+        cookies = os.path.join(session.cookies_dir, "ops@acme.example.jr")
+        os.utime(cookies, (time.time() + 5, time.time() + 5))
+        return await session.call("get_company", "acme")
+
+    assert asyncio.run(run()) == {"name": "acme"}
+    assert session.logins == 1
+    assert not fake_linkedin.clients[-1].fresh_login
+
+def test_expired_saved_cookies_force_a_counted_login(session, fake_linkedin):
+    asyncio.run(session.call("get_company", "acme"))
+    session.clear()
+    fake_linkedin.saved_session_expired = True
+    asyncio.run(session.call("get_company", "acme"))
+    assert session.logins == 2
+
+def test_other_errors_do_not_relogin(session, fake_linkedin):
+    with pytest.raises(KeyError):
+        asyncio.run(session.call("get_company", "missing"))
+    assert session.logins == 1
+    assert len(fake_linkedin.clients) == 1
+
+def test_agent_has_no_linkedin_session_without_credentials(tmp_path):
+    settings = Settings(
+        LINKEDIN_EMAIL=None,
+        LINKEDIN_PASSWORD=None,
+        LINKEDIN_SECRETS_FILE=str(tmp_path / "missing.json"),
+        NEWS_ENABLED=False,
+        _env_file=None
+    )
+    agent = build_research_agent(settings)
+    assert agent.linkedin_session is None
+
+    configured = build_research_agent(settings.model_copy(update={"LINKEDIN_EMAIL": "ops@acme.example", "LINKEDIN_PASSWORD": "pw"}))
+    assert configured.linkedin_session is not None
+    configured.linkedin_session.executor.shutdown()
@@ -0,0 +1,115 @@
+from typing import List
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.services import metrics
+
+def test_render_escapes_labels_and_formats_values():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("test_requests_total", "Requests.", ("route", "status"))
+    counter.inc(route='/say/"hi"\\now', status=200)
+    counter.inc(2.5, route="/", status=200)
+    registry.gauge_callback("test_ratio", "A ratio.", (), lambda: {(): 0.25})
+    registry.gauge_callback("test_broken", "Fails to collect.", (), lambda: 1 / 0)
+
+    assert registry.render() == (
+        "# HELP test_requests_total Requests.\n"
+        "# TYPE test_requests_total counter\n"
+        'test_requests_total{route="/",status="200"} 2.5\n'
+        'test_requests_total{route="/say/\\"hi\\"\\\\now",status="200"} 1\n'
+        "# HELP test_ratio A ratio.\n"
+        "# TYPE test_ratio gauge\n"
+        "test_ratio 0.25\n"
+        "# HELP test_broken Fails to collect.\n"
+        "# TYPE test_broken gauge\n"
+    )
+
+def test_histogram_buckets_are_cumulative_and_end_with_inf():
+    histogram = metrics.Histogram("test_latency_seconds", "Latency.", ("route",), buckets=(1, 0.1))
+    for value in (0.05, 0.5, 0.7, 30):
+        histogram.observe(value, route="/")
+    assert histogram.render().splitlines()[2:] == [
+        'test_latency_seconds_bucket{route="/",le="0.1"} 1',
+        'test_latency_seconds_bucket{route="/",le="1"} 3',
+        'test_latency_seconds_bucket{route="/",le="+Inf"} 4',
+        'test_latency_seconds_sum{route="/"} 31.25',
+        'test_latency_seconds_count{route="/"} 4',
+    ]
+
+def test_labels_must_match_the_family():
+    counter = metrics.Counter("test_total", "Test.", ("tool",))
+    with pytest.raises(ValueError):
+        counter.inc(tool="a", status="b")
+
+def test_metric_families_must_render_samples():
+    with pytest.raises(TypeError):
+        metrics._Metric("test", "Test.")
+
+def test_tool_calls_are_counted_by_returned_status():
+    async def error_result():
+        return {"status": "error", "error": "not found"}
+
+    async def plain_result():
+        return "text"
+
+    async def raises():
+        raise RuntimeError("boom")
+
+    async def run():
+        await metrics.instrument_tool("test_error_tool", error_result)()
+        await metrics.instrument_tool("test_plain_tool", plain_result)()
+        with pytest.raises(RuntimeError):
+            await metrics.instrument_tool("test_raising_tool", raises)()
+
+    asyncio.run(run())
+    calls = metrics.TOOL_CALLS.values()
+    assert calls[("test_error_tool", "error")] == 1
+    assert calls[("test_plain_tool", "success")] == 1
+    assert calls[("test_raising_tool", "exception")] == 1
+
+def test_metered_model_records_request_outcomes():
+    attempts = []
+
+    def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("model unavailable")
+        return ModelResponse([TextPart("ok")])
+
+    model = metrics.MeteredModel(FunctionModel(respond))
+    agent = Agent(model)
+    key = lambda outcome: (model.model_name, "false", outcome)
+    before = metrics.MODEL_REQUESTS.values()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(agent.run("hi"))
+    assert asyncio.run(agent.run("hi")).data == "ok"
+    after = metrics.MODEL_REQUESTS.values()
+    assert after[key("error")] - before.get(key("error"), 0) == 1
+    assert after[key("success")] - before.get(key("success"), 0) == 1
+
+def test_metrics_route_labels_requests_by_route_template():
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("notion_client")
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    client = TestClient(main.app)
+    client.get("/export/notion/jobs/job-1234")
+    client.get("/no/such/page")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert "# TYPE research_http_requests_total counter" in response.text
+    lines = response.text.splitlines()
+    # Ids in the path never become label values
+    assert any(line.startswith('research_http_requests_total{method="GET",route="/export/notion/jobs/{job_id}",') for line in lines)
+    assert not any("job-1234" in line for line in lines)
+    assert any('route="unmatched",status="404"' in line for line in lines)
+    assert any(line.startswith('research_http_request_duration_seconds_bucket{method="GET",route="/export/notion/jobs/{job_id}",le="+Inf"}') for line in lines)
@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+import asyncio
+
+import httpx
+
+from app.services.news_feeds import NewsArticle, NewsGatherer, canonical_url, is_http_url, parse_feed, rank_articles
+
+from conftest import MockSite
+
+RSS = {"content-type": "application/rss+xml"}
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Desert Wire</title>
+<item><title>Acme raises a Series B</title><link>https://www.acme.com/news/series-b/?utm_source=rss</link>
+<pubDate>Tue, 03 Mar 2026 10:00:00 GMT</pubDate><description>&lt;p&gt;Acme raised 40 million dollars.&lt;/p&gt;</description></item>
+<item><title>Ajax opens a plant</title><link>https://ajax.example/plant</link>
+<pubDate>Wed, 04 Mar 2026 10:00:00 GMT</pubDate></item>
+<item><title>Acme ships rocket skates</title><link>https://acme.com/news/skates</link>
+<pubDate>Mon, 02 Feb 2026 10:00:00 GMT</pubDate></item>
+</channel></rss>
+"""
+
+ATOM = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Acme Newsroom</title>
+<entry><title>Acme raises a Series B</title><link href="/news/series-b"/>
+<updated>2026-03-03T09:00:00Z</updated><summary>Acme raised 40 million dollars.</summary></entry>
+<entry><title>Acme opens a new anvil foundry</title><link href="/news/foundry"/>
+<updated>2026-03-05T09:00:00Z</updated></entry>
+</feed>
+"""
+
+NEWSROOM = b"""<html><head><link rel="alternate" type="application/atom+xml" href="/news/feed.atom">
+<link rel="alternate" type="application/rss+xml" href="http://[::1/feed"></head>
+<body><a href="/news/2026/01/15/acme-joins-the-desert-alliance">Acme joins the Desert Alliance</a>
+<a href="/news">News</a><a href="/about">About Acme and its founders</a></body></html>
+"""
+
+def article(title: str, url: str, day: int = None, summary: str = None) -> NewsArticle:
+    date = datetime(2026, 3, day, tzinfo=timezone.utc) if day else None
+    return NewsArticle(title=title, url=url, source="test", date=date, summary=summary)
+
+def test_feeds_parse_into_absolute_dated_articles():
+    rss = parse_feed(FEED, "https://wire.example/feed")
+    assert [item.title for item in rss] == ["Acme raises a Series B", "Ajax opens a plant", "Acme ships rocket skates"]
+    assert rss[0].source == "Desert Wire"
+    assert rss[0].summary == "Acme raised 40 million dollars."
+    assert rss[0].date == datetime(2026, 3, 3, 10, tzinfo=timezone.utc)
+
+    atom = parse_feed(ATOM, "https://acme.com/news/feed.atom")
+    assert [item.url for item in atom] == ["https://acme.com/news/series-b", "https://acme.com/news/foundry"]
+
+def test_ranking_is_newest_first_without_duplicates():
+    articles = [
+        article("Acme ships rocket skates", "https://acme.com/news/skates", 2),
+        article("Acme raises a Series B", "https://www.acme.com/news/series-b/?utm_source=rss", 3),
+        # Same article under a tracking URL
+        article("Acme raises a Series B at last", "http://acme.com/news/series-b#top", 4),
+        # Syndicated copy under another URL
+        article("Acme ships rocket skates", "https://wire.example/acme-skates", 5),
+        article("Undated Acme interview", "https://acme.com/news/interview"),
+    ]
+    ranked = rank_articles(articles, limit=10)
+    assert [item.url for item in ranked] == [
+        "https://wire.example/acme-skates",
+        "http://acme.com/news/series-b#top",
+        "https://acme.com/news/interview",
+    ]
+    assert canonical_url("http://www.Acme.com/news/b/?utm_medium=x&id=2#c") == "https://acme.com/news/b?id=2"
+    assert len(rank_articles(articles, limit=2)) == 2
+
+def test_gather_merges_feeds_newsroom_and_advertised_feeds():
+    site = MockSite({
+        "https://wire.example/feed": (200, RSS, FEED),
+        "https://acme.com/news": NEWSROOM,
+        "https://acme.com/news/feed.atom": (200, {"content-type": "application/atom+xml"}, ATOM),
+    })
+    gatherer = NewsGatherer(site.client(), feed_urls=["https://wire.example/feed"], newsroom_paths=["/news", "/press"])
+
+    async def website():
+        return {"url": "https://acme.com/", "feeds": ["http://[::1/rss"]}
+
+    articles = asyncio.run(gatherer.gather("Acme", site=website))
+    assert [item.title for item in articles] == [
+        "Acme opens a new anvil foundry",
+        "Acme raises a Series B",
+        "Acme ships rocket skates",
+        "Acme joins the Desert Alliance",
+    ]
+    # Unfiltered feed items that don't mention the company are left out
+    assert all("Ajax" not in item.title for item in articles)
+    # Feeds with a broken URL are skipped, whether the newsroom or the website advertised them
+    assert gatherer.stats()["fetches"] == {"ok": 3, "not_modified": 0, "not_found": 1, "error": 1}
+
+def test_unchanged_feed_is_revalidated_with_a_304():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(200, headers={**RSS, "etag": '"v1"'}, content=FEED)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    gatherer = NewsGatherer(client, feed_urls=["https://wire.example/{company}.rss"], cache_ttl_seconds=0)
+
+    async def run():
+        return await gatherer.gather("Acme"), await gatherer.gather("Acme")
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert len(first) == 3
+    assert seen == [None, '"v1"']
+    assert gatherer.stats()["fetches"]["not_modified"] == 1
+
+def test_invalid_feed_urls_are_dropped_at_construction():
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, headers=RSS, content=FEED)))
+    gatherer = NewsGatherer(client, feed_urls=[
+        "https://wire.example/{company}.rss", "http://[::1/feed", "ftp://wire.example/feed", "wire.example/feed"
+    ])
+    assert gatherer.feed_urls == ["https://wire.example/{company}.rss"]
+    assert len(asyncio.run(gatherer.gather("Acme"))) == 3
+    assert not is_http_url("https://")
@@ -0,0 +1,224 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+
+pytest.importorskip("notion_client")
+
+from notion_client import AsyncClient as NotionClient
+
+from app.services.integration_service import IntegrationService
+from app.services.notion_export_queue import NotionExportQueue
+
+#Serves the Notion endpoints the exporter uses through httpx.MockTransport
+class FakeNotion:
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.created: List[str] = []
+        # Status codes returned, in order, before requests succeed again
+        self.failures: List[int] = []
+        self.retry_after: Optional[str] = None
+        # Seconds every request takes
+        self.delay = 0.0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/v1")
+        endpoint = (request.method, path.split("/")[1] + ("/children" if path.endswith("/children") else ""))
+        self.calls[endpoint] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            status = self.failures.pop(0)
+            headers = {"retry-after": self.retry_after} if self.retry_after else {}
+            body = {"object": "error", "status": status, "code": "service_unavailable", "message": "try later"}
+            if status == 429:
+                body["code"] = "rate_limited"
+            return httpx.Response(status, headers=headers, json=body)
+        if endpoint == ("POST", "pages"):
+            page_id = uuid.uuid4().hex
+            self.created.append(page_id)
+            return httpx.Response(200, json={"object": "page", "id": page_id})
+        if endpoint == ("PATCH", "blocks/children"):
+            children = json.loads(request.content)["children"]
+            return httpx.Response(200, json={"results": [{"id": uuid.uuid4().hex} for _ in children]})
+        return httpx.Response(200, json={"object": "block", "id": path.split("/")[-1]})
+
+    def service(self) -> IntegrationService:
+        service = IntegrationService()
+        service.setup_notion("secret", "database", requests_per_second=1000.0)
+        service.notion_client = NotionClient(
+            auth="secret", client=httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        )
+        return service
+
+OVERVIEW = {
+    "name": "Acme",
+    "website": "https://acme.com",
+    "summary": "Acme makes anvils.",
+    "news": [{"title": "Acme raises a Series B", "url": "https://acme.com/news/b"}],
+}
+
+def make_queue(path, service=None, **options) -> NotionExportQueue:
+    options = {"retry_base_seconds": 0.0, "poll_interval": 0.01, **options}
+    return NotionExportQueue(str(path), service or FakeNotion().service(), **options)
+
+async def wait_for_job(queue: NotionExportQueue, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await queue.job(job_id)
+        if job["status"] in ("done", "failed", "partial"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job did not finish: {job}")
+
+def test_a_task_is_claimed_by_one_process_only(tmp_path):
+    path = tmp_path / "queue.sqlite3"
+    queues = [make_queue(path) for _ in range(4)]
+    asyncio.run(queues[0].enqueue([{**OVERVIEW, "name": f"Company {i}"} for i in range(20)]))
+
+    def claim_all(queue):
+        claimed = []
+        while (task := queue._claim()) is not None:
+            claimed.append(task[0])
+        return claimed
+
+    with ThreadPoolExecutor(len(queues)) as pool:
+        claimed = [task for tasks in pool.map(claim_all, queues) for task in tasks]
+    assert sorted(claimed) == list(range(1, 21))
+    assert queues[0].stats()["tasks"]["running"] == 20
+
+def test_one_company_is_exported_by_one_worker_at_a_time(tmp_path):
+    path = tmp_path / "queue.sqlite3"
+    first, second = make_queue(path), make_queue(path)
+    asyncio.run(first.enqueue([OVERVIEW, {**OVERVIEW, "summary": "Updated"}, {**OVERVIEW, "name": "Ajax"}]))
+    assert first._claim()[1] == "acme"
+    # The second Acme export waits for the first; Ajax is free
+    assert second._claim()[1] == "ajax"
+    assert second._claim() is None
+
+def test_start_requeues_only_tasks_whose_lease_lapsed(tmp_path):
+    path = tmp_path / "queue.sqlite3"
+    live = make_queue(path, lease_seconds=60)
+    asyncio.run(live.enqueue([OVERVIEW, {**OVERVIEW, "name": "Ajax"}]))
+    live._claim()
+    crashed = live._claim()
+    # The worker holding Ajax died a while ago
+    live._conn.execute("UPDATE export_tasks SET updated_at = ? WHERE task_id = ?", (time.time() - 120, crashed[0]))
+    live._conn.commit()
+
+    async def restart():
+        starting = make_queue(path, lease_seconds=60, workers=0)
+        starting.start()
+        stats = starting.stats()["tasks"]
+        await starting.close()
+        return stats
+
+    assert asyncio.run(restart()) == {"pending": 1, "running": 1, "done": 0, "failed": 0}
+
+def test_a_long_export_keeps_its_lease(tmp_path):
+    path = tmp_path / "queue.sqlite3"
+    notion = FakeNotion()
+    notion.delay = 0.15
+    queue = make_queue(path, notion.service(), lease_seconds=0.3, workers=1)
+    other = make_queue(path, lease_seconds=0.3)
+
+    async def run():
+        queue.start()
+        job_id = await queue.enqueue([OVERVIEW])
+        await asyncio.sleep(0.5)
+        # Past the lease, but the worker renewed it, so another process does not take the task
+        stolen = await asyncio.to_thread(other._claim)
+        job = await wait_for_job(queue, job_id)
+        await queue.close()
+        return stolen, job
+
+    stolen, job = asyncio.run(run())
+    assert stolen is None
+    assert job["status"] == "done"
+    assert len(notion.created) == 1
+
+def test_persistent_server_errors_are_retried_by_the_queue_only(tmp_path):
+    notion = FakeNotion()
+    notion.failures = [503] * 100
+    queue = make_queue(tmp_path / "queue.sqlite3", notion.service(), max_attempts=3)
+
+    async def run():
+        queue.start()
+        job = await wait_for_job(queue, await queue.enqueue([OVERVIEW]))
+        await queue.close()
+        return job
+
+    job = asyncio.run(run())
+    assert job["status"] == "failed"
+    assert job["items"][0]["attempts"] == 3
+    # One request per attempt, none retried inside the Notion client
+    assert sum(notion.calls.values()) == 3
+
+def test_retry_after_sets_the_next_attempt(tmp_path):
+    notion = FakeNotion()
+    notion.failures = [429]
+    notion.retry_after = "30"
+    queue = make_queue(tmp_path / "queue.sqlite3", notion.service())
+
+    async def run():
+        await queue.enqueue([OVERVIEW])
+        await queue._run_task(*queue._claim())
+
+    before = time.time()
+    asyncio.run(run())
+    status, attempts, next_attempt_at = queue._conn.execute(
+        "SELECT status, attempts, next_attempt_at FROM export_tasks"
+    ).fetchone()
+    assert (status, attempts) == ("pending", 1)
+    assert next_attempt_at >= before + 30
+
+def test_re_export_updates_the_existing_page(tmp_path):
+    notion = FakeNotion()
+    queue = make_queue(tmp_path / "queue.sqlite3", notion.service())
+
+    async def run():
+        queue.start()
+        first = await wait_for_job(queue, await queue.enqueue([OVERVIEW]))
+        second = await wait_for_job(queue, await queue.enqueue([{**OVERVIEW, "summary": "Acme makes rockets."}]))
+        page_id = await queue.page_id(OVERVIEW)
+        await queue.close()
+        return first, second, page_id
+
+    first, second, page_id = asyncio.run(run())
+    assert first["items"][0]["notion_page_id"] == second["items"][0]["notion_page_id"] == page_id
+    assert notion.created == [page_id]
+    assert notion.calls[("PATCH", "pages")] == 1
+    # The news section of the first export is replaced
+    assert notion.calls[("DELETE", "blocks")] == 1
+
+def test_page_recorded_before_a_failed_write_is_reused_on_retry(tmp_path):
+    notion = FakeNotion()
+    queue = make_queue(tmp_path / "queue.sqlite3", notion.service())
+
+    async def run():
+        await queue.enqueue([OVERVIEW])
+        failed = []
+
+        async def fail_body_once(request):
+            if request.url.path.endswith("/children") and not failed:
+                failed.append(request)
+                return httpx.Response(502, text="bad gateway")
+            return await notion.handler(request)
+
+        queue.integration_service.notion_client = NotionClient(
+            auth="secret", client=httpx.AsyncClient(transport=httpx.MockTransport(fail_body_once))
+        )
+        await queue._run_task(*queue._claim())
+        queue._conn.execute("UPDATE export_tasks SET next_attempt_at = 0")
+        queue._conn.commit()
+        await queue._run_task(*queue._claim())
+
+    asyncio.run(run())
+    assert len(notion.created) == 1
+    assert queue.stats() == {"tasks": {"pending": 0, "running": 0, "done": 1, "failed": 0}, "pages": 1}
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
+from app.services.research_store import ResearchStore, run_migrations
+
+def gate_tools(agent: CompanyResearchAgent, started: list) -> None:
+    """
+    Make each research tool wait until every tool has started, so they must run concurrently.
+    """
+    everyone = asyncio.Event()
+
+    def gated(name, function):
+        async def wrapper(ctx):
+            started.append(name)
+            if len(started) == len(agent.research_tools):
+                everyone.set()
+            await asyncio.wait_for(everyone.wait(), timeout=2)
+            return await function(ctx)
+        return wrapper
+
+    agent.research_tools = {name: gated(name, function) for name, function in agent.research_tools.items()}
+
+def test_pregathered_run_makes_one_model_request(tmp_path, site, model, overview):
+    database_url = f"sqlite:///{tmp_path / 'research.db'}"
+    run_migrations(database_url)
+    store = ResearchStore(database_url)
+    research_model = model(website="https://acme.com/")
+    agent = CompanyResearchAgent(research_model, http_client=site.client(), research_store=store, website_snapshot_ttl=0)
+    started = []
+    gate_tools(agent, started)
+
+    async def run():
+        result = await agent.research_company(CompanyResearchRequest(company_name="Acme"), pregather=True)
+        await store.flush()
+        return result, await store.history("Acme")
+
+    result, (stored,) = asyncio.run(run())
+    assert result == overview(website="https://acme.com/")
+    assert sorted(started) == sorted(agent.research_tools)
+    assert (stored.status, stored.mode, stored.pregather) == ("success", "run", True)
+    assert stored.model_requests == 1
+    # The model answered from the pre-gathered results without calling a tool itself
+    assert research_model.tool_results["scrape_company_website"]["status"] == "success"
+    assert set(research_model.tool_results) == set(agent.research_tools)
+    assert site.gets() == ["https://acme.com"]
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+from app.models.company_agent import CompanyResearchRequest
+from app.services.research_cache import (
+    CACHE_HIT,
+    CACHE_MISS,
+    CACHE_STALE,
+    InMemoryResearchCacheBackend,
+    ResearchCache,
+    SQLiteResearchCacheBackend,
+)
+
+REQUEST = CompanyResearchRequest(company_name="Acme Inc.", additional_info="Anvils")
+
+def test_key_ignores_case_and_whitespace():
+    same = CompanyResearchRequest(company_name="  acme   INC. ", additional_info="anvils ")
+    other = CompanyResearchRequest(company_name="Acme", additional_info="Rockets")
+    assert ResearchCache.make_key(same) == ResearchCache.make_key(REQUEST)
+    assert ResearchCache.make_key(other) != ResearchCache.make_key(REQUEST)
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = InMemoryResearchCacheBackend(max_entries=2)
+    backend.set("a", {"n": 1}, 1.0)
+    backend.set("b", {"n": 2}, 1.0)
+    backend.get("a")
+    backend.set("c", {"n": 3}, 1.0)
+    assert backend.get("b") is None
+    assert backend.get("a") == ({"n": 1}, 1.0)
+
+def test_sqlite_backend_persists_and_evicts_least_recently_accessed(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    backend = SQLiteResearchCacheBackend(path, max_entries=2)
+    backend.set("a", {"n": 1}, 1.0)
+    time.sleep(0.01)
+    backend.set("b", {"n": 2}, 1.0)
+    time.sleep(0.01)
+    backend.get("a")
+    time.sleep(0.01)
+    backend.set("c", {"n": 3}, 1.0)
+    backend.close()
+
+    reopened = SQLiteResearchCacheBackend(path, max_entries=2)
+    assert reopened.get("b") is None
+    assert reopened.get("a") == ({"n": 1}, 1.0)
+    assert reopened.get("c") == ({"n": 3}, 1.0)
+    reopened.close()
+
+def test_miss_then_hit_computes_once(overview):
+    cache = ResearchCache(InMemoryResearchCacheBackend())
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return overview(summary="fresh")
+
+    async def run():
+        first = await cache.get_or_compute(REQUEST, compute)
+        second = await cache.get_or_compute(REQUEST, compute)
+        return first, second
+
+    (first, first_status), (second, second_status) = asyncio.run(run())
+    assert (first_status, second_status) == (CACHE_MISS, CACHE_HIT)
+    assert second.summary == "fresh"
+    assert len(calls) == 1
+
+def test_stale_entry_is_served_while_one_background_refresh_runs(overview):
+    cache = ResearchCache(InMemoryResearchCacheBackend(), ttl_seconds=10, stale_seconds=100)
+    key = cache.make_key(REQUEST)
+    cache.backend.set(key, overview(summary="old").model_dump(mode="json"), time.time() - 50)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return overview(summary="new")
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_compute(REQUEST, compute) for _ in range(5)))
+        # Let the background refresh finish
+        await asyncio.gather(*cache._tasks)
+        return results, await cache.get_or_compute(REQUEST, compute)
+
+    results, (after, after_status) = asyncio.run(run())
+    assert [status for _, status in results] == [CACHE_STALE] * 5
+    assert all(result.summary == "old" for result, _ in results)
+    assert len(calls) == 1
+    assert (after.summary, after_status) == ("new", CACHE_HIT)
+    assert not cache._refreshing
+
+def test_failed_refresh_keeps_stale_entry_and_retries_later(overview):
+    cache = ResearchCache(InMemoryResearchCacheBackend(), ttl_seconds=10, stale_seconds=100)
+    key = cache.make_key(REQUEST)
+    cache.backend.set(key, overview(summary="old").model_dump(mode="json"), time.time() - 50)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        raise RuntimeError("model unavailable")
+
+    async def run():
+        statuses = []
+        for _ in range(2):
+            result, status = await cache.get_or_compute(REQUEST, compute)
+            statuses.append((result.summary, status))
+            await asyncio.gather(*cache._tasks)
+        return statuses
+
+    assert asyncio.run(run()) == [("old", CACHE_STALE), ("old", CACHE_STALE)]
+    assert len(calls) == 2
+
+def test_entry_past_stale_window_is_recomputed_inline(overview):
+    cache = ResearchCache(InMemoryResearchCacheBackend(), ttl_seconds=10, stale_seconds=100)
+    cache.backend.set(cache.make_key(REQUEST), overview(summary="old").model_dump(mode="json"), time.time() - 500)
+
+    async def compute():
+        return overview(summary="new")
+
+    result, status = asyncio.run(cache.get_or_compute(REQUEST, compute))
+    assert (result.summary, status) == ("new", CACHE_MISS)
+    assert not cache._tasks
+
+def test_lookup_returns_only_fresh_entries(overview):
+    cache = ResearchCache(InMemoryResearchCacheBackend(), ttl_seconds=10, stale_seconds=100)
+
+    async def run():
+        await cache.store(REQUEST, overview())
+        fresh = await cache.lookup(REQUEST)
+        cache.backend.set(cache.make_key(REQUEST), overview().model_dump(mode="json"), time.time() - 50)
+        return fresh, await cache.lookup(REQUEST)
+
+    fresh, stale = asyncio.run(run())
+    assert fresh is not None and stale is None
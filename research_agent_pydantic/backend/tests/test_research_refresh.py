@@ -0,0 +1,88 @@
+from typing import List
+import asyncio
+
+import pytest
+from pydantic_ai.messages import ModelMessage, ModelResponse, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest, research_request_key
+from app.services.research_store import ResearchStore, run_migrations
+
+from conftest import ACME_HOME, overview_args
+
+REQUEST = CompanyResearchRequest(company_name="Acme")
+
+def refresh_model(**fields) -> FunctionModel:
+    """
+    A model that answers full runs with an overview of `fields` and refreshes with the
+    requested fields of that overview. Each request's result tool name and fields are kept on
+    the model as `requests`.
+    """
+    def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        result_tool = info.result_tools[0]
+        requested = list(result_tool.parameters_json_schema["properties"])
+        model.requests.append(requested)
+        values = overview_args(**fields)
+        return ModelResponse([ToolCallPart(result_tool.name, {name: values[name] for name in requested})])
+
+    model = FunctionModel(respond)
+    model.requests = []
+    return model
+
+@pytest.fixture
+def store(tmp_path):
+    url = f"sqlite:///{tmp_path / 'research.db'}"
+    run_migrations(url)
+    return ResearchStore(url)
+
+def refresh(store, site, **fields):
+    model = refresh_model(**fields)
+    agent = CompanyResearchAgent(model, http_client=site.client(), research_store=store, website_snapshot_ttl=0)
+
+    async def run():
+        result = await agent.refresh_company(REQUEST)
+        await store.flush()
+        return result
+
+    overview, report = asyncio.run(run())
+    return overview, report, model.requests
+
+def test_first_refresh_is_a_full_run(store, site):
+    overview, report, requests = refresh(store, site, summary="First look")
+    assert report["result"] == "full"
+    assert "scrape_company_website" in report["changed_sources"]
+    assert overview.summary == "First look"
+    assert len(requests) == 1
+
+def test_unchanged_sources_reuse_the_stored_overview_without_the_model(store, site):
+    refresh(store, site, summary="First look")
+    overview, report, requests = refresh(store, site, summary="Should not be asked for")
+    assert report == {"result": "unchanged", "changed_sources": [], "regenerated_fields": []}
+    assert overview.summary == "First look"
+    assert requests == []
+    # The unchanged refresh is stored and stays the baseline of the next one
+    runs = asyncio.run(store.history("Acme"))
+    assert [run.mode for run in runs] == ["refresh", "refresh"]
+    assert asyncio.run(store.latest_sources(research_request_key(REQUEST)))[0].summary == "First look"
+
+def test_changed_website_regenerates_only_its_fields(store, site):
+    refresh(store, site, summary="First look", funding_info={"round": "Series A"})
+    site.pages["https://acme.com/"] = ACME_HOME.replace(b"forty countries", b"fifty countries")
+    overview, report, requests = refresh(store, site, summary="Now in fifty countries", funding_info={"round": "Series B"})
+
+    assert report["result"] == "partial"
+    assert report["changed_sources"] == ["scrape_company_website"]
+    assert "summary" in report["regenerated_fields"]
+    assert "funding_info" not in report["regenerated_fields"]
+    # One request for the website's fields only
+    assert requests == [report["regenerated_fields"]]
+    assert overview.summary == "Now in fifty countries"
+    assert overview.funding_info == {"round": "Series A"}
+
+def test_unreadable_source_keeps_its_stored_fields(store, site):
+    refresh(store, site, summary="First look")
+    site.pages.clear()
+    overview, report, requests = refresh(store, site, summary="Should not be asked for")
+    assert report["result"] == "unchanged"
+    assert overview.summary == "First look"
+    assert requests == []
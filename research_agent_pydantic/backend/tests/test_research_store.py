@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+
+import pytest
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest, research_request_key
+from app.services.research_store import ResearchStore, run_migrations
+
+STARTED_AT = datetime(2026, 1, 5, 9, 30, tzinfo=timezone.utc)
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'research.db'}"
+    run_migrations(url)
+    return url
+
+def run_record(company_name: str = "Acme", status: str = "success", minutes: int = 0, **fields) -> dict:
+    request = CompanyResearchRequest(company_name=company_name)
+    record = {
+        "company_name": company_name,
+        "request_key": research_request_key(request),
+        "request": request.model_dump(mode="json"),
+        "overview": {"summary": f"{company_name} at {minutes}"} if status == "success" else None,
+        "source_urls": [],
+        "source_hashes": {},
+        "mode": "run",
+        "pregather": False,
+        "status": status,
+        "error": None,
+        "started_at": STARTED_AT + timedelta(minutes=minutes),
+        "duration_ms": 12.5,
+        "timings": {},
+    }
+    record.update(fields)
+    return record
+
+def test_runs_are_buffered_and_written_in_batches(database_url):
+    store = ResearchStore(database_url, batch_size=3, flush_interval=60)
+
+    async def run():
+        await store.add(run_record(minutes=0))
+        await store.add(run_record(minutes=1))
+        buffered = store.stats()
+        await store.add(run_record(minutes=2))
+        # A full batch is written in the background, so add() returns before it is stored
+        added = store.stats()
+        while store.stats()["written"] < 3:
+            await asyncio.sleep(0.01)
+        return buffered, added
+
+    buffered, added = asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert buffered == {"written": 0, "buffered": 2, "dropped": 0}
+    assert added["written"] == 0
+    assert store.stats() == {"written": 3, "buffered": 0, "dropped": 0}
+
+def test_close_waits_for_batches_being_written(database_url):
+    store = ResearchStore(database_url, batch_size=2, flush_interval=60)
+
+    async def run():
+        for minutes in range(3):
+            await store.add(run_record(minutes=minutes))
+        await store.close()
+
+    asyncio.run(run())
+    assert store.stats() == {"written": 3, "buffered": 0, "dropped": 0}
+
+def test_latest_reads_buffered_runs(database_url):
+    store = ResearchStore(database_url, flush_interval=60)
+
+    async def run():
+        await store.add(run_record(minutes=5))
+        return await store.latest("Acme")
+
+    assert asyncio.run(run()).summary == "Acme at 5"
+    assert store.stats()["buffered"] == 0
+
+def test_history_is_newest_first_and_filtered(database_url):
+    store = ResearchStore(database_url)
+    store.insert_many([
+        run_record("Acme Inc.", minutes=0),
+        run_record("Ajax", minutes=1),
+        run_record("ACME inc", status="error", minutes=2, error="TimeoutError: slow"),
+    ])
+
+    async def run():
+        everything = await store.history()
+        acme = await store.history("acme inc")
+        recent = await store.history(since=STARTED_AT + timedelta(minutes=1))
+        return everything, acme, recent
+
+    everything, acme, recent = asyncio.run(run())
+    assert [run.company_name for run in everything] == ["ACME inc", "Ajax", "Acme Inc."]
+    assert [run.status for run in acme] == ["error", "success"]
+    assert acme[0].error == "TimeoutError: slow"
+    assert len(recent) == 2
+
+def test_latest_returns_the_newest_successful_overview(database_url):
+    store = ResearchStore(database_url)
+    store.insert_many([
+        run_record(minutes=0),
+        run_record(minutes=1, source_hashes={"scrape_company_website": "abc"}),
+        run_record(status="error", minutes=2),
+    ])
+
+    async def run():
+        return await store.latest("ACME"), await store.latest("Ajax"), await store.latest_sources(run_record()["request_key"])
+
+    latest, missing, (overview, hashes) = asyncio.run(run())
+    assert latest.summary == "Acme at 1"
+    assert missing is None
+    assert overview.summary == "Acme at 1"
+    assert hashes == {"scrape_company_website": "abc"}
+
+def test_runs_stored_without_source_hashes_are_no_refresh_baseline(database_url):
+    store = ResearchStore(database_url)
+    store.insert_many([run_record(source_hashes=None)])
+    assert asyncio.run(store.latest_sources(run_record()["request_key"])) is None
+
+def test_failed_flush_keeps_runs_up_to_the_buffer_limit(tmp_path):
+    # No migrations ran, so the table is missing
+    store = ResearchStore(f"sqlite:///{tmp_path / 'empty.db'}", batch_size=100, max_buffer=2)
+
+    async def run():
+        for minutes in range(3):
+            await store.add(run_record(minutes=minutes))
+        return await store.flush()
+
+    assert asyncio.run(run()) == 0
+    assert store.stats() == {"written": 0, "buffered": 2, "dropped": 1}
+
+def test_agent_stores_each_run_with_sources_and_usage(database_url, site, model):
+    store = ResearchStore(database_url)
+    agent = CompanyResearchAgent(model(website="https://acme.com/"), http_client=site.client(), research_store=store)
+
+    async def run():
+        await agent.research_company(CompanyResearchRequest(company_name="Acme"))
+        await store.flush()
+        return await store.history("Acme")
+
+    (stored,) = asyncio.run(run())
+    assert (stored.status, stored.mode, stored.pregather) == ("success", "run", False)
+    assert stored.source_urls[0] == "https://acme.com"
+    assert "scrape_company_website" in stored.timings
+    assert stored.model_requests == 2
+    assert stored.total_tokens > 0
@@ -0,0 +1,76 @@
+from typing import List
+import asyncio
+import json
+
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
+
+def streaming_model(result_json: str, split_at: str) -> FunctionModel:
+    """
+    A streaming model that calls every research tool, then streams the result tool's
+    arguments in two chunks split before `split_at`, far enough apart to be sent separately.
+    """
+    async def stream(messages: List[ModelMessage], info: AgentInfo):
+        if len(messages) == 1:
+            yield {
+                index: DeltaToolCall(name=tool.name, json_args="{}", tool_call_id=f"call-{index}")
+                for index, tool in enumerate(info.function_tools)
+            }
+            return
+        head, tail = result_json.split(split_at, 1)
+        yield {0: DeltaToolCall(name=info.result_tools[0].name, json_args=head, tool_call_id="result")}
+        await asyncio.sleep(0.25)
+        yield {0: DeltaToolCall(json_args=split_at + tail)}
+
+    return FunctionModel(stream_function=stream)
+
+def collect(agent: CompanyResearchAgent, **kwargs) -> List[dict]:
+    async def run():
+        return [event async for event in agent.research_company_stream(CompanyResearchRequest(company_name="Acme"), **kwargs)]
+    return asyncio.run(run())
+
+def test_stream_reports_tools_then_partial_fields_then_result(site, overview):
+    result = overview(website="https://acme.com/", summary="Acme makes anvils.")
+    result_json = json.dumps(result.model_dump(mode="json"))
+    agent = CompanyResearchAgent(
+        streaming_model(result_json, split_at='"purpose"'),
+        http_client=site.client(),
+        website_snapshot_ttl=0
+    )
+    events = collect(agent)
+    kinds = [event["event"] for event in events]
+    assert kinds[-1] == "result"
+    assert events[-1]["data"] == result.model_dump(mode="json")
+
+    tools = {event["data"]["tool"]: event["data"]["status"] for event in events if event["event"] == "tool"}
+    assert tools["scrape_company_website"] == "success"
+    # LinkedIn is not configured in the test agent
+    assert tools["fetch_linkedin_company_data"] == "error"
+    assert kinds.index("partial") > max(i for i, kind in enumerate(kinds) if kind == "tool")
+
+    partials = [event["data"] for event in events if event["event"] == "partial"]
+    assert len(partials) >= 2
+    # The first chunk ends before "purpose": fields up to it are sent, the rest only once streamed
+    assert partials[0]["summary"] == "Acme makes anvils."
+    assert "interview_questions" not in partials[0]
+    assert partials[-1]["interview_questions"] == result.interview_questions
+    # Each field is sent again only when its value changes
+    sent = [name for partial in partials for name in partial]
+    assert sent.count("summary") == 1
+
+def test_pregathered_stream_reports_every_tool_before_the_model(site, overview):
+    result_json = json.dumps(overview().model_dump(mode="json"))
+    agent = CompanyResearchAgent(
+        streaming_model(result_json, split_at='"purpose"'),
+        http_client=site.client(),
+        website_snapshot_ttl=0,
+        pregather=True
+    )
+    events = collect(agent)
+    started = [event["data"]["tool"] for event in events if event["event"] == "tool" and event["data"]["status"] == "started"]
+    assert started == list(agent.research_tools)
+    first_partial = next(i for i, event in enumerate(events) if event["event"] == "partial")
+    assert all(event["event"] == "tool" for event in events[:first_partial])
+    assert events[-1]["event"] == "result"
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("acme", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+    assert stats["coalesced_ratio"] == 0.8
+
+def test_finished_call_is_forgotten():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        return [await flight.do("acme", work), await flight.do("acme", work)]
+
+    assert asyncio.run(run()) == [1, 2]
+    assert flight.stats()["coalesced"] == 0
+
+def test_error_reaches_every_waiter_and_next_call_starts_fresh():
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("acme", failing) for _ in range(3)), return_exceptions=True)
+        with pytest.raises(ValueError):
+            await flight.do("acme", failing)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 2
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def run():
+        done = asyncio.Event()
+
+        async def work():
+            await done.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.do("acme", work))
+        second = asyncio.create_task(flight.do("acme", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        done.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "result"
+    stats = flight.stats()
+    assert (stats["cancelled_waiters"], stats["abandoned"], stats["in_flight"]) == (1, 0, 0)
+
+def test_call_is_cancelled_once_every_waiter_is_gone():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def run():
+        waiters = [asyncio.create_task(flight.do("acme", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        # Give the abandoned task a turn to see its cancellation
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled == [1]
+    stats = flight.stats()
+    assert (stats["cancelled_waiters"], stats["abandoned"], stats["in_flight"]) == (2, 1, 0)
+
+def test_new_call_after_abandonment_starts_fresh():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        abandoned = asyncio.create_task(flight.do("acme", work))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.gather(abandoned, return_exceptions=True)
+        return await flight.do("acme", work)
+
+    assert asyncio.run(run()) == 2
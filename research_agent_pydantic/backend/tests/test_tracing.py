@@ -0,0 +1,103 @@
+import contextvars
+import os
+import sys
+import time
+
+import pytest
+
+from app.services import tracing
+
+scripts_root = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+if scripts_root not in sys.path:
+    sys.path.insert(0, scripts_root)
+
+import trace_report
+
+def span(name, span_id, parent_id, start, end, trace_id="t1"):
+    return {
+        "trace_id": trace_id, "span_id": span_id, "parent_id": parent_id, "name": name,
+        "start": start, "end": end, "duration_ms": (end - start) * 1000, "status": "ok", "attributes": {},
+    }
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = tracing.Tracer(tracing.JSONLSpanExporter(str(tmp_path / "traces.jsonl")))
+    yield tracer
+    tracer.close()
+
+def test_nested_spans_link_to_their_parent(tracer, tmp_path):
+    with tracer.span("research_company", company_name="Acme") as root:
+        with tracer.span("tool.fetch") as child:
+            assert tracing.current_span() is child
+        with pytest.raises(RuntimeError):
+            with tracer.span("tool.broken"):
+                raise RuntimeError("boom")
+        assert tracing.current_span() is root
+    assert tracing.current_span() is None
+
+    spans = {span["name"]: span for span in tracing.load_spans(str(tmp_path / "traces.jsonl"))}
+    assert list(spans) == ["tool.fetch", "tool.broken", "research_company"]
+    assert spans["research_company"]["parent_id"] is None
+    assert spans["research_company"]["attributes"] == {"company_name": "Acme"}
+    for name in ("tool.fetch", "tool.broken"):
+        assert spans[name]["parent_id"] == spans["research_company"]["span_id"]
+        assert spans[name]["trace_id"] == spans["research_company"]["trace_id"]
+    assert spans["tool.broken"]["status"] == "error"
+    assert spans["tool.broken"]["attributes"]["error"] == "RuntimeError: boom"
+
+def test_span_closed_from_another_context_is_still_exported(tracer, tmp_path):
+    # Like a streaming generator resumed by a different task
+    scope = tracer.span("research_company")
+    contextvars.copy_context().run(scope.__enter__)
+    scope.__exit__(None, None, None)
+    assert [span["name"] for span in tracing.load_spans(str(tmp_path / "traces.jsonl"))] == ["research_company"]
+
+def test_rotated_files_are_read_oldest_first(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = tracing.Tracer(tracing.JSONLSpanExporter(path, max_bytes=600, backup_count=10))
+    names = [f"span-{index}" for index in range(12)]
+    for name in names:
+        with tracer.span(name):
+            pass
+    tracer.close()
+
+    assert os.path.exists(f"{path}.1")
+    assert [span["name"] for span in tracing.load_spans(path)] == names
+
+def test_report_includes_every_kind_of_run():
+    spans = [
+        span("research_company", "r1", None, 0.0, 4.0, "t1"),
+        span("model.request", "m1", "r1", 0.0, 1.0, "t1"),
+        span("tool.fetch", "f1", "r1", 1.0, 3.0, "t1"),
+        span("tool.fetch", "f2", "r1", 1.0, 2.0, "t1"),
+        span("refresh_company", "r2", None, 10.0, 12.0, "t2"),
+        span("tool.fetch", "f3", "r2", 10.0, 11.0, "t2"),
+    ]
+    roots, children = trace_report.group_traces(spans)
+    assert [root["name"] for root in roots] == ["research_company", "refresh_company"]
+    assert [child["span_id"] for child in children["r1"]] == ["m1", "f1", "f2"]
+
+    # The shorter parallel fetch is off the critical path
+    assert trace_report.critical_path(roots[0], children) == [
+        ("research_company", 1.0), ("tool.fetch", 2.0), ("model.request", 1.0),
+    ]
+    assert trace_report.critical_path(roots[1], children) == [("refresh_company", 1.0), ("tool.fetch", 1.0)]
+
+def test_critical_path_report_aggregates_runs(tmp_path, capsys):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = tracing.Tracer(tracing.JSONLSpanExporter(path))
+    for name in ("research_company", "refresh_company"):
+        with tracer.span(name):
+            with tracer.span("tool.fetch"):
+                time.sleep(0.01)
+    tracer.close()
+
+    assert trace_report.main(["critical-path", "--trace-file", path]) == 0
+    output = capsys.readouterr().out
+    assert output.startswith("2 runs, ")
+    rows = {line.split()[0]: line.split() for line in output.splitlines()[2:]}
+    assert rows["tool.fetch"][-1] == "2"
+
+def test_report_without_runs_fails(tmp_path, capsys):
+    assert trace_report.main(["waterfall", "--trace-file", str(tmp_path / "missing.jsonl")]) == 1
+    assert "No runs found" in capsys.readouterr().out
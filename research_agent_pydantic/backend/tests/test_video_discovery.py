@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.html_parsing import is_backend_available, parse_html
+from app.services.video_discovery import find_videos, identify_video
+
+BACKENDS = [
+    "html.parser",
+    pytest.param("lxml", marks=pytest.mark.skipif(not is_backend_available("lxml"), reason="lxml is not installed")),
+]
+
+PAGE_URL = "https://acme.com/"
+
+PRODUCT_PAGE = b"""<html><head><title>Acme Corp</title>
+<meta property="og:video" content="https://www.youtube.com/embed/dQw4w9WgXcQ">
+<meta property="og:title" content="Anvil 3000 product tour">
+<meta property="og:image" content="https://acme.com/og.png">
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "Organization", "name": "Acme Corp"},
+  {"@type": "VideoObject", "name": "Anvil 3000 demo", "embedUrl": "https://www.youtube.com/embed/dQw4w9WgXcQ",
+   "thumbnailUrl": ["https://acme.com/thumb.jpg"], "duration": "PT2M30S", "uploadDate": "2026-02-01"}
+]}
+</script></head>
+<body>
+<iframe src="https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ?rel=0" title="Ignored duplicate"></iframe>
+<iframe data-src="https://player.vimeo.com/video/76979871" title="Customer story: Roadrunner Logistics"></iframe>
+<iframe src="https://maps.example/embed?q=acme"></iframe>
+</body></html>
+"""
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_mentions_of_one_video_merge_richest_first(backend):
+    videos = find_videos(parse_html(PRODUCT_PAGE, "utf-8", backend), PAGE_URL)
+    assert [video.url for video in videos] == [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://vimeo.com/76979871",
+    ]
+    youtube, vimeo = videos
+    # JSON-LD comes first; og:video only adds what it lacked
+    assert (youtube.title, youtube.found_in, youtube.type) == ("Anvil 3000 demo", "schema.org", "product_demo")
+    assert youtube.thumbnail_url == "https://acme.com/thumb.jpg"
+    assert (youtube.duration, youtube.upload_date) == ("PT2M30S", "2026-02-01")
+    assert youtube.embed_url == "https://www.youtube.com/embed/dQw4w9WgXcQ"
+    assert (vimeo.source, vimeo.type, vimeo.found_in) == ("Vimeo", "customer_story", "embedded_player")
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_video_elements_fall_back_to_data_src_and_source_children(backend):
+    page = b"""<html><body>
+    <video poster="/posters/tour.jpg" title="Getting started with Acme">
+      <source data-src="/media/lazy.webm" type="video/webm">
+      <source src="/media/tour.mp4" type="video/mp4">
+    </video>
+    <video data-src="https://cdn.acme.com/keynote.mp4" aria-label="Acme keynote"></video>
+    <video src="/media/direct.mp4"><source src="/media/ignored.mp4"></video>
+    <video><track src="/captions.vtt"></video>
+    </body></html>"""
+    videos = find_videos(parse_html(page, "utf-8", backend), PAGE_URL)
+    assert [video.url for video in videos] == [
+        "https://acme.com/media/lazy.webm",
+        "https://cdn.acme.com/keynote.mp4",
+        "https://acme.com/media/direct.mp4",
+    ]
+    tour, keynote, direct = videos
+    assert (tour.title, tour.type, tour.source) == ("Getting started with Acme", "tutorial", "acme.com")
+    assert tour.thumbnail_url == "https://acme.com/posters/tour.jpg"
+    assert (keynote.title, keynote.type) == ("Acme keynote", "webinar")
+    # Untitled self-hosted videos are named after their file
+    assert direct.title == "direct.mp4"
+
+def test_player_urls_resolve_to_canonical_watch_urls():
+    assert identify_video("https://youtu.be/dQw4w9WgXcQ") == ("YouTube", "dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    assert identify_video("https://fast.wistia.net/embed/iframe/abc123") == ("Wistia", "abc123", "https://fast.wistia.net/embed/iframe/abc123")
+    assert identify_video("https://www.loom.com/share/f00d") == ("Loom", "f00d", "https://www.loom.com/share/f00d")
+    assert identify_video("https://acme.com/media/tour.mp4") is None
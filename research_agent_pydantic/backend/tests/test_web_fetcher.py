@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+
+import httpx
+import pytest
+
+from app.services.web_fetcher import FetchLimits, stream_fetch
+
+HTML = {"content-type": "text/html; charset=utf-8"}
+
+#Streams a body in chunks, optionally pausing before each, and counts what was pulled
+class ChunkedBody(httpx.AsyncByteStream):
+    def __init__(self, chunks, delay: float = 0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.pulled = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.pulled += 1
+            yield chunk
+
+def fetch(handler, url: str = "https://acme.com/", **limits) -> httpx.Response:
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await stream_fetch(client, url, limits=FetchLimits(**limits))
+    return asyncio.run(run())
+
+def test_small_html_page_is_read_whole():
+    response = fetch(lambda request: httpx.Response(200, headers=HTML, content=b"<html>Acme</html>"))
+    assert response.content == b"<html>Acme</html>"
+    assert response.extensions == {"truncated": False, "aborted": None, "bytes": 17}
+
+def test_body_is_cut_at_max_bytes_without_reading_the_rest():
+    body = ChunkedBody([b"x" * 100] * 50)
+    response = fetch(lambda request: httpx.Response(200, headers=HTML, stream=body), max_bytes=250)
+    assert response.content == b"x" * 250
+    assert response.extensions == {"truncated": True, "aborted": "max_bytes", "bytes": 250}
+    assert body.pulled == 3
+
+def test_non_html_response_is_closed_unread():
+    body = ChunkedBody([b"%PDF-1.7"] * 10)
+    response = fetch(lambda request: httpx.Response(200, headers={"content-type": "application/pdf"}, stream=body))
+    assert response.content == b""
+    assert response.extensions["aborted"] == "content_type:application/pdf"
+    assert body.pulled == 0
+
+def test_error_status_body_is_not_read():
+    body = ChunkedBody([b"<html>Not found</html>"])
+    response = fetch(lambda request: httpx.Response(404, headers=HTML, stream=body))
+    assert response.status_code == 404
+    assert body.pulled == 0
+    assert response.extensions == {"truncated": False, "aborted": None, "bytes": 0}
+
+def test_slow_response_headers_hit_the_first_byte_timeout():
+    async def slow_headers(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, headers=HTML, content=b"<html></html>")
+
+    with pytest.raises(asyncio.TimeoutError):
+        fetch(slow_headers, first_byte_timeout=0.05)
+
+def test_total_deadline_keeps_the_body_read_so_far():
+    body = ChunkedBody([b"<p>chunk</p>"] * 20, delay=0.03)
+    response = fetch(lambda request: httpx.Response(200, headers=HTML, stream=body), total_timeout=0.2)
+    assert response.extensions["truncated"] is True
+    assert response.extensions["aborted"] == "total_timeout"
+    assert 0 < response.extensions["bytes"] < 20 * len(b"<p>chunk</p>")
+    assert response.content == b"<p>chunk</p>" * (response.extensions["bytes"] // len(b"<p>chunk</p>"))
+
+def test_redirects_are_followed_and_wire_headers_replaced():
+    def handler(request):
+        if request.url.path == "/":
+            return httpx.Response(301, headers={"location": "https://www.acme.com/home"})
+        compressed = gzip.compress(b"<html>Home</html>")
+        return httpx.Response(200, headers={**HTML, "content-encoding": "gzip"}, content=compressed)
+
+    response = fetch(handler)
+    assert str(response.url) == "https://www.acme.com/home"
+    assert response.content == b"<html>Home</html>"
+    assert "content-encoding" not in response.headers
+    # Describes the decoded body, not the compressed one on the wire
+    assert response.headers["content-length"] == "17"
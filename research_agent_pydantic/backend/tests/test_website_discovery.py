@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+from typing import List
+import asyncio
+
+from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
+from app.services.linkedin_index import LinkedInEntityIndex
+from app.services.website_discovery import candidate_urls, normalize_company_name, normalize_website
+
+from conftest import ACME_HOME, MockSite
+
+#Stands in for LinkedInSessionManager with a fixed company page
+class FakeSession:
+    def __init__(self, website=None):
+        self.website = website
+
+    async def call(self, method: str, *args, **kwargs):
+        if method == "search_companies":
+            return [{"entity_id": "1035"}]
+        return {"name": "Acme Corp", "website": self.website}
+
+def guessing_model(url: str) -> FunctionModel:
+    """
+    A model that answers the website question with `url`.
+    """
+    def respond(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        return ModelResponse([TextPart(url)])
+    return FunctionModel(respond)
+
+def discover(agent: CompanyResearchAgent, company_name: str = "Acme"):
+    ctx = SimpleNamespace(deps=CompanyResearchRequest(company_name=company_name), usage=None)
+    return asyncio.run(agent._discover_website(ctx))
+
+def heads(site: MockSite) -> List[str]:
+    return [str(request.url) for request in site.requests if request.method == "HEAD"]
+
+def test_candidates_come_from_the_normalized_name():
+    assert normalize_company_name("Acme, Inc.") == "acmeinc"
+    assert candidate_urls("Acme, Inc.")[:3] == ["https://acmeinc.com", "https://acmeinc.io", "https://acmeinc.ai"]
+    assert "https://getacmeinc.com" in candidate_urls("Acme, Inc.")
+    assert candidate_urls("!!!") == []
+    assert normalize_website("www.acme.com/") == "https://www.acme.com/"
+    assert normalize_website("  ") is None
+
+def test_agent_and_linkedin_index_share_the_normalization(tmp_path):
+    index = LinkedInEntityIndex(str(tmp_path / "linkedin.sqlite3"))
+    agent = CompanyResearchAgent(guessing_model(""), linkedin_index=index)
+    for name in ("Acme, Inc.", "ÀCME corp", "acme-co 2"):
+        assert index.normalize(name) == agent._normalize_company_name(name) == normalize_company_name(name)
+    index.close()
+
+def test_linkedin_website_skips_domain_probes(site):
+    agent = CompanyResearchAgent(
+        guessing_model(""), http_client=site.client(), linkedin_session=FakeSession("acme.com")
+    )
+    found = discover(agent)
+    assert (found["url"], found["source"]) == ("https://acme.com", "linkedin")
+    assert heads(site) == []
+    stats = agent.website_discovery.stats()
+    assert stats["linkedin"] == {"attempts": 1, "hits": 1, "hit_rate": 1.0}
+    assert stats["domain_probe"]["attempts"] == 0
+
+def test_domain_probes_start_when_linkedin_has_no_website(site):
+    agent = CompanyResearchAgent(guessing_model(""), http_client=site.client(), linkedin_session=FakeSession())
+    found = discover(agent)
+    assert (found["url"], found["source"]) == ("https://acme.com", "domain_probe")
+    assert heads(site)[0] == "https://acme.com"
+    stats = agent.website_discovery.stats()
+    assert (stats["linkedin"]["attempts"], stats["linkedin"]["hits"]) == (1, 0)
+    assert (stats["domain_probe"]["attempts"], stats["domain_probe"]["hits"]) == (1, 1)
+    assert stats["ai_agent"]["attempts"] == 0
+
+def test_model_guess_is_the_last_resort():
+    site = MockSite({"https://acme.example/": ACME_HOME})
+    agent = CompanyResearchAgent(guessing_model("https://acme.example/"), http_client=site.client())
+    found = discover(agent)
+    assert (found["url"], found["source"]) == ("https://acme.example/", "ai_agent")
+    stats = agent.website_discovery.stats()
+    assert (stats["domain_probe"]["attempts"], stats["domain_probe"]["hits"]) == (1, 0)
+    assert stats["ai_agent"] == {"attempts": 1, "hits": 1, "hit_rate": 1.0}
+    # LinkedIn is not configured, so it is not counted as tried
+    assert stats["linkedin"]["attempts"] == 0
+
+def test_misses_are_counted_for_every_strategy_tried():
+    site = MockSite({})
+    agent = CompanyResearchAgent(guessing_model("not a url"), http_client=site.client(), linkedin_session=FakeSession())
+    assert discover(agent) is None
+    assert {strategy: counts["attempts"] - counts["hits"] for strategy, counts in agent.website_discovery.stats().items()} == {
+        "linkedin": 1, "domain_probe": 1, "ai_agent": 1,
+    }
@@ -0,0 +1,113 @@
+"""
+Benchmark website text extraction over a corpus of saved pages.
+
+Compares the original pipeline (decode response.text, parse with html.parser, clean up
+whitespace with chained generators) against the current one (parse response bytes with
+the selected backend, single-pass whitespace normalization) and checks the extracted
+text is identical.
+
+Usage:
+    python benchmarks/html_parsing_benchmark.py [--corpus DIR] [--repeat N] [--backend NAME]
+"""
+from typing import Callable, Dict, List
+import argparse
+import glob
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path so the app package resolves
+backend_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import httpx
+from bs4 import BeautifulSoup
+
+from app.services.html_parsing import PARSER_BACKENDS, is_backend_available, parse_html, sniff_encoding
+
+def baseline_extract(response: httpx.Response) -> str:
+    """
+    The original _scrape_website extraction.
+    """
+    soup = BeautifulSoup(response.text, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+def backend_extract(backend: str) -> Callable[[httpx.Response], str]:
+    """
+    The current extraction with a given parser backend.
+    """
+    def extract(response: httpx.Response) -> str:
+        return parse_html(response.content, response.charset_encoding, backend).text()
+    return extract
+
+def load_corpus(corpus_dir: str) -> Dict[str, httpx.Response]:
+    """
+    Load saved pages as responses whose Content-Type declares the page's charset.
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, "rb") as f:
+            content = f.read()
+            pages[os.path.basename(path)] = httpx.Response(
+                200,
+                headers={"Content-Type": f"text/html; charset={sniff_encoding(content)}"},
+                content=content,
+                request=httpx.Request("GET", "https://example.com/")
+            )
+    return pages
+
+def time_extract(extract: Callable[[httpx.Response], str], response: httpx.Response, repeat: int) -> float:
+    """
+    Return the best wall time in seconds over `repeat` runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(response)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", action="append", help="Backend to compare, may be repeated (default: all installed)")
+    args = parser.parse_args(argv)
+
+    backends = args.backend or [b for b in PARSER_BACKENDS if is_backend_available(b)]
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"No .html files found in {args.corpus}")
+        return 1
+
+    print(f"{'page':<24}{'size KB':>9}{'baseline ms':>13}" + "".join(f"{b + ' ms':>16}{'speedup':>9}{'same':>6}" for b in backends))
+    totals = {b: 0.0 for b in ["baseline"] + backends}
+    mismatches = 0
+    for name, response in pages.items():
+        expected = baseline_extract(response)
+        baseline = time_extract(baseline_extract, response, args.repeat)
+        totals["baseline"] += baseline
+        row = f"{name:<24}{len(response.content) / 1024:>9.1f}{baseline * 1000:>13.2f}"
+        for backend in backends:
+            extract = backend_extract(backend)
+            same = extract(response) == expected
+            mismatches += not same
+            elapsed = time_extract(extract, response, args.repeat)
+            totals[backend] += elapsed
+            row += f"{elapsed * 1000:>16.2f}{baseline / elapsed:>8.2f}x{'yes' if same else 'NO':>6}"
+        print(row)
+
+    summary = f"{'total':<24}{'':>9}{totals['baseline'] * 1000:>13.2f}"
+    for backend in backends:
+        summary += f"{totals[backend] * 1000:>16.2f}{totals['baseline'] / totals[backend]:>8.2f}x{'':>6}"
+    print(summary)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+"""
+Offline end-to-end benchmark of CompanyResearchAgent and the FastAPI app.
+
+Nothing leaves the machine: the model is a scripted pydantic-ai FunctionModel, company
+websites are the recorded pages in benchmarks/corpus/ served by a local HTTP server,
+and LinkedIn is a fake client running on the real bounded thread pool. Every strategy
+of the pipeline is exercised: Acme and Globex are found by domain probing, Hooli through
+its LinkedIn website and Initech only through the model's guess.
+
+Scenarios:
+    agent             sequential research_company runs
+    agent-pregather   the same with tool pre-gathering
+    agent-concurrent  research_company under concurrent load
+    api               POST /research/company through the ASGI app, concurrently
+
+Reports p50/p95/p99 latency, throughput and allocations per run (tracemalloc, measured
+in a separate pass) and writes them to a JSON file that --compare can diff.
+
+Usage:
+    python benchmarks/research_benchmark.py [--runs N] [--concurrency C] [--scenario NAME]
+        [--model-latency MS] [--site-latency MS] [--linkedin-latency MS]
+        [--output FILE] [--compare BASELINE.json]
+"""
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+benchmarks_root = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.join(os.path.dirname(benchmarks_root), "backend")
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+# Keep the app from touching real services or writing caches when it is imported
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.update({
+    "HTTP_CACHE_ENABLED": "False",
+    "RESEARCH_CACHE_BACKEND": "none",
+    "TRACING_ENABLED": "False",
+    "LINKEDIN_INDEX_PATH": "",
+    # Measure the website pipeline on every run rather than reused snapshots, and leave news out
+    "WEBSITE_SNAPSHOT_TTL_SECONDS": "0",
+    "NEWS_ENABLED": "False",
+})
+
+import httpx
+from pydantic_ai.messages import ModelResponse, SystemPromptPart, TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from app.models.company_agent import CompanyResearchAgent, CompanyResearchRequest
+from app.services.bounded_executor import BoundedExecutor
+from app.services.content_compression import ContentCompressor
+
+# Recorded page served for each site host
+SITES = {
+    "acme.com": "acme_marketing.html",
+    "globex.io": "globex_pricing.html",
+    "hooli.xyz": "hooli_blog.html",
+    "initech.example": "initech_latin1.html",
+}
+
+# LinkedIn records of the fake client; only Hooli lists a website
+LINKEDIN_COMPANIES = {
+    "acme": {"entity_id": "1001", "name": "Acme Corp", "website": None},
+    "globex": {"entity_id": "1002", "name": "Globex", "website": None},
+    "hooli": {"entity_id": "1003", "name": "Hooli", "website": "hooli.xyz"},
+    "initech": {"entity_id": "1004", "name": "Initech", "website": None},
+}
+
+COMPANIES = ["Acme", "Globex", "Hooli", "Initech"]
+
+#Serves recorded pages by Host header
+class SiteHandler(BaseHTTPRequestHandler):
+    pages: Dict[str, bytes] = {}
+    latency = 0.0
+
+    def _respond(self, body: bool) -> None:
+        time.sleep(self.latency)
+        page = self.pages.get(self.headers.get("Host", "").split(":")[0])
+        if page is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        if body:
+            self.wfile.write(page)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, format, *args):
+        pass
+
+#Site server with a listen backlog deep enough for concurrent domain probes
+class SiteServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections under load and adds 1s SYN retries to the latencies
+    request_queue_size = 128
+
+def start_site_server(corpus_dir: str, latency: float) -> ThreadingHTTPServer:
+    pages = {}
+    for host, name in SITES.items():
+        with open(os.path.join(corpus_dir, name), "rb") as f:
+            pages[host] = f.read()
+    handler = type("Handler", (SiteHandler,), {"pages": pages, "latency": latency})
+    server = SiteServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+#Routes every request to the local site server over real sockets
+class LocalSitesTransport(httpx.AsyncBaseTransport):
+    """Rewrites request URLs to the local server, keeping the original Host header"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        headers = httpx.Headers(request.headers)
+        headers["Host"] = request.url.host
+        local = httpx.Request(
+            request.method,
+            request.url.copy_with(scheme="http", host="127.0.0.1", port=self.port),
+            headers=headers,
+            stream=request.stream,
+            extensions=request.extensions
+        )
+        response = await self.transport.handle_async_request(local)
+        # The client attaches the original request, so response.url keeps the site's URL
+        return httpx.Response(
+            response.status_code, headers=response.headers, stream=response.stream, extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+#Stands in for linkedin_api.Linkedin
+class FakeLinkedInClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def search_companies(self, keywords: str, limit: int = 1) -> List[Dict]:
+        time.sleep(self.latency)
+        record = LINKEDIN_COMPANIES.get(keywords.lower())
+        return [{"entity_id": record["entity_id"]}] if record else []
+
+    def get_company(self, entity_id: str) -> Dict:
+        time.sleep(self.latency)
+        record = next(r for r in LINKEDIN_COMPANIES.values() if r["entity_id"] == entity_id)
+        return {
+            "name": record["name"],
+            "description": f"{record['name']} is a company.",
+            "industry": "Software",
+            "staffCount": 250,
+            "headquarters": {"city": "Springfield"},
+            "website": record["website"],
+        }
+
+#Stands in for LinkedInSessionManager, calls run on a real bounded executor
+class FakeLinkedInSession:
+    def __init__(self, latency: float):
+        self.client = FakeLinkedInClient(latency)
+        self.executor = BoundedExecutor("linkedin", max_workers=4, max_queue=256)
+        self.logins = 0
+
+    async def call(self, method: str, *args, **kwargs):
+        return await self.executor.run(getattr(self.client, method), *args, **kwargs)
+
+    def clear(self) -> None:
+        pass
+
+def _overview(messages) -> Dict:
+    """
+    Build the final result from the tool returns in the conversation.
+    """
+    results = {
+        part.tool_name: part.content
+        for message in messages for part in getattr(message, "parts", [])
+        if isinstance(part, ToolReturnPart) and isinstance(part.content, dict)
+    }
+    website = results.get("scrape_company_website", {})
+    linkedin = results.get("fetch_linkedin_company_data", {})
+    summary = str(website.get("content", ""))[:400]
+    return {
+        "website": website.get("url", ""),
+        "linkedin": linkedin.get("url", ""),
+        "summary": summary or "No summary available",
+        "purpose": summary[:120] or "Unknown",
+        "products": ["Platform", "Analytics"],
+        "competitors": ["Initrode"],
+        "follow_up_questions": ["What is the pricing model?"],
+        "interview_questions": ["How does the team ship?"],
+    }
+
+def _script(messages, info: AgentInfo):
+    """
+    Decide the next model turn: a website URL guess, tool calls, or the final result.
+    """
+    system = " ".join(p.content for p in messages[0].parts if isinstance(p, SystemPromptPart))
+    if "official website URL" in system:
+        prompt = str(messages[-1].parts[-1].content)
+        name = next((c for c in COMPANIES if c in prompt), "unknown")
+        return "text", f"https://{name.lower()}.example/"
+    called = any(isinstance(p, ToolReturnPart) for m in messages for p in getattr(m, "parts", []))
+    if not called:
+        return "tools", [(tool.name, {}) for tool in info.function_tools]
+    return "result", _overview(messages)
+
+def make_model(latency: float) -> FunctionModel:
+    async def function(messages, info: AgentInfo) -> ModelResponse:
+        await asyncio.sleep(latency)
+        kind, value = _script(messages, info)
+        if kind == "text":
+            return ModelResponse(parts=[TextPart(value)])
+        if kind == "tools":
+            return ModelResponse(parts=[ToolCallPart(name, args) for name, args in value])
+        return ModelResponse(parts=[ToolCallPart(info.result_tools[0].name, value)])
+
+    async def stream_function(messages, info: AgentInfo):
+        await asyncio.sleep(latency)
+        kind, value = _script(messages, info)
+        if kind == "text":
+            yield value
+        elif kind == "tools":
+            yield {i: DeltaToolCall(name=name, json_args="{}") for i, (name, _) in enumerate(value)}
+        else:
+            args = json.dumps(value)
+            # Stream the result in pieces so partial field validation is exercised
+            yield {0: DeltaToolCall(name=info.result_tools[0].name, json_args=args[:len(args) // 2])}
+            yield {0: DeltaToolCall(json_args=args[len(args) // 2:])}
+
+    return FunctionModel(function, stream_function=stream_function)
+
+def make_agent(args, port: int, pregather: bool = False) -> CompanyResearchAgent:
+    return CompanyResearchAgent(
+        make_model(args.model_latency / 1000),
+        linkedin_session=FakeLinkedInSession(args.linkedin_latency / 1000),
+        content_compressor=ContentCompressor(),
+        pregather=pregather,
+        http_client=httpx.AsyncClient(transport=LocalSitesTransport(port)),
+        website_snapshot_ttl=0
+    )
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    rank = fraction * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+async def measure(run_one: Callable[[int], Awaitable[None]], runs: int, concurrency: int, alloc_runs: int) -> Dict:
+    """
+    Time `runs` calls of run_one with at most `concurrency` in flight, then measure
+    allocations of `alloc_runs` sequential calls with tracemalloc. The agent's progress
+    output is discarded while measuring.
+    """
+    with redirect_stdout(io.StringIO()):
+        return await _measure(run_one, runs, concurrency, alloc_runs)
+
+async def _measure(run_one: Callable[[int], Awaitable[None]], runs: int, concurrency: int, alloc_runs: int) -> Dict:
+    await run_one(0)  # warm up connections, imports and caches of the parser
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def timed(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await run_one(index)
+            except Exception as e:
+                errors.append(f"run {index}: {e}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(runs)))
+    wall = time.perf_counter() - start
+
+    tracemalloc.start()
+    allocated, peaks = [], []
+    for i in range(alloc_runs):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await run_one(i)
+        current, peak = tracemalloc.get_traced_memory()
+        allocated.append(current - before)
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_s": wall,
+        "throughput_rps": runs / wall,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "retained_kb_per_run": statistics.mean(allocated) / 1024 if allocated else None,
+        "peak_kb_per_run": statistics.mean(peaks) / 1024 if peaks else None,
+    }
+
+async def run_scenarios(args, port: int) -> Dict[str, Dict]:
+    requests = [CompanyResearchRequest(company_name=name) for name in COMPANIES]
+    results = {}
+
+    def wanted(name: str) -> bool:
+        return not args.scenario or name in args.scenario
+
+    for name, pregather, concurrency in (
+        ("agent", False, 1),
+        ("agent-pregather", True, 1),
+        ("agent-concurrent", False, args.concurrency),
+    ):
+        if not wanted(name):
+            continue
+        agent = make_agent(args, port, pregather)
+
+        async def run_one(index: int, agent=agent) -> None:
+            overview = await agent.research_company(requests[index % len(requests)])
+            if not overview.website:
+                raise RuntimeError(f"no website found for {requests[index % len(requests)].company_name}")
+
+        results[name] = await measure(run_one, args.runs, concurrency, args.alloc_runs)
+        results[name]["website_discovery"] = agent.website_discovery.stats()
+        await agent.http_client.aclose()
+        agent.linkedin_session.executor.shutdown()
+        print_result(name, results[name])
+
+    if wanted("api"):
+        try:
+            from app import main
+        except ImportError as e:
+            print(f"{'api':<18} skipped, the app's dependencies are not installed: {e}")
+            return results
+
+        main.research_agent = make_agent(args, port)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+
+        async def call_api(index: int) -> None:
+            response = await client.post("/research/company", json=requests[index % len(requests)].model_dump())
+            response.raise_for_status()
+
+        results["api"] = await measure(call_api, args.runs, args.concurrency, args.alloc_runs)
+        await client.aclose()
+        await main.research_agent.http_client.aclose()
+        main.research_agent.linkedin_session.executor.shutdown()
+        print_result("api", results["api"])
+    return results
+
+def print_result(name: str, result: Dict) -> None:
+    print(
+        f"{name:<18} runs={result['runs']:<5} c={result['concurrency']:<3} "
+        f"p50={result['p50_ms']:8.1f}ms p95={result['p95_ms']:8.1f}ms p99={result['p99_ms']:8.1f}ms "
+        f"{result['throughput_rps']:7.1f} runs/s  peak={result['peak_kb_per_run']:8.0f}KB "
+        f"retained={result['retained_kb_per_run']:7.0f}KB errors={result['errors']}"
+    )
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=benchmarks_root
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def compare(baseline_path: str, results: Dict[str, Dict]) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline.get('commit')})")
+    for name, result in results.items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_kb_per_run"):
+            if before.get(key):
+                deltas.append(f"{key} {(result[key] - before[key]) / before[key] * 100:+.1f}%")
+        print(f"{name:<18} " + "  ".join(deltas))
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--alloc-runs", type=int, default=4)
+    parser.add_argument("--scenario", action="append", choices=["agent", "agent-pregather", "agent-concurrent", "api"])
+    parser.add_argument("--model-latency", type=float, default=50.0, help="Scripted model latency per request in ms")
+    parser.add_argument("--site-latency", type=float, default=20.0, help="Local site server latency per request in ms")
+    parser.add_argument("--linkedin-latency", type=float, default=30.0, help="Fake LinkedIn client latency per call in ms")
+    parser.add_argument("--corpus", default=os.path.join(benchmarks_root, "corpus"))
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/research-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    args = parser.parse_args(argv)
+
+    server = start_site_server(args.corpus, args.site_latency / 1000)
+    try:
+        scenarios = asyncio.run(run_scenarios(args, server.server_address[1]))
+    finally:
+        server.shutdown()
+
+    commit = git_commit()
+    output = args.output or os.path.join(benchmarks_root, "results", f"research-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "scenarios": scenarios,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(args.compare, scenarios)
+    return 1 if any(result["errors"] for result in scenarios.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
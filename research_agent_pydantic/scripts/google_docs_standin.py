@@ -0,0 +1,253 @@
+"""
+Local stand-in for the Google Docs API, for exercising the Google Docs export offline.
+
+Implements documents.create, documents.get and documents.batchUpdate for insertText,
+updateParagraphStyle, createParagraphBullets and updateTextStyle. Every range is checked
+against the document the way the real API checks it (UTF-16 indices inside the body
+segment), and requests are counted per document.
+
+Usage:
+    python scripts/google_docs_standin.py serve [--port 8765]
+        point GOOGLE_DOCS_API_ENDPOINT at http://127.0.0.1:8765/; GET /stats reports counts
+    python scripts/google_docs_standin.py demo [--news 50] [--videos 10]
+        export a sample overview through IntegrationService and print the document and counts
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import uuid
+
+# Add the backend directory to the Python path so the app package resolves
+backend_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+class DocsAPIError(Exception):
+    pass
+
+#In-memory document with Docs API index semantics
+class StandInDocument:
+    """Body text plus applied styles; index 1 is the first character of the body"""
+
+    def __init__(self, title: str):
+        self.document_id = uuid.uuid4().hex
+        self.title = title
+        # A new document body holds a single newline
+        self.units = "\n".encode("utf-16-le")
+        self.paragraph_styles: List[Dict] = []
+        self.bullets: List[Dict] = []
+        self.links: List[Dict] = []
+        self.api_requests = {"create": 1, "get": 0, "batchUpdate": 0}
+        self.operations = 0
+
+    @property
+    def end_index(self) -> int:
+        return 1 + len(self.units) // 2
+
+    def text(self, start: int = 1, end: Optional[int] = None) -> str:
+        end = self.end_index if end is None else end
+        return self.units[(start - 1) * 2:(end - 1) * 2].decode("utf-16-le")
+
+    def _check_range(self, name: str, range_: Dict) -> Dict:
+        start, end = range_.get("startIndex"), range_.get("endIndex")
+        if start is None or end is None or not 1 <= start < end <= self.end_index:
+            raise DocsAPIError(f"{name}: invalid range {start}..{end}, body is 1..{self.end_index}")
+        try:
+            self.text(start, end)
+        except UnicodeDecodeError:
+            raise DocsAPIError(f"{name}: range {start}..{end} splits a surrogate pair")
+        return {"startIndex": start, "endIndex": end, "text": self.text(start, end)}
+
+    def apply(self, request: Dict) -> None:
+        (name, body), = request.items()
+        if name == "insertText":
+            index = body["location"]["index"]
+            if not 1 <= index < self.end_index:
+                raise DocsAPIError(f"insertText: index {index} outside the body 1..{self.end_index - 1}")
+            if not body.get("text"):
+                raise DocsAPIError("insertText: text must not be empty")
+            offset = (index - 1) * 2
+            self.units = self.units[:offset] + body["text"].encode("utf-16-le") + self.units[offset:]
+        elif name == "updateParagraphStyle":
+            self.paragraph_styles.append({**self._check_range(name, body["range"]), **body["paragraphStyle"]})
+        elif name == "createParagraphBullets":
+            self.bullets.append(self._check_range(name, body["range"]))
+        elif name == "updateTextStyle":
+            link = body["textStyle"].get("link", {}).get("url")
+            self.links.append({**self._check_range(name, body["range"]), "url": link})
+        else:
+            raise DocsAPIError(f"Unsupported request {name}")
+        self.operations += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            "documentId": self.document_id,
+            "title": self.title,
+            "text": self.text(),
+            "paragraphStyles": self.paragraph_styles,
+            "bullets": self.bullets,
+            "links": self.links,
+            "apiRequests": self.api_requests,
+            "operations": self.operations,
+        }
+
+#Serves the Docs API subset used by the export
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, _Handler)
+        self.documents: Dict[str, StandInDocument] = {}
+        self.lock = threading.Lock()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            documents = list(self.documents.values())
+        totals = {"create": 0, "get": 0, "batchUpdate": 0}
+        for document in documents:
+            for method, count in document.api_requests.items():
+                totals[method] += count
+        return {
+            "documents": len(documents),
+            "requests": totals,
+            "requests_per_document": sum(totals.values()) / len(documents) if documents else 0.0,
+        }
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, {"error": {"code": status, "message": message, "status": "INVALID_ARGUMENT"}})
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/stats":
+            return self._send(200, self.server.stats())
+        match = re.fullmatch(r"/v1/documents/([^/:]+)", path)
+        document = self.server.documents.get(match.group(1)) if match else None
+        if document is None:
+            return self._error(404, "Requested entity was not found.")
+        document.api_requests["get"] += 1
+        self._send(200, document.to_dict())
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/documents":
+            document = StandInDocument(self._body().get("title", "Untitled document"))
+            with self.server.lock:
+                self.server.documents[document.document_id] = document
+            return self._send(200, {"documentId": document.document_id, "title": document.title})
+        match = re.fullmatch(r"/v1/documents/([^/:]+):batchUpdate", path)
+        document = self.server.documents.get(match.group(1)) if match else None
+        if document is None:
+            return self._error(404, "Requested entity was not found.")
+        document.api_requests["batchUpdate"] += 1
+        requests = self._body().get("requests", [])
+        try:
+            for request in requests:
+                document.apply(request)
+        except DocsAPIError as e:
+            return self._error(400, str(e))
+        self._send(200, {"documentId": document.document_id, "replies": [{} for _ in requests]})
+
+def start(port: int = 0) -> StandInServer:
+    """
+    Start the stand-in on a background thread and return the server.
+    """
+    server = StandInServer(("127.0.0.1", port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def sample_overview(news: int, videos: int) -> Dict:
+    return {
+        "website": "https://acme.example",
+        "linkedin": "https://www.linkedin.com/company/acme",
+        "summary": "Acme builds anvils, rockets and other roadrunner-grade equipment. 🚀 Ships worldwide.",
+        "purpose": "Make ambitious plans possible.",
+        "products": ["Anvil 3000", "Rocket skates", "Giant magnet"],
+        "competitors": ["Ajax", "Wile E. Supplies"],
+        "funding_info": {"round": "Series B", "amount": "$40M"},
+        "news": [
+            {"title": f"Acme news item {i} — café ☕", "url": f"https://news.example/acme/{i}", "source": "Example News", "date": "2024-05-01"}
+            for i in range(news)
+        ],
+        "videos": [
+            {"title": f"Acme demo {i}", "url": f"https://video.example/watch?v={i}", "source": "YouTube", "type": "product_demo"}
+            for i in range(videos)
+        ],
+        "follow_up_questions": ["Who are the largest customers?"],
+        "interview_questions": ["How do you test rocket skates?"],
+    }
+
+def check_document(document: Dict) -> List[str]:
+    """
+    Return problems with an exported document: links must cover exactly their URL or title,
+    headings and bullets must cover whole paragraphs.
+    """
+    problems = []
+    for style in document["paragraphStyles"] + document["bullets"]:
+        if not style["text"].endswith("\n"):
+            problems.append(f"paragraph range {style['startIndex']}..{style['endIndex']} does not end a paragraph: {style['text']!r}")
+    for link in document["links"]:
+        if "\n" in link["text"] or not link["text"].strip():
+            problems.append(f"link range {link['startIndex']}..{link['endIndex']} covers {link['text']!r}")
+    return problems
+
+def demo(news: int, videos: int) -> int:
+    import asyncio
+    from app.services.integration_service import IntegrationService
+
+    server = start()
+    service = IntegrationService()
+    service.setup_google_docs(None, api_endpoint=f"http://127.0.0.1:{server.server_address[1]}/")
+    result = asyncio.run(service.export_to_google_docs(sample_overview(news, videos)))
+    document = server.documents[result["google_doc_id"]].to_dict()
+    print(document["text"])
+    print(f"export result: {result}")
+    print(f"stand-in requests: {server.stats()['requests']}, operations in the batch: {document['operations']}")
+    problems = check_document(document)
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+    server.shutdown()
+    return 1 if problems else 0
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["serve", "demo"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--news", type=int, default=50)
+    parser.add_argument("--videos", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "demo":
+        return demo(args.news, args.videos)
+    server = StandInServer(("127.0.0.1", args.port))
+    print(f"Google Docs stand-in on http://127.0.0.1:{args.port}/ (GET /stats for request counts)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
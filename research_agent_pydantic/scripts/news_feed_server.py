@@ -0,0 +1,252 @@
+"""
+Local news feed server, for exercising news gathering offline.
+
+Serves a small company website for "Acme" with everything the news gatherer reads: a
+homepage advertising an RSS feed, a /news newsroom linking dated articles and advertising
+an Atom feed, a generic industry feed that mentions several companies, and a search feed
+taking the company name in its query. Feeds and pages carry ETag and Last-Modified and
+answer conditional requests with 304. The Atom feed repeats an RSS article under a
+tracking URL and a syndicated copy under another URL, both of which must be deduplicated.
+
+Usage:
+    python scripts/news_feed_server.py serve [--port 8766]
+        GET /stats reports requests per path and status; for example set
+        NEWS_FEED_URLS=http://127.0.0.1:8766/search.rss?q={company},http://127.0.0.1:8766/industry.rss
+    python scripts/news_feed_server.py demo
+        gather news for Acme twice through NewsGatherer and check ranking, dedup and 304s
+"""
+from collections import Counter
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+# Add the backend directory to the Python path so the app package resolves
+backend_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+# Every document claims to have last changed at this time
+LAST_MODIFIED = format_datetime(datetime(2024, 6, 1, tzinfo=timezone.utc), usegmt=True)
+
+HOMEPAGE = """<!doctype html>
+<html><head><title>Acme Corp</title>
+<link rel="alternate" type="application/rss+xml" title="Acme blog" href="/feed.xml">
+</head><body><main><h1>Acme Corp</h1><p>Anvils, rockets and roadrunner-grade equipment.</p></main></body></html>
+"""
+
+NEWSROOM = """<!doctype html>
+<html><head><title>Acme Newsroom</title>
+<link rel="alternate" type="application/atom+xml" href="/news/atom.xml">
+</head><body>
+<nav><a href="/news/">News</a> <a href="/about">About Acme</a></nav>
+<main>
+<a href="/news/2024/05/20/acme-opens-a-new-rocket-factory">Acme opens a new rocket factory in Arizona</a>
+<a href="/news/2024/03/02/acme-anvil-3000-recall">Acme recalls a batch of Anvil 3000 units</a>
+<a href="/news/archive">Archive</a>
+</main></body></html>
+"""
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Acme Blog</title>
+<item><title>Acme raises a $40M Series B</title><link>http://127.0.0.1:{port}/blog/series-b</link>
+<pubDate>Mon, 27 May 2024 09:00:00 GMT</pubDate><description>&lt;p&gt;Acme raised &lt;b&gt;$40M&lt;/b&gt; to build more rockets.&lt;/p&gt;</description></item>
+<item><title>Rocket skates now ship worldwide</title><link>http://127.0.0.1:{port}/blog/rocket-skates</link>
+<pubDate>Tue, 14 May 2024 12:30:00 +0200</pubDate><description>Acme rocket skates are available in 40 countries.</description></item>
+</channel></rss>
+"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Acme Press Releases</title>
+<entry><title>Acme raises a $40M Series B</title>
+<link href="http://127.0.0.1:{port}/blog/series-b/?utm_source=atom"/>
+<updated>2024-05-27T09:00:00Z</updated><summary>Acme raised $40M to build more rockets.</summary></entry>
+<entry><title>Acme names a new chief rocket officer</title>
+<link rel="alternate" href="/news/2024/04/10/new-chief-rocket-officer"/>
+<published>2024-04-10T08:00:00+00:00</published><summary>Wile E. joins the leadership team.</summary></entry>
+</feed>
+"""
+
+INDUSTRY = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Industry Wire</title>
+<item><title>Ajax and Acme compete for the anvil market</title><link>https://wire.example/anvil-market</link>
+<pubDate>Thu, 30 May 2024 07:00:00 GMT</pubDate></item>
+<item><title>Globex reports record quarter</title><link>https://wire.example/globex-quarter</link>
+<pubDate>Fri, 31 May 2024 07:00:00 GMT</pubDate></item>
+<item><title>Acme raises a $40M Series B</title><link>https://wire.example/acme-series-b</link>
+<pubDate>Mon, 27 May 2024 10:00:00 GMT</pubDate><description>Acme raised $40M to build more rockets.</description></item>
+</channel></rss>
+"""
+
+SEARCH = """<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel><title>Search results for {query}</title></channel>
+<item><title>{query} wins a design award for the Giant Magnet</title><link>https://search.example/{query}/design-award</link>
+<dc:date>2024-05-22T15:00:00Z</dc:date></item>
+</rdf:RDF>
+"""
+
+#Serves the feeds and pages by path
+class FeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, _Handler)
+        self.requests: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def document(self, path: str, query: Dict) -> Optional[Tuple[str, str]]:
+        """
+        Return the content type and body served at a path, or None.
+        """
+        port = self.server_address[1]
+        if path == "/":
+            return "text/html; charset=utf-8", HOMEPAGE
+        if path in ("/news", "/news/"):
+            return "text/html; charset=utf-8", NEWSROOM
+        if path == "/feed.xml":
+            return "application/rss+xml; charset=utf-8", RSS.format(port=port)
+        if path == "/news/atom.xml":
+            return "application/atom+xml", ATOM.format(port=port)
+        if path == "/industry.rss":
+            return "application/rss+xml", INDUSTRY
+        if path == "/search.rss":
+            return "application/rdf+xml", SEARCH.format(query=query.get("q", ["news"])[0])
+        return None
+
+    def stats(self) -> Dict:
+        with self.lock:
+            counts = dict(self.requests)
+        statuses = Counter()
+        for (_, status), count in counts.items():
+            statuses[status] += count
+        return {
+            "requests": sum(counts.values()),
+            "by_status": {str(status): count for status, count in sorted(statuses.items())},
+            "by_path": {f"{path} {status}": count for (path, status), count in sorted(counts.items())},
+        }
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FeedServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, headers: Dict, body: bytes = b"") -> None:
+        path = urlsplit(self.path).path
+        with self.server.lock:
+            self.server.requests[(path, status)] += 1
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/stats":
+            return self._send(200, {"Content-Type": "application/json"}, json.dumps(self.server.stats()).encode())
+        document = self.server.document(parts.path, parse_qs(parts.query))
+        if document is None:
+            return self._send(404, {"Content-Type": "text/html"}, b"<html><body>Not found</body></html>")
+        media_type, body = document
+        payload = body.encode("utf-8")
+        etag = '"' + hashlib.sha256(payload).hexdigest()[:16] + '"'
+        validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+        if self.headers.get("If-None-Match") == etag or (
+            "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == LAST_MODIFIED
+        ):
+            return self._send(304, validators)
+        self._send(200, {"Content-Type": media_type, **validators}, payload)
+
+def start(port: int = 0) -> FeedServer:
+    """
+    Start the feed server on a background thread and return it.
+    """
+    server = FeedServer(("127.0.0.1", port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def gather_twice(base: str) -> Tuple[List, List, Dict]:
+    import httpx
+    from app.services.html_parsing import parse_html
+    from app.services.news_feeds import NewsGatherer, feed_links
+
+    async with httpx.AsyncClient() as client:
+        async def site() -> Dict:
+            # What the agent's website snapshot provides: the homepage and the feeds it advertises
+            response = await client.get(base + "/")
+            return {"url": base + "/", "feeds": feed_links(parse_html(response.content), base + "/")}
+
+        gatherer = NewsGatherer(
+            client,
+            feed_urls=[base + "/search.rss?q={company}", base + "/industry.rss"],
+            cache_ttl_seconds=0
+        )
+        first = await gatherer.gather("Acme", site=site)
+        # The per-company cache is off, so the second pass revalidates every source
+        second = await gatherer.gather("Acme", site=site)
+        return first, second, gatherer.stats()
+
+def check(first: List, second: List, stats: Dict) -> List[str]:
+    """
+    Return problems with the gathered news.
+    """
+    problems = []
+    titles = [article.title for article in first]
+    if len(titles) != len(set(titles)):
+        problems.append(f"duplicate titles: {titles}")
+    if any("Globex" in title for title in titles):
+        problems.append("an industry feed item that does not mention Acme was kept")
+    dates = [article.date for article in first if article.date]
+    if dates != sorted(dates, reverse=True) or any(article.date is None for article in first[:len(dates)]):
+        problems.append("articles are not ranked newest first")
+    if [article.url for article in second] != [article.url for article in first]:
+        problems.append("the revalidated pass returned different articles")
+    if stats["fetches"]["not_modified"] < stats["fetches"]["ok"] // 2:
+        problems.append(f"expected the second pass to be answered with 304s: {stats['fetches']}")
+    return problems
+
+def demo() -> int:
+    import asyncio
+
+    server = start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    first, second, stats = asyncio.run(gather_twice(base))
+    for article in first:
+        date = article.date.isoformat() if article.date else "undated"
+        print(f"{date:25}  {article.source:22}  {article.title}  <{article.url}>")
+    print(f"gatherer: {stats['fetches']}")
+    print(f"server: {server.stats()['by_status']}")
+    problems = check(first, second, stats)
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+    server.shutdown()
+    return 1 if problems else 0
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["serve", "demo"])
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args(argv)
+
+    if args.command == "demo":
+        return demo()
+    server = FeedServer(("127.0.0.1", args.port))
+    print(f"News feed server on http://127.0.0.1:{args.port}/ (GET /stats for request counts)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Report on research runs recorded by the JSONL span exporter.
+
+    waterfall       print the span tree of recent runs with start offsets and durations
+    critical-path   aggregate where the critical path of many runs spent its time
+
+Usage:
+    python scripts/trace_report.py waterfall [--trace-file PATH] [--last N | --trace ID]
+    python scripts/trace_report.py critical-path [--trace-file PATH] [--last N]
+"""
+from typing import Dict, List, Tuple
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+# Add the backend directory to the Python path so the app package resolves
+backend_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+from app.services.tracing import load_spans
+
+# Attributes worth showing next to a span in the waterfall
+_SHOWN_ATTRIBUTES = (
+    "company_name", "url", "status", "bytes", "truncated", "aborted", "source",
+    "request_tokens", "response_tokens", "retries", "saved_tokens", "error",
+)
+
+def group_traces(spans: List[Dict]) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+    """
+    Return root spans (research and refresh runs) ordered by start time and a map from span id to its children.
+    """
+    roots = [span for span in spans if span["parent_id"] is None]
+    children: Dict[str, List[Dict]] = defaultdict(list)
+    for span in spans:
+        if span["parent_id"] is not None:
+            children[span["parent_id"]].append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda span: span["start"])
+    roots.sort(key=lambda span: span["start"])
+    return roots, children
+
+def critical_path(span: Dict, children: Dict[str, List[Dict]]) -> List[Tuple[str, float]]:
+    """
+    Split a span's duration into (span name, seconds) segments along its critical path.
+
+    Walks back from the end of the span: the child that finishes last is on the path,
+    then the child that finishes last before that one started, and so on. Gaps between
+    them are time the span spent itself.
+    """
+    segments = []
+    cursor = span["end"]
+    for child in sorted(children.get(span["span_id"], []), key=lambda c: c["end"], reverse=True):
+        if child["end"] > cursor or child["end"] <= span["start"]:
+            continue
+        segments.append((span["name"], cursor - child["end"]))
+        segments.extend(critical_path(child, children))
+        cursor = max(child["start"], span["start"])
+    segments.append((span["name"], cursor - span["start"]))
+    return [(name, seconds) for name, seconds in segments if seconds > 0]
+
+def print_waterfall(root: Dict, children: Dict[str, List[Dict]], width: int = 40) -> None:
+    total = max(root["end"] - root["start"], 1e-9)
+    print(f"trace {root['trace_id']}  {root['duration_ms'] / 1000:.2f}s  {root['status']}")
+
+    def walk(span: Dict, depth: int) -> None:
+        offset = span["start"] - root["start"]
+        begin = int(offset / total * width)
+        length = max(1, int((span["end"] - span["start"]) / total * width))
+        bar = " " * begin + "#" * min(length, width - begin)
+        attributes = " ".join(
+            f"{key}={span['attributes'][key]}" for key in _SHOWN_ATTRIBUTES
+            if span["attributes"].get(key) not in (None, "", False)
+        )
+        label = ("  " * depth + span["name"])[:40]
+        print(f"  {label:<40}{offset * 1000:>10.1f}{span['duration_ms']:>11.1f}ms |{bar:<{width}}| {attributes}")
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+
+    print(f"  {'span':<40}{'start ms':>10}{'duration':>13} |{'':<{width}}|")
+    walk(root, 0)
+    print()
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def print_critical_path(roots: List[Dict], children: Dict[str, List[Dict]]) -> None:
+    totals: Dict[str, float] = defaultdict(float)
+    runs: Dict[str, int] = defaultdict(int)
+    for root in roots:
+        seen = set()
+        for name, seconds in critical_path(root, children):
+            totals[name] += seconds
+            seen.add(name)
+        for name in seen:
+            runs[name] += 1
+
+    durations = [root["duration_ms"] / 1000 for root in roots]
+    total = sum(durations)
+    print(
+        f"{len(roots)} runs, total {total:.2f}s, p50 {percentile(durations, 0.5):.2f}s, "
+        f"p95 {percentile(durations, 0.95):.2f}s, max {max(durations):.2f}s"
+    )
+    print(f"{'span':<40}{'critical s':>12}{'share':>8}{'per run s':>11}{'runs':>6}")
+    for name, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"{name:<40}{seconds:>12.2f}{seconds / total * 100 if total else 0:>7.1f}%{seconds / len(roots):>11.3f}{runs[name]:>6}")
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["waterfall", "critical-path"])
+    parser.add_argument("--trace-file", default=".cache/traces.jsonl", help="TRACE_PATH of the server (default: %(default)s)")
+    parser.add_argument("--last", type=int, default=None, help="Only the N most recent runs")
+    parser.add_argument("--trace", help="A single trace id (waterfall only)")
+    args = parser.parse_args(argv)
+
+    spans = [span for span in load_spans(args.trace_file) if span.get("end") is not None]
+    roots, children = group_traces(spans)
+    if args.trace:
+        roots = [root for root in roots if root["trace_id"] == args.trace]
+    if args.last:
+        roots = roots[-args.last:]
+    elif args.command == "waterfall" and not args.trace:
+        roots = roots[-1:]
+    if not roots:
+        print(f"No runs found in {args.trace_file}")
+        return 1
+
+    if args.command == "waterfall":
+        for root in roots:
+            print_waterfall(root, children)
+    else:
+        print_critical_path(roots, children)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,4 +29,8 @@ setup(
         "email-validator==2.1.0.post1",
         "pydantic-ai>=0.1.0",
     ],
+    extras_require={
+        "fast": ["lxml>=5.0.0"],
+        "http2": ["httpx[http2]>=0.26.0"],
+    },
 ) 
\ No newline at end of file